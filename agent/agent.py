@@ -1,15 +1,26 @@
 import asyncio
+import os
+import time
 from loguru import logger
 from typing import Optional
 
 from browser.playwright_manager import PlaywrightManager
+from browser.auth_state import AuthStateCache
 from llm.groq_client import GroqLLM
 from agent.observer import Observer
 from agent.reasoner import PageReasoner
 from agent.planner import ActionPlanner
 from agent.executor import ActionExecutor
 from agent.analyzer import IssueAnalyzer
+from agent.issue_store import IssueStore
 from agent.memory import Memory
+from agent.decision_cache import DecisionCache
+from agent.history import HistoryCompressor
+from agent.pipeline import StepPipeline
+from agent.rules import RuleEngine
+from agent.explorer import ExplorationGraph
+from config.settings import settings
+from telemetry.metrics import Metrics
 
 class AurickLiteAgent:
     """
@@ -17,79 +28,245 @@ class AurickLiteAgent:
     """
     def __init__(self, 
                  browser: PlaywrightManager,
-                 groq: GroqLLM):
+                 groq: GroqLLM,
+                 decision_cache: Optional[DecisionCache] = None,
+                 bypass_cache: Optional[bool] = None,
+                 log_dir: str = "logs",
+                 pipelined: Optional[bool] = None,
+                 rules: Optional[RuleEngine] = None,
+                 exploration: Optional[bool] = None,
+                 issue_store: Optional[IssueStore] = None,
+                 run: Optional[str] = None,
+                 observer_mode: Optional[str] = None,
+                 auth_state: Optional[AuthStateCache] = None):
         
         self.browser = browser
-        self.memory = Memory()
+        # Latency spans for this session; shared with the browser so its calls land in the same histograms
+        self.metrics: Metrics = browser.metrics
+        self.memory = Memory(
+            log_dir=log_dir,
+            window=settings.MEMORY_WINDOW,
+            fsync_every=settings.JOURNAL_FSYNC_EVERY
+        )
+        # Rolling, token-capped summary of earlier steps for the reasoner
+        self.history = HistoryCompressor(
+            recent=settings.HISTORY_RECENT_STEPS,
+            budget=settings.HISTORY_TOKEN_BUDGET
+        )
+        self.log_dir = log_dir
+        self.log_path: Optional[str] = None
+        # Set when the loop crashed (e.g. every navigation retry failed); runners report the session as failed
+        self.error: Optional[str] = None
+
+        # Decision cache: reuse decisions for pages we have already reasoned about.
+        # bypass_cache=True (or DECISION_CACHE_BYPASS) forces fresh LLM calls for exploratory runs.
+        if decision_cache is None and settings.DECISION_CACHE_ENABLED:
+            decision_cache = DecisionCache.from_settings(settings, bypass=bypass_cache)
+        elif decision_cache is not None and bypass_cache is not None:
+            decision_cache.bypass = bypass_cache
+        self.decision_cache = decision_cache
+
+        # Fast-path rules answer structurally obvious pages (login form, cookie banner, ...) without the LLM
+        if rules is None and settings.FAST_PATH_RULES:
+            rules = RuleEngine.from_settings(settings)
+        self.rules = rules
+
+        # Logged-in storage state per site: restored before the first page, saved after a login
+        if auth_state is None and settings.AUTH_STATE_ENABLED:
+            auth_state = AuthStateCache.from_settings(settings)
+        self.auth = auth_state
+
+        # Exploration state graph of the site (loaded per site when the session starts)
+        self.exploration = settings.EXPLORATION_ENABLED if exploration is None else exploration
+        self.explorer: Optional[ExplorationGraph] = None
         
         # Initialize Modules
-        self.observer = Observer(browser)
-        self.reasoner = PageReasoner(groq)
+        self.observer = Observer(browser, mode=observer_mode)
+        self.reasoner = PageReasoner(groq, cache=decision_cache, metrics=self.metrics, rules=rules)
         self.planner = ActionPlanner()
         self.executor = ActionExecutor()
-        self.analyzer = IssueAnalyzer()
+        # Fingerprinted issue history shared by all sessions of a run (run = sweep; a lone session is its own run)
+        if issue_store is None and settings.ISSUE_STORE_ENABLED:
+            issue_store = IssueStore.from_settings(
+                settings,
+                run=run or f"session_{self.memory.start_time.strftime('%Y%m%d_%H%M%S')}"
+            )
+        self.issue_store = issue_store
+        self.analyzer = IssueAnalyzer(store=issue_store)
+
+        # Analysis and journaling of a finished step overlap with the next observation
+        # unless pipelining is off (PIPELINED_STEPS=false), in which case they run inline.
+        self.pipeline = StepPipeline(
+            self.analyzer,
+            self.memory,
+            browser,
+            pipelined=settings.PIPELINED_STEPS if pipelined is None else pipelined,
+            max_pending=settings.PIPELINE_MAX_PENDING,
+            metrics=self.metrics
+        )
         
+    def _step_record(self, step: int, observation: dict, decision: dict, plan: dict, result: dict) -> dict:
+        return {
+            "step": step,
+            "timestamp": str(self.memory.start_time),
+            "url": observation.get("url"),
+            "observation_summary": observation.get("visible_text_summary", "")[:100],
+            "decision": decision,
+            "decision_source": self.reasoner.last_source,
+            "prompt_tokens": self.reasoner.last_prompt_tokens,
+            "plan": plan,
+            "result": result,
+            "issues": []
+        }
+
     async def run(self, start_url: str, max_steps: int = 15):
         """
         Main Agent Loop.
         """
         logger.info(f"Agent starting session on {start_url}")
         
+        if self.exploration:
+            self.explorer = ExplorationGraph.for_site(
+                start_url,
+                directory=settings.EXPLORE_DIR,
+                max_repeats=settings.EXPLORE_MAX_REPEATS,
+                max_states=settings.EXPLORE_MAX_STATES
+            )
+
         try:
-            await self.browser.open(start_url)
+            restored_url = await self.auth.restore(self.browser, start_url) if self.auth else None
+            await self.browser.open(restored_url or start_url)
             
             for step in range(1, max_steps + 1):
                 logger.info(f"\n--- STEP {step} ---")
+                step_started = time.perf_counter()
                 
                 # 1. OBSERVE
-                observation = await self.observer.observe()
+                with self.metrics.span("phase.observe") as observe_span:
+                    observation = await self.observer.observe()
                 if "error" in observation:
                     logger.error("Failed to observe. Stopping.")
                     break
+                visit = self.explorer.visit(observation) if self.explorer else None
+                # A restored login that lands on a login form is dropped; a finished login is saved
+                auth_event = await self.auth.check(observation, self.browser) if self.auth else None
 
                 # 2. REASON ("THINK")
-                # Pass history into reasoner
-                decision = self.reasoner.reason(observation, self.memory.get_history())
+                # Pass compressed history into reasoner (constant size regardless of step count)
+                with self.metrics.span("phase.reason") as reason_span:
+                    decision = await self.reasoner.reason(
+                        observation,
+                        self.history,
+                        exploration=self.explorer.describe() if self.explorer else None
+                    )
                 
                 # 3. PLAN
-                plan = self.planner.plan(decision)
+                with self.metrics.span("phase.plan") as plan_span:
+                    plan = self.planner.plan(decision)
+                    # Break loops: an action repeated too often here is swapped for an untried one
+                    steered = self.explorer.steer(plan) if self.explorer else None
+                    if steered:
+                        logger.info(f"Explorer replaced '{plan.get('target_description')}' with {steered['type']} '{steered['target_description']}'")
+                        plan = steered
                 
                 if plan["type"] == "stop":
                     logger.info(f"Agent decided to STOP: {plan.get('reason', 'No reason')}")
+                    # The stop is the last step: its decision may carry the issue that ended the session
+                    result = {"status": "stopped", "details": plan.get("reason", "")}
+                    step_data = self._step_record(step, observation, decision, plan, result)
+                    await self.pipeline.submit(step_data, observation, decision, result)
                     break
 
                 # 4. ACT
-                result = await self.executor.execute(plan, self.browser)
-
-                # 5. REFLECT & ANALYZE
-                # Pass 'decision' (which has potential_issues) as 'action' arg to analyzer as per design pattern
-                issues = self.analyzer.analyze(
-                    observation=observation, 
-                    action=decision, 
-                    result=result, 
-                    browser=self.browser
-                )
-                
+                with self.metrics.span("phase.act") as act_span:
+                    result = await self.executor.execute(plan, self.browser)
+                if self.explorer:
+                    self.explorer.record_action(plan)
+                if self.auth:
+                    self.auth.note_actions(result.get("actions") or [plan], settings.TEST_PASSWORD)
+
+                # Let the page settle before the next observation, then account for its traffic
+                await self.browser.settle()
+                network = await self.browser.network_report()
+
                 # SAVE STATE
-                step_data = {
-                    "step": step,
-                    "timestamp": str(self.memory.start_time),
-                    "url": observation.get("url"),
-                    "observation_summary": observation.get("visible_text_summary", "")[:100],
-                    "decision": decision,
-                    "plan": plan,
-                    "result": result,
-                    "issues": issues
-                }
-                self.memory.add_step(step_data)
+                step_data = self._step_record(step, observation, decision, plan, result)
+                step_data["network"] = network
+                if auth_event:
+                    step_data["auth"] = auth_event
+                if self.observer.delta:
+                    step_data["observation"] = "delta" if "delta" in observation else "full"
+                if visit:
+                    step_data["exploration"] = dict(visit, steered=bool(steered))
+                if self.metrics.enabled:
+                    step_data["timings_ms"] = {
+                        "observe": round(observe_span.ms, 2),
+                        "reason": round(reason_span.ms, 2),
+                        "plan": round(plan_span.ms, 2),
+                        "act": round(act_span.ms, 2)
+                    }
+                self.history.record(step_data)
+
+                # 5. REFLECT & ANALYZE, then journal
+                # Pass 'decision' (which has potential_issues) as 'action' arg to analyzer as per design pattern.
+                # The pipeline fills in step_data["issues"]; in pipelined mode this overlaps the next step.
+                await self.pipeline.submit(step_data, observation, decision, result)
                 
-                # Small pause for stability
-                await asyncio.sleep(2)
+                # Demo profile idles between steps
+                await self.browser.step_pause()
+                self.metrics.record("step", (time.perf_counter() - step_started) * 1000)
 
         except Exception as e:
             logger.critical(f"Agent Loop Crashed: {e}")
-            # Log crash state?
+            self.error = f"{type(e).__name__}: {e}"
+            self.memory.add_summary({"error": self.error})
         finally:
+            # Pending analysis/journal work is finished before anything reads the session record
+            await self.pipeline.close()
+
+            if self.issue_store:
+                try:
+                    written = await asyncio.to_thread(self.issue_store.flush)
+                    issue_stats = await asyncio.to_thread(self.issue_store.summary)
+                    self.memory.add_summary({"issue_store": issue_stats})
+                    logger.info(f"Issue store: {written} fingerprints updated, {issue_stats['new_this_run']} new this run, "
+                                f"{issue_stats['fingerprints']} known ({self.issue_store.path})")
+                except Exception as e:
+                    logger.error(f"Failed to update issue store: {e}")
+                finally:
+                    self.issue_store.close()
+
+            if self.decision_cache:
+                cache_stats = self.decision_cache.summary()
+                self.memory.add_summary({"decision_cache": cache_stats})
+                logger.info(f"Decision cache stats: {cache_stats}")
+            if self.rules:
+                rule_stats = self.rules.summary()
+                self.memory.add_summary({"rules": rule_stats})
+                logger.info(f"Fast-path rules: {rule_stats['hits']}/{rule_stats['evaluated']} pages answered without the LLM")
+
+            if self.auth:
+                self.memory.add_summary({"auth_state": self.auth.stats})
+
+            if self.explorer:
+                coverage = self.explorer.coverage()
+                self.memory.add_summary({"coverage": coverage})
+                path = self.explorer.save()
+                logger.info(f"Exploration coverage: {coverage} (graph saved to {path})")
+
+            if self.metrics.enabled:
+                await self.browser.evidence.flush()  # include pending screenshot writes
+                latency = self.metrics.summary()
+                self.memory.add_summary({"latency": latency})
+                for name, stats in latency.items():
+                    logger.info(f"Latency {name}: p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms max={stats['max_ms']}ms (n={stats['count']})")
+                if settings.METRICS_EXPORT:
+                    path = self.metrics.export_prometheus(
+                        os.path.join(self.log_dir, "metrics.prom"),
+                        labels={"session": os.path.basename(os.path.normpath(self.log_dir))}
+                    )
+                    logger.info(f"Metrics exported to {path}")
+
             # Save session
-            log_path = self.memory.save_session()
-            logger.info(f"Session finished. Log saved to {log_path}")
+            self.log_path = self.memory.save_session(self.log_dir)
+            logger.info(f"Session finished. Log saved to {self.log_path}")
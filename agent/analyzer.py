@@ -1,23 +1,46 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from loguru import logger
 from browser.playwright_manager import PlaywrightManager
+from agent.issue_store import IssueStore, fingerprint, url_pattern
 
 class IssueAnalyzer:
     """
     The QA Insight Engine: Detects and reports anomalies, errors, and UX issues.
     """
+    def __init__(self, store: Optional[IssueStore] = None):
+        # Sequence number of the first console entry not yet analyzed
+        self.console_cursor = 0
+        # Cross-session history of fingerprints; occurrences are counted there, not repeated in steps
+        self.store = store
+        # fingerprint -> occurrences this session
+        self.seen: Dict[str, int] = {}
+
+    def take_console(self, browser: PlaywrightManager) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Console entries emitted since the previous step, and how many were evicted unread.
+        Advances the cursor, so call it once per step at the point the step ends.
+        """
+        new_logs, self.console_cursor, missed = browser.console_logs.since(self.console_cursor)
+        return new_logs, missed
+
     def analyze(self, 
                 observation: Dict[str, Any], 
                 action: Dict[str, Any], 
                 result: Dict[str, Any], 
-                browser: PlaywrightManager) -> List[Dict[str, Any]]:
-        
+                browser: PlaywrightManager,
+                console: Optional[Tuple[List[Dict[str, Any]], int]] = None) -> List[Dict[str, Any]]:
+        """
+        `console` is a `take_console` result captured earlier; pipelined steps pass it so that
+        analysis running in the background does not pick up the next step's console output.
+        """
+
         issues = []
         url = observation.get("url", "unknown")
 
         # 1. Action Execution Failures (High Severity)
         if result.get("status") == "error":
             issues.append({
+                "kind": "action_error",
                 "severity": "high",
                 "title": "Action failed to execute",
                 "description": result.get("details", "Unknown execution error"),
@@ -29,27 +52,32 @@ class IssueAnalyzer:
             })
 
         # 2. Console Errors (Medium Severity)
-        # We need to filter for new errors since last step, but for simplicity we take recent ones
-        # A more robust system would track timestamps. 
-        # Here we just check if any exist and perhaps were not there before (simple approximation needed or just report all unique)
-        if browser.console_logs:
-            # Simple heuristic: report errors if they exist. In a real loop, clearing or diffing logs is better.
-            # We'll just report the presence of errors in the recent logs (last 3).
-            recent_errors = [
-                log for log in browser.console_logs[-5:] 
-                if log['type'] in ['error', 'warning']
-            ]
-            
-            if recent_errors:
-                issues.append({
-                    "severity": "medium",
-                    "title": "Console errors/warnings detected",
-                    "description": "Browser console reported errors during interaction.",
-                    "evidence": {
-                        "url": url,
-                        "errors": recent_errors
-                    }
-                })
+        # Each step only sees console entries emitted since the previous step (cursor over the ring buffer),
+        # so errors are reported once and none are skipped between steps.
+        new_logs, missed = console if console is not None else self.take_console(browser)
+        recent_errors = [
+            log for log in new_logs
+            if log['type'] in ['error', 'warning']
+        ]
+
+        if missed:
+            logger.warning(f"{missed} console entries were evicted before analysis (buffer overflow).")
+
+        # One issue per distinct message and source location, so each can be fingerprinted on its own
+        for log in recent_errors:
+            location = log.get("location") or {}
+            issues.append({
+                "kind": "console",
+                "severity": "medium",
+                "title": f"Console {log['type']}",
+                "description": log.get("text", ""),
+                "location": f"{url_pattern(location.get('url', ''))}:{location.get('lineNumber', '')}" if location.get("url") else "",
+                "evidence": {
+                    "url": url,
+                    "entry": log,
+                    "dropped_entries": missed
+                }
+            })
 
         # 3. LLM-Detected Potential Issues (Low/Medium Severity)
         # These come from the 'potential_issues' field in the Reasoner's output (which is passed in 'action' usually or separate)
@@ -73,6 +101,7 @@ class IssueAnalyzer:
         if isinstance(llm_issues, list):
             for issue in llm_issues:
                 issues.append({
+                    "kind": "llm",
                     "severity": "low",
                     "title": "Potential UX issue (AI Detected)",
                     "description": issue,
@@ -81,7 +110,35 @@ class IssueAnalyzer:
                     }
                 })
 
+        issues = self._dedupe(issues)
         if issues:
-            logger.info(f"Analyzer found {len(issues)} issues.")
-            
+            new = sum(1 for issue in issues if "repeat" not in issue)
+            logger.info(f"Analyzer found {len(issues)} issues ({new} new this session).")
+
         return issues
+
+    def _dedupe(self, issues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Fingerprint the step's issues. The first occurrence in a session keeps its evidence;
+        later ones shrink to a reference ({"fingerprint", "title", "repeat": n}) so a console
+        error firing on every step does not fill the session file.
+        """
+        deduped: Dict[str, Dict[str, Any]] = {}
+        for issue in issues:
+            key = fingerprint(issue)
+            if key in deduped:
+                continue  # the same problem twice in one step (e.g. an error logged in a loop)
+            issue["fingerprint"] = key
+            self.seen[key] = self.seen.get(key, 0) + 1
+            if self.seen[key] > 1:
+                issue = {
+                    "fingerprint": key,
+                    "kind": issue["kind"],
+                    "severity": issue["severity"],
+                    "title": issue["title"],
+                    "repeat": self.seen[key]
+                }
+            deduped[key] = issue
+        if self.store is not None:
+            self.store.add(issues)
+        return list(deduped.values())
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from loguru import logger
+
+# Bump when the fingerprint normalization changes so old entries stop matching.
+FINGERPRINT_VERSION = 1
+
+class DecisionCache:
+    """
+    The Recall: Content-addressed cache of reasoner decisions.
+    Keyed by a normalized observation fingerprint plus prompt and model version,
+    with an in-memory LRU tier in front of a size-bounded on-disk tier.
+    """
+    def __init__(self,
+                 cache_dir: str = "logs/decision_cache",
+                 max_memory_entries: int = 256,
+                 max_disk_bytes: int = 50 * 1024 * 1024,
+                 ttl_seconds: float = 7 * 24 * 3600,
+                 bypass: bool = False):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self.bypass = bypass
+
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._disk_bytes: Optional[int] = None
+        self.last_source: Optional[str] = None
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "expired": 0,
+            "writes": 0,
+            "evictions": 0
+        }
+
+    @classmethod
+    def from_settings(cls, settings, bypass: Optional[bool] = None) -> "DecisionCache":
+        return cls(
+            cache_dir=settings.DECISION_CACHE_DIR,
+            max_memory_entries=settings.DECISION_CACHE_MEMORY_ENTRIES,
+            max_disk_bytes=settings.DECISION_CACHE_MAX_MB * 1024 * 1024,
+            ttl_seconds=settings.DECISION_CACHE_TTL,
+            bypass=settings.DECISION_CACHE_BYPASS if bypass is None else bypass
+        )
+
+    # --- Fingerprinting ---
+
+    @staticmethod
+    def _normalize(value: Any) -> Any:
+        """Collapse whitespace and drop URL fragments so cosmetic differences share a key."""
+        if isinstance(value, str):
+            return re.sub(r"\s+", " ", value).strip()
+        if isinstance(value, dict):
+            normalized = {}
+            for k, v in value.items():
+                if k in ("url", "href") and isinstance(v, str):
+                    v = v.split("#", 1)[0]
+                normalized[k] = DecisionCache._normalize(v)
+            return normalized
+        if isinstance(value, list):
+            return [DecisionCache._normalize(v) for v in value]
+        return value
+
+    def fingerprint(self, observation: Dict[str, Any], prompt: str, model: str) -> str:
+        payload = json.dumps({
+            "v": FINGERPRINT_VERSION,
+            "model": model,
+            "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+            "observation": self._normalize(observation)
+        }, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # --- Lookup / Store ---
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached decision or None. Also reports which tier served it via `last_source`."""
+        self.last_source = None
+        if self.bypass:
+            self.stats["bypassed"] += 1
+            return None
+
+        # 1. Memory tier
+        entry = self._memory.get(key)
+        if entry is not None:
+            if not self._expired(entry["created"]):
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                self.last_source = "memory"
+                return entry["decision"]
+            del self._memory[key]
+            self.stats["expired"] += 1
+
+        # 2. Disk tier
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            entry = None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            entry = None
+
+        if entry is not None:
+            try:
+                if not self._expired(entry["created"]):
+                    os.utime(path)  # keep recently used entries out of eviction
+                    decision = entry["decision"]
+                    self._remember(key, entry)
+                    self.stats["disk_hits"] += 1
+                    self.last_source = "disk"
+                    return decision
+                self._remove(path)
+                self.stats["expired"] += 1
+            except OSError as e:
+                # The directory is shared across sessions and workers: another one evicted it meanwhile
+                logger.debug(f"Cache entry {path} vanished during lookup: {e}")
+            except (KeyError, TypeError) as e:
+                logger.warning(f"Discarding malformed cache entry {path}: {e!r}")
+                self._remove(path)
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, decision: Dict[str, Any]):
+        entry = {"created": time.time(), "decision": decision}
+        self._remember(key, entry)
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = json.dumps(entry, ensure_ascii=False)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            usage = self.disk_usage()
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            # Decisions carry typed values, including the test password: keep the files private
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self.stats["writes"] += 1
+            self._disk_bytes = usage + len(data.encode("utf-8")) - previous
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+        except Exception as e:
+            logger.warning(f"Failed to persist decision cache entry: {e}")
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    # --- Disk Housekeeping ---
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                        entries.append((stat.st_mtime, stat.st_size, path))
+                    except FileNotFoundError:
+                        pass
+        return entries
+
+    def disk_usage(self) -> int:
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(size for _, size, _ in self._entries())
+        return self._disk_bytes
+
+    def _remove(self, path: str):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            if self._disk_bytes is not None:
+                self._disk_bytes -= size
+        except FileNotFoundError:
+            pass
+
+    def _evict_disk(self):
+        """Drop the oldest entries until the disk tier is back under 90% of its budget."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_disk_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.stats["evictions"] += 1
+            except FileNotFoundError:
+                pass
+        self._disk_bytes = total
+
+    def summary(self) -> Dict[str, Any]:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_bytes": self.disk_usage()
+        }
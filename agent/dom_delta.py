@@ -0,0 +1,233 @@
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+from urllib.parse import urldefrag
+from loguru import logger
+
+# Installed into every document of the context (and inline on first use). Collects the
+# elements touched by DOM mutations and form input since the last snapshot. Only
+# attributes that change what the observer reports are watched, so the resolver's
+# handle attribute does not dirty the page.
+DIRTY_TRACKER_SCRIPT = """
+(() => {
+    if (window.__aurickDirty) return;
+    const state = window.__aurickDirty = {
+        doc: Math.random().toString(36).slice(2),
+        roots: new Set(),
+        overflow: false,
+        ids: new WeakMap(),
+        known: new Map(),
+        nextId: 1
+    };
+    const mark = (node) => {
+        const el = node && (node.nodeType === 1 ? node : node.parentElement);
+        if (!el || state.overflow) return;
+        state.roots.add(el);
+        if (state.roots.size > 500) { state.overflow = true; state.roots.clear(); }
+    };
+    const start = () => {
+        new MutationObserver(records => { for (const r of records) mark(r.target); })
+            .observe(document, {
+                subtree: true, childList: true, characterData: true, attributes: true,
+                attributeFilter: ['class', 'style', 'hidden', 'disabled', 'value', 'href', 'placeholder', 'open',
+                                  'aria-hidden', 'aria-expanded', 'aria-disabled', 'aria-checked', 'aria-selected']
+            });
+        // Typing changes .value without touching the DOM
+        document.addEventListener('input', e => mark(e.target), true);
+        document.addEventListener('change', e => mark(e.target), true);
+    };
+    if (document.documentElement) start();
+    else document.addEventListener('readystatechange', start, { once: true });
+})();
+"""
+
+# Full snapshot or delta since the previous call, in one round trip. Elements are
+# described exactly like SNAPSHOT_SCRIPT does and keyed by a per-document id kept in a
+# WeakMap (no attribute is written, so keying never shows up as a mutation).
+DELTA_SNAPSHOT_SCRIPT = """
+([full, maxRoots, maxText]) => {
+""" + DIRTY_TRACKER_SCRIPT + """
+    const state = window.__aurickDirty;
+    const SELECTOR = 'button, a, input, textarea, select';
+    const keyOf = (el) => {
+        let key = state.ids.get(el);
+        if (!key) { key = String(state.nextId++); state.ids.set(el, key); }
+        return key;
+    };
+    const describe = (el) => {
+        const tag = el.tagName;
+        if (tag === 'BUTTON') {
+            const text = el.innerText.trim();
+            return text ? { kind: 'button', data: { text: text, disabled: el.disabled, id: el.id, class: el.className } } : null;
+        }
+        if (tag === 'A') {
+            const text = el.innerText.trim();
+            return text && el.href ? { kind: 'link', data: { text: text, href: el.href } } : null;
+        }
+        const type = el.type || 'text';
+        if (type === 'hidden') return null;
+        return { kind: 'input', data: { tag: tag.toLowerCase(), type: type, placeholder: el.placeholder || "",
+                                        name: el.name || "", id: el.id || "", value: el.value || "" } };
+    };
+    const entry = (el, d) => ({ key: keyOf(el), kind: d.kind, data: d.data });
+
+    // Keep only outermost dirty roots that are still in the document
+    const roots = [];
+    for (const root of state.roots) {
+        if (!root.isConnected) continue;
+        let parent = root.parentElement, covered = false;
+        while (parent) {
+            if (state.roots.has(parent)) { covered = true; break; }
+            parent = parent.parentElement;
+        }
+        if (!covered) roots.push(root);
+    }
+    const wholePage = roots.some(r => r === document.body || r === document.documentElement);
+    if (full || state.overflow || wholePage || roots.length > maxRoots) {
+        state.roots.clear();
+        state.overflow = false;
+        state.known.clear();
+        const elements = [];
+        for (const el of document.querySelectorAll(SELECTOR)) {
+            const d = describe(el);
+            if (!d) continue;
+            const e = entry(el, d);
+            state.known.set(e.key, { el: el, sig: JSON.stringify(d) });
+            elements.push(e);
+        }
+        return { mode: 'full', doc: state.doc, title: document.title,
+                 text: document.body ? document.body.innerText : "", elements: elements };
+    }
+
+    const added = [], changed = [], removed = [], texts = [];
+    for (const [key, rec] of state.known) {
+        if (!rec.el.isConnected) { removed.push(key); state.known.delete(key); }
+    }
+    for (const root of roots) {
+        const nodes = root.matches(SELECTOR) ? [root, ...root.querySelectorAll(SELECTOR)] : root.querySelectorAll(SELECTOR);
+        for (const el of nodes) {
+            const key = keyOf(el), d = describe(el), rec = state.known.get(key);
+            if (!d) {
+                if (rec) { removed.push(key); state.known.delete(key); }
+                continue;
+            }
+            const sig = JSON.stringify(d);
+            if (!rec) added.push(entry(el, d));
+            else if (rec.sig !== sig) changed.push(entry(el, d));
+            else continue;
+            state.known.set(key, { el: el, sig: sig });
+        }
+        if (!root.matches('input, textarea, select')) {
+            const text = (root.innerText || "").trim();
+            if (text) texts.push(text.slice(0, maxText));
+        }
+    }
+    state.roots.clear();
+
+    // New elements need their place in document order; known keys are cheap to list
+    let order = null;
+    if (added.length) {
+        order = [];
+        for (const el of document.querySelectorAll(SELECTOR)) {
+            const key = state.ids.get(el);
+            if (key && state.known.has(key)) order.push(key);
+        }
+    }
+    // Page text is re-read whole: cheap next to element extraction, and never stale
+    return { mode: 'delta', doc: state.doc, title: document.title, regions: roots.length,
+             text: document.body ? document.body.innerText : "",
+             added: added, changed: changed, removed: removed, texts: texts, order: order };
+}
+"""
+
+KINDS = {"button": "buttons", "link": "links", "input": "inputs"}
+
+class DomDeltaTracker:
+    """
+    The Diff: Keeps the last full observation of the page as a baseline and folds the
+    browser-side deltas into it, so an in-page action costs a re-read of the elements in
+    the touched regions (and of the page text) instead of walking the whole document.
+    Navigation, a new document, too many dirty regions or a long chain of deltas fall
+    back to a full snapshot.
+    """
+    def __init__(self, max_roots: int = 40, max_chain: int = 5, max_region_text: int = 500):
+        self.max_roots = max_roots
+        self.max_chain = max_chain
+        self.max_region_text = max_region_text
+        self.baseline: Optional[Dict[str, Any]] = None
+        self.chain = 0  # deltas applied since the last full snapshot
+        self.stats = {"full": 0, "delta": 0}
+        self._installed_context = None
+
+    async def install(self, context):
+        """Register the tracker for every future document of the context (once per context)."""
+        if context is not None and context is not self._installed_context:
+            await context.add_init_script(DIRTY_TRACKER_SCRIPT)
+            self._installed_context = context
+
+    def _needs_full(self, url: str) -> bool:
+        if self.baseline is None or self.chain >= self.max_chain:
+            return True
+        # Any navigation, including same-document route changes, starts from a fresh snapshot
+        return urldefrag(url)[0] != urldefrag(self.baseline["url"])[0]
+
+    async def snapshot(self, page) -> Dict[str, Any]:
+        """The same dict SNAPSHOT_SCRIPT returns; incremental ones also carry a "delta" entry."""
+        full = self._needs_full(page.url)
+        raw = await page.evaluate(DELTA_SNAPSHOT_SCRIPT, [full, self.max_roots, self.max_region_text])
+        if raw["mode"] == "delta" and raw["doc"] != self.baseline["doc"]:
+            # A new document behind the same URL (reload, form post): the delta is meaningless
+            raw = await page.evaluate(DELTA_SNAPSHOT_SCRIPT, [True, self.max_roots, self.max_region_text])
+        if raw["mode"] == "full":
+            return self._reset(raw, page.url)
+        return self._apply(raw, page.url)
+
+    def _reset(self, raw: Dict[str, Any], url: str) -> Dict[str, Any]:
+        self.stats["full"] += 1
+        self.chain = 0
+        self.baseline = {
+            "doc": raw["doc"],
+            "url": url,
+            "title": raw["title"],
+            "text": raw["text"],
+            "elements": OrderedDict((e["key"], (e["kind"], e["data"])) for e in raw["elements"])
+        }
+        return self._render()
+
+    def _apply(self, raw: Dict[str, Any], url: str) -> Dict[str, Any]:
+        self.stats["delta"] += 1
+        self.chain += 1
+        elements = self.baseline["elements"]
+        removed = []
+        for key in raw["removed"]:
+            if key in elements:
+                kind, data = elements.pop(key)
+                removed.append(dict(data, kind=kind))
+        for e in raw["changed"] + raw["added"]:
+            elements[e["key"]] = (e["kind"], e["data"])
+        if raw["order"]:
+            position = {key: i for i, key in enumerate(raw["order"])}
+            ordered = sorted(elements.items(), key=lambda item: position.get(item[0], len(position)))
+            self.baseline["elements"] = elements = OrderedDict(ordered)
+
+        # The current page text replaces the baseline's; region texts that are new are the text change
+        new_texts = [t for t in raw["texts"] if t not in self.baseline["text"]]
+        self.baseline["text"] = raw["text"]
+        self.baseline["title"] = raw["title"]
+        self.baseline["url"] = url
+
+        snapshot = self._render()
+        snapshot["delta"] = {
+            "added": [dict(e["data"], kind=e["kind"]) for e in raw["added"]],
+            "changed": [dict(e["data"], kind=e["kind"]) for e in raw["changed"]],
+            "removed": removed,
+            "text": new_texts,
+            "regions": raw["regions"]
+        }
+        logger.debug(f"DOM delta: {raw['regions']} regions, +{len(raw['added'])} ~{len(raw['changed'])} -{len(removed)}")
+        return snapshot
+
+    def _render(self) -> Dict[str, Any]:
+        grouped: Dict[str, List[Dict[str, Any]]] = {name: [] for name in KINDS.values()}
+        for kind, data in self.baseline["elements"].values():
+            grouped[KINDS[kind]].append(data)
+        return {"title": self.baseline["title"], "text": self.baseline["text"], **grouped}
@@ -1,16 +1,23 @@
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from loguru import logger
 from browser.playwright_manager import PlaywrightManager
+from agent.resolver import ElementResolver
+from telemetry.metrics import Metrics
 
 class ActionExecutor:
     """
     The Hands: Executes planned actions using robust, human-like heuristics.
     Prioritizes visible text matching over brittle CSS selectors.
     """
+    def __init__(self):
+        self.resolver = ElementResolver()
+        self.metrics = Metrics(enabled=False)
+
     async def execute(self, action: Dict[str, Any], browser: PlaywrightManager) -> Dict[str, Any]:
         
         page = browser.page
+        self.metrics = browser.metrics
         if not page:
             return {"status": "error", "details": "Browser not initialized"}
 
@@ -23,22 +30,17 @@ class ActionExecutor:
         logger.info(f"Executing Action: {action['type']} -> {action['target_description']}")
 
         try:
-            if action["type"] == "click":
-                await self._execute_click(action, page)
-
-            elif action["type"] == "navigate":
-                target = action.get("target_description")
-                if target:
-                    await browser.open(target)
-                else:
-                    raise Exception("Navigation target missing")
+            # Read before acting: a click may already have committed a navigation by the time it returns
+            start_url = page.url
+            await self._perform(action, browser)
 
-            elif action["type"] == "type":
-                await self._execute_type(action, page)
-
-            elif action["type"] == "stop":
+            if action["type"] == "stop":
                 result["status"] = "stopped"
                 result["details"] = f"Agent decided to stop: {action.get('reason')}"
+
+            # Planned follow-ups run in the same burst, each behind its guards
+            elif action.get("then"):
+                await self._run_follow_ups(action, browser, result, start_url)
             
             # Capture evidence of action
             await browser.screenshot(f"action_{action['type']}")
@@ -50,55 +52,100 @@ class ActionExecutor:
         
         return result
 
-    async def _execute_click(self, action, page):
+    async def _perform(self, action: Dict[str, Any], browser: PlaywrightManager, match: Optional[Dict[str, Any]] = None):
+        page = browser.page
+        if action["type"] == "click":
+            await self._execute_click(action, page, match)
+
+        elif action["type"] == "navigate":
+            target = action.get("target_description")
+            if target:
+                await browser.open(target)
+            else:
+                raise Exception("Navigation target missing")
+
+        elif action["type"] == "type":
+            await self._execute_type(action, page, match)
+
+    async def _run_follow_ups(self, action: Dict[str, Any], browser: PlaywrightManager, result: Dict[str, Any], start_url: str):
         """
-        Click heuristic: Find element by text content (Button or Link).
+        Execute `action["then"]` after the first action. A failed guard ends the burst without
+        an error: the agent simply re-observes the page and asks the reasoner again.
+        `start_url` is the page URL before the first action, which `url_unchanged` compares against.
+        """
+        page = browser.page
+        executed = [self._summary(action, "success")]
+        previous = action
+
+        for follow_up in action["then"]:
+            if previous["type"] == "click":
+                await browser.settle()  # a click may have changed the page under us
+
+            guards = follow_up.get("guards", [])
+            if "url_unchanged" in guards and page.url != start_url:
+                result["aborted"] = f"URL changed to {page.url} before '{follow_up['target_description']}'"
+                break
+
+            match = None
+            if "element_present" in guards:
+                match = await self._resolve(follow_up, page, strict=True)
+                if not match:
+                    result["aborted"] = f"'{follow_up['target_description']}' is no longer on the page"
+                    break
+
+            try:
+                await self._perform(follow_up, browser, match)
+            except Exception as e:
+                executed.append(self._summary(follow_up, "error", str(e)))
+                result["status"] = "error"
+                result["details"] = f"Follow-up {len(executed) - 1} failed: {e}"
+                break
+            executed.append(self._summary(follow_up, "success"))
+            previous = follow_up
+
+        if "aborted" in result:
+            logger.info(f"Burst stopped after {len(executed)} action(s): {result['aborted']}")
+        result["actions"] = executed
+
+    @staticmethod
+    def _summary(action: Dict[str, Any], status: str, details: str = "") -> Dict[str, Any]:
+        summary = {"type": action["type"], "target_description": action["target_description"], "status": status}
+        if action.get("input_value"):
+            summary["input_value"] = action["input_value"]
+        if details:
+            summary["details"] = details
+        return summary
+
+    async def _resolve(self, action: Dict[str, Any], page, strict: bool = False) -> Optional[Dict[str, Any]]:
+        """Find the element an action targets (one candidates call), or None."""
+        mode = "click" if action["type"] == "click" else "type"
+        description = action.get("target_description", "").lower()
+        with self.metrics.span("browser.resolve"):
+            candidates = await self.resolver.candidates(page, mode)
+        if mode == "click":
+            return self.resolver.match_click(description, candidates)
+        return self.resolver.match_type(description, candidates, strict=strict)
+
+    async def _execute_click(self, action, page, match=None):
+        """
+        Click heuristic: Find element by text content (Button, Link or Submit input).
+        All candidates are fetched in one call and matched in Python.
+        `match` skips the lookup when a guard already resolved the element.
         """
         description = action["target_description"].lower()
         if not description: return
 
-        # 1. Try Buttons
-        buttons = page.locator("button")
-        count = await buttons.count()
-        for i in range(count):
-            btn = buttons.nth(i)
-            text = (await btn.inner_text()).lower()
-            if description in text or text in description:
-                logger.info(f"Clicked button: '{text}'")
-                await btn.click()
-                return
-
-        # 2. Try Links
-        links = page.locator("a")
-        count = await links.count()
-        for i in range(count):
-            link = links.nth(i)
-            text = (await link.inner_text()).lower()
-            # Simple substring match for robustness
-            if text and (description in text or text in description):
-                 logger.info(f"Clicked link: '{text}'")
-                 await link.click()
-                 return
-        
-        # 3. Try Inputs (e.g. type="submit")
-        inputs = page.locator("input[type='submit'], input[type='button']")
-        count = await inputs.count()
-        for i in range(count):
-            inp = inputs.nth(i)
-            # Match value attribute: strict containment is too brittle (e.g. "Login Button" vs "Login")
-            # We'll check if the main word of the description is in the value
-            value = await inp.get_attribute("value")
-            if value:
-                val_lower = value.lower()
-                # Check exact containment or word split
-                if description in val_lower or val_lower in description or description.split()[0] in val_lower:
-                    logger.info(f"Clicked input button: '{value}'")
-                    await inp.click()
-                    return
-        
-        raise Exception(f"No clickable element found matching '{description}'")
+        if match is None:
+            match = await self._resolve(action, page)
+        if not match:
+            raise Exception(f"No clickable element found matching '{description}'")
+
+        label = match["text"] or match["value"]
+        logger.info(f"Clicked {match['kind']}: '{label}'")
+        with self.metrics.span("browser.action"):
+            await self.resolver.locator(page, match).click()
 
-    async def _execute_type(self, action, page):
+    async def _execute_type(self, action, page, match=None):
         """
         Type heuristic: Find the most relevant input based on description.
         """
@@ -111,23 +158,10 @@ class ActionExecutor:
 
         logger.info(f"Typing '{input_value}' into '{target_desc}'")
 
-        inputs = page.locator("input:visible, textarea:visible")
-        count = await inputs.count()
-        
-        if count == 0:
+        if match is None:
+            match = await self._resolve(action, page)
+        if not match:
             raise Exception("No visible input fields found")
 
-        # Smart Match: Check placeholders, names, ids
-        for i in range(count):
-            inp = inputs.nth(i)
-            attrs = await inp.evaluate("el => (el.placeholder + ' ' + el.name + ' ' + el.id).toLowerCase()")
-            
-            # Simple keyword matching
-            keywords = target_desc.split()
-            if any(k in attrs for k in keywords if len(k) > 2):
-                await inp.fill(input_value)
-                return
-
-        # Fallback: Type in first empty or just first input if no match found
-        logger.warning(f"No specific match for '{target_desc}', typing in first input.")
-        await inputs.first.fill(input_value)
+        with self.metrics.span("browser.action"):
+            await self.resolver.locator(page, match).fill(input_value)
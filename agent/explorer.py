@@ -0,0 +1,394 @@
+import copy
+import hashlib
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+GRAPH_VERSION = 1
+
+# Query parameters that never change what a page shows
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "ref")
+
+# Actions the frontier never suggests on its own (the reasoner may still choose them)
+RISKY_LABELS = ("logout", "log out", "sign out", "signout", "delete", "remove account", "reset app")
+
+class ExplorationGraph:
+    """
+    The Map: Exploration state graph for one site.
+    Nodes are page states (normalized URL + fingerprint of the interactive elements), edges
+    are executed actions. Detects revisits and action loops, and keeps a prioritized frontier
+    of actions not tried yet. Persisted as one compact JSON file per site; concurrent
+    sessions merge what they learned into it under a file lock instead of overwriting it.
+    """
+    def __init__(self,
+                 path: Optional[str] = None,
+                 max_repeats: int = 2,
+                 max_actions_per_state: int = 100,
+                 max_states: int = 2000):
+        self.path = path
+        self.max_repeats = max_repeats
+        self.max_actions_per_state = max_actions_per_state
+        # The persisted graph grows across runs; save() drops the least recently seen states beyond this
+        self.max_states = max_states
+        # state id -> {"url", "visits", "seen", "actions": {label: {"kind", "href"}}, "tried": {action key: count}}
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        # (state id, action key) -> {destination state id: count}
+        self.edges: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self.current: Optional[str] = None
+        self.recent = deque(maxlen=6)  # last states, for A-B-A-B cycle detection
+        self.looping = False
+        self.session_states = set()
+        self.session_tried: Dict[Tuple[str, str], int] = {}  # repeats count per session, not across runs
+        self._pending: Optional[Tuple[str, str]] = None
+        # Counters as last read from disk; save() adds only what this session added on top
+        self._base_nodes: Dict[str, Dict[str, Any]] = {}
+        self._base_edges: Dict[Tuple[str, str], Dict[str, int]] = {}
+        if path and os.path.exists(path):
+            self._load(path)
+
+    @classmethod
+    def for_site(cls, url: str, directory: str = "logs/explore", **kwargs) -> "ExplorationGraph":
+        """The persisted graph of the site `url` belongs to (one file per host)."""
+        host = urlsplit(url).netloc or "local"
+        name = re.sub(r"[^a-zA-Z0-9.-]+", "_", host)
+        return cls(path=os.path.join(directory, f"{name}.json"), **kwargs)
+
+    # --- State Identity ---
+
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        """Scheme, host, path and sorted non-tracking query; no fragment."""
+        parts = urlsplit(url or "")
+        query = sorted(
+            (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if not k.lower().startswith(TRACKING_PARAMS)
+        )
+        path = parts.path.rstrip("/") or "/"
+        normalized = f"{parts.scheme}://{parts.netloc}{path}" if parts.netloc else (url or "")
+        return f"{normalized}?{urlencode(query)}" if query else normalized
+
+    @staticmethod
+    def _label(text: str) -> str:
+        # Counters and prices must not turn one page into many states ("Cart (3)" == "Cart (4)")
+        return re.sub(r"\d+", "#", re.sub(r"\s+", " ", text or "").strip().lower())[:80]
+
+    def _actions(self, observation: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        elements = observation.get("interactive_elements", {})
+        actions: Dict[str, Dict[str, Any]] = {}
+        for button in elements.get("buttons", []):
+            if not button.get("disabled") and button.get("text"):
+                actions.setdefault(self._label(button["text"]), {"kind": "button", "text": button["text"]})
+        for link in elements.get("links", []):
+            if link.get("text"):
+                actions.setdefault(self._label(link["text"]), {"kind": "link", "text": link["text"], "href": link.get("href", "")})
+        for field in elements.get("inputs", []):
+            if field.get("type") in ("submit", "button") and field.get("value"):
+                actions.setdefault(self._label(field["value"]), {"kind": "button", "text": field["value"]})
+        return actions
+
+    def state_id(self, observation: Dict[str, Any], actions: Optional[Dict[str, Any]] = None) -> str:
+        actions = actions if actions is not None else self._actions(observation)
+        payload = json.dumps([self.normalize_url(observation.get("url", "")), sorted(actions)], separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    # --- Recording ---
+
+    def visit(self, observation: Dict[str, Any]) -> Dict[str, Any]:
+        """Record arriving at the observed state; closes the edge of the previous action."""
+        actions = self._actions(observation)
+        state = self.state_id(observation, actions)
+        node = self.nodes.get(state)
+        revisit = node is not None
+        if node is None:
+            kept = dict(list(actions.items())[: self.max_actions_per_state])
+            node = self.nodes[state] = {"url": self.normalize_url(observation.get("url", "")), "visits": 0, "actions": kept, "tried": {}}
+        node["visits"] += 1
+        node["seen"] = time.time()
+        revisit_in_session = state in self.session_states
+        self.session_states.add(state)
+
+        if self._pending:
+            destinations = self.edges.setdefault(self._pending, {})
+            destinations[state] = destinations.get(state, 0) + 1
+            self._pending = None
+
+        self.current = state
+        self.recent.append(state)
+        looping = self._cycling()
+        if looping and not self.looping:
+            logger.warning(f"Exploration loop detected between states {sorted(set(list(self.recent)[-4:]))}")
+        self.looping = looping
+        return {
+            "state": state,
+            "revisit": revisit,
+            "revisit_in_session": revisit_in_session,
+            "visits": node["visits"],
+            "looping": looping,
+            "frontier": len(self.untried(state))
+        }
+
+    def _cycling(self) -> bool:
+        """The last few states alternate between at most two states (A-B-A-B or A-A-A-A)."""
+        if len(self.recent) < 4:
+            return False
+        last = list(self.recent)[-4:]
+        return len(set(last)) <= 2 and last[0] == last[2] and last[1] == last[3]
+
+    def action_key(self, plan: Dict[str, Any], state: Optional[str] = None) -> str:
+        """Map a plan onto one of the state's action labels when it clearly refers to one."""
+        target = self._label(plan.get("target_description", ""))
+        node = self.nodes.get(state or self.current or "")
+        if node and plan.get("type") == "click" and target:
+            for label in node["actions"]:
+                if label == target:
+                    return f"click:{label}"
+            for label in node["actions"]:
+                if label and (label in target or target in label):
+                    return f"click:{label}"
+        return f"{plan.get('type', '?')}:{target}"
+
+    def record_action(self, plan: Dict[str, Any]):
+        """Mark the plan as tried in the current state; its edge is closed by the next visit()."""
+        if not self.current:
+            return
+        key = self.action_key(plan)
+        tried = self.nodes[self.current]["tried"]
+        tried[key] = tried.get(key, 0) + 1
+        self.session_tried[(self.current, key)] = self.session_tried.get((self.current, key), 0) + 1
+        self._pending = (self.current, key)
+
+    # --- Frontier ---
+
+    def _priority(self, action: Dict[str, Any], label: str, node: Dict[str, Any], known_urls: set) -> int:
+        if any(word in label for word in RISKY_LABELS):
+            return -1
+        if action["kind"] == "link":
+            href = self.normalize_url(action.get("href", ""))
+            if urlsplit(href).netloc != urlsplit(node["url"]).netloc:
+                return -1  # leaves the site
+            return 1 if href in known_urls else 3
+        return 2
+
+    def _known_urls(self) -> set:
+        return {node["url"] for node in self.nodes.values()}
+
+    def untried(self, state: Optional[str] = None, known_urls: Optional[set] = None) -> List[Dict[str, Any]]:
+        """
+        Untried actions of a state, best first: new pages, then buttons, then known pages.
+        Callers looping over many states pass `known_urls` so it is built once per pass.
+        """
+        state = state or self.current
+        node = self.nodes.get(state or "")
+        if not node:
+            return []
+        return self._candidates(node, node["tried"], known_urls if known_urls is not None else self._known_urls())
+
+    def _candidates(self, node: Dict[str, Any], tried, known_urls: set) -> List[Dict[str, Any]]:
+        candidates = []
+        for label, action in node["actions"].items():
+            if f"click:{label}" in tried:
+                continue
+            priority = self._priority(action, label, node, known_urls)
+            if priority >= 0:
+                candidates.append((priority, label, action))
+        candidates.sort(key=lambda item: -item[0])  # stable: page order breaks ties
+        return [{"label": label, "priority": p, **action} for p, label, action in candidates]
+
+    def frontier(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Untried actions across all known states; the current state's come first."""
+        known_urls = self._known_urls()
+        items = [dict(a, state=self.current, url=self.nodes[self.current]["url"]) for a in self.untried(known_urls=known_urls)] if self.current else []
+        for state, node in self.nodes.items():
+            if len(items) >= limit:
+                break
+            if state != self.current:
+                items.extend(dict(a, state=state, url=node["url"]) for a in self.untried(state, known_urls)[:2])
+        return items[:limit]
+
+    def repeats(self, plan: Dict[str, Any]) -> int:
+        """How often the plan was already executed in the current state during this session."""
+        if not self.current:
+            return 0
+        return self.session_tried.get((self.current, self.action_key(plan)), 0)
+
+    def steer(self, plan: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        A replacement plan when `plan` would repeat itself (tried `max_repeats` times here already)
+        or the session is cycling between two states; None to keep the reasoner's choice.
+        """
+        if plan.get("type") not in ("click", "navigate"):
+            return None
+        if self.repeats(plan) < self.max_repeats and not self._cycling():
+            return None
+
+        for item in self.frontier():
+            if item["state"] == self.current:
+                return {
+                    "type": "click",
+                    "target_description": item["text"],
+                    "input_value": "",
+                    "reason": f"Exploration: untried action instead of repeating '{plan.get('target_description', '')}'"
+                }
+            return {
+                "type": "navigate",
+                "target_description": item["url"],
+                "input_value": "",
+                "reason": f"Exploration: '{item['text']}' is still untried on {item['url']}"
+            }
+        return None
+
+    def describe(self, limit: int = 8) -> str:
+        """
+        Short text for the reasoning prompt. It is part of the decision-cache key, so it only
+        uses what this session did (no counters, nothing from earlier runs): otherwise the
+        key of a page would change whenever any run tried something new on it.
+        """
+        if not self.current:
+            return "Nothing recorded yet."
+        node = self.nodes[self.current]
+        session_tried = [key for state, key in self.session_tried if state == self.current]
+        session_urls = {self.nodes[state]["url"] for state in self.session_states}
+        tried = [key.split(":", 1)[1] or key for key in session_tried][:limit]
+        untried = [item["text"][:40] for item in self._candidates(node, set(session_tried), session_urls)[:limit]]
+        lines = []
+        if tried:
+            lines.append("Already tried here: " + "; ".join(tried))
+        if untried:
+            lines.append("Not tried yet here: " + "; ".join(untried))
+        if self._cycling():
+            lines.append("You are going back and forth between the same pages. Pick something new.")
+        return "\n".join(lines) or "Nothing left to try on this page."
+
+    def coverage(self) -> Dict[str, int]:
+        known_urls = self._known_urls()
+        return {
+            "states": len(self.nodes),
+            "session_states": len(self.session_states),
+            "actions_tried": sum(len(node["tried"]) for node in self.nodes.values()),
+            "frontier": sum(len(self.untried(state, known_urls)) for state in self.nodes)
+        }
+
+    # --- Persistence ---
+
+    @staticmethod
+    @contextmanager
+    def _locked(path: str):
+        """Exclusive lock on `path`.lock, shared with other sessions and worker processes."""
+        with open(f"{path}.lock", "a+b") as lock:
+            if fcntl:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            else:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _merge_into(self, nodes: Dict[str, Dict[str, Any]], edges: Dict[Tuple[str, str], Dict[str, int]]):
+        """Add this session's visits, tries and edges (relative to the last read) to a graph read from disk."""
+        for state, node in self.nodes.items():
+            base = self._base_nodes.get(state, {"visits": 0, "tried": {}})
+            target = nodes.get(state)
+            if target is None:
+                target = nodes[state] = {"url": node["url"], "visits": 0, "actions": node["actions"], "tried": {}}
+            target["visits"] += node["visits"] - base["visits"]
+            target["seen"] = max(target.get("seen", 0), node.get("seen", 0))
+            for key, count in node["tried"].items():
+                target["tried"][key] = target["tried"].get(key, 0) + count - base["tried"].get(key, 0)
+        for edge, destinations in self.edges.items():
+            base = self._base_edges.get(edge, {})
+            target = edges.setdefault(edge, {})
+            for dst, count in destinations.items():
+                target[dst] = target.get(dst, 0) + count - base.get(dst, 0)
+
+    def _prune(self, nodes: Dict[str, Dict[str, Any]], edges: Dict[Tuple[str, str], Dict[str, int]]):
+        """Drop the least recently seen states (never this session's) and their edges beyond max_states."""
+        if not self.max_states or len(nodes) <= self.max_states:
+            return
+        by_age = sorted((state for state in nodes if state not in self.session_states), key=lambda state: nodes[state].get("seen", 0))
+        dropped = set(by_age[: len(nodes) - self.max_states])
+        if not dropped:
+            return
+        for state in dropped:
+            del nodes[state]
+        for edge in list(edges):
+            if edge[0] in dropped:
+                del edges[edge]
+                continue
+            for dst in [dst for dst in edges[edge] if dst in dropped]:
+                del edges[edge][dst]
+            if not edges[edge]:
+                del edges[edge]
+        logger.info(f"Exploration graph over {self.max_states} states: dropped {len(dropped)} least recently seen")
+
+    def save(self, path: Optional[str] = None) -> Optional[str]:
+        path = path or self.path
+        if not path:
+            return None
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with self._locked(path):
+                # Other sessions of the site may have saved since we loaded: merge, do not overwrite
+                nodes, edges = self._read(path) if os.path.exists(path) else ({}, {})
+                self._merge_into(nodes, edges)
+                self._prune(nodes, edges)
+                data = {
+                    "v": GRAPH_VERSION,
+                    "nodes": nodes,
+                    "edges": [[src, key, dst, n] for (src, key), dsts in edges.items() for dst, n in dsts.items()]
+                }
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, path)
+            # The merged graph is the new baseline, so a second save does not count anything twice
+            self.nodes, self.edges = nodes, edges
+            self._snapshot()
+            return path
+        except Exception as e:
+            logger.error(f"Failed to save exploration graph {path}: {e}")
+            return None
+
+    def _snapshot(self):
+        self._base_nodes = {state: {"visits": node["visits"], "tried": dict(node["tried"])} for state, node in self.nodes.items()}
+        self._base_edges = copy.deepcopy(self.edges)
+
+    @staticmethod
+    def _read(path: str) -> Tuple[Dict[str, Dict[str, Any]], Dict[Tuple[str, str], Dict[str, int]]]:
+        """Nodes and edges of a graph file; empty when unreadable or of an old format."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable exploration graph {path}: {e}")
+            return {}, {}
+        if data.get("v") != GRAPH_VERSION:
+            logger.info(f"Exploration graph {path} has an old format, starting fresh")
+            return {}, {}
+        edges: Dict[Tuple[str, str], Dict[str, int]] = {}
+        for src, key, dst, n in data.get("edges", []):
+            edges.setdefault((src, key), {})[dst] = n
+        return data.get("nodes", {}), edges
+
+    def _load(self, path: str):
+        self.nodes, self.edges = self._read(path)
+        self._snapshot()
+        if self.nodes:
+            logger.info(f"Loaded exploration graph: {len(self.nodes)} states from {path}")
@@ -0,0 +1,120 @@
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit
+
+from llm.prompt_encoder import estimate_tokens
+
+class HistoryCompressor:
+    """
+    The Recap: Bounded rolling history for the reasoning prompt.
+    The last few steps stay verbatim; older steps are folded into a running summary of
+    visited pages and action outcomes, and the rendering never exceeds a token budget.
+    """
+    def __init__(self, recent: int = 3, budget: int = 300, max_tracked: int = 50):
+        self.recent = deque(maxlen=max(1, recent))
+        self.budget = budget
+        self.max_tracked = max_tracked
+        self.folded_steps = 0
+        self.first_step: Optional[int] = None
+        self.last_folded_step: Optional[int] = None
+        self.visited: "OrderedDict[str, int]" = OrderedDict()  # page path -> visits
+        self.actions: "OrderedDict[str, int]" = OrderedDict()  # action + outcome -> times
+
+    @staticmethod
+    def _page(url: str) -> str:
+        parts = urlsplit(url or "")
+        return (parts.path or "/") if parts.netloc else (url or "?")
+
+    @staticmethod
+    def _action_text(action: Dict[str, Any]) -> str:
+        text = f"{action.get('type', '?')} \"{action.get('target_description', '')[:40]}\""
+        if action.get("type") == "type" and action.get("input_value"):
+            text += f" = \"{str(action['input_value'])[:20]}\""
+        return text
+
+    @staticmethod
+    def _describe(step: Dict[str, Any]) -> str:
+        plan = step.get("plan", {})
+        result = step.get("result", {})
+        # Multi-action bursts list what actually ran, so the reasoner does not repeat it
+        executed = result.get("actions") or [plan]
+        action = " + ".join(HistoryCompressor._action_text(a) for a in executed)
+        status = result.get("status", "?")
+        outcome = "ok" if status == "success" else status
+        if result.get("aborted"):
+            outcome += ", rest skipped"
+        return f"{action} -> {outcome}"
+
+    @staticmethod
+    def _bump(counter: "OrderedDict[str, int]", key: str, limit: int):
+        counter[key] = counter.get(key, 0) + 1
+        counter.move_to_end(key)
+        while len(counter) > limit:
+            counter.popitem(last=False)  # forget the least recently seen entry
+
+    def record(self, step: Dict[str, Any]):
+        """Add a finished step; the oldest verbatim step is folded into the summary."""
+        if self.first_step is None:
+            self.first_step = step.get("step")
+        if len(self.recent) == self.recent.maxlen:
+            self._fold(self.recent[0])
+        self.recent.append(step)
+
+    def _fold(self, step: Dict[str, Any]):
+        self.folded_steps += 1
+        self.last_folded_step = step.get("step")
+        self._bump(self.visited, self._page(step.get("url", "")), self.max_tracked)
+        self._bump(self.actions, self._describe(step), self.max_tracked)
+
+    def _recent_lines(self) -> List[str]:
+        lines = []
+        for step in self.recent:
+            line = f"Step {step.get('step')} @ {self._page(step.get('url', ''))}: {self._describe(step)}"
+            details = (step.get("result") or {}).get("details")
+            if details and (step.get("result") or {}).get("status") == "error":
+                line += f" ({details[:80]})"
+            lines.append(line)
+        return lines
+
+    def cache_key(self) -> str:
+        """
+        The recent actions and their outcomes without step numbers or running counts, so
+        the decision cache matches the same situation at any point of a session.
+        """
+        if not self.recent:
+            return "first step"
+        return "\n".join(f"{self._page(step.get('url', ''))}: {self._describe(step)}" for step in self.recent)
+
+    def render(self, budget: Optional[int] = None) -> str:
+        """Summary + recent steps, trimmed (oldest summary entries first) to fit the budget."""
+        budget = budget or self.budget
+        if not self.recent:
+            return "None yet (this is the first step)."
+
+        recent = self._recent_lines()
+        visited = [f"{page} (x{n})" if n > 1 else page for page, n in self.visited.items()]
+        actions = [f"{action} (x{n})" if n > 1 else action for action, n in self.actions.items()]
+
+        while True:
+            lines = []
+            if self.folded_steps:
+                lines.append(f"Earlier steps {self.first_step}-{self.last_folded_step}:")
+                if visited:
+                    lines.append("Visited: " + ", ".join(visited))
+                if actions:
+                    lines.append("Actions: " + "; ".join(actions))
+                lines.append("Recent:")
+            lines.extend(recent)
+            text = "\n".join(lines)
+
+            if estimate_tokens(text) <= budget:
+                return text
+            # Drop the oldest summary detail first, then the oldest verbatim steps
+            if actions:
+                actions.pop(0)
+            elif visited:
+                visited.pop(0)
+            elif len(recent) > 1:
+                recent.pop(0)
+            else:
+                return text[: budget * 3]
@@ -0,0 +1,238 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit
+from loguru import logger
+
+# Bump when the normalization changes; old rows then stop matching new reports.
+FINGERPRINT_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL UNIQUE,
+    started REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS issues (
+    fingerprint TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    title TEXT NOT NULL,
+    message TEXT NOT NULL,
+    url_pattern TEXT NOT NULL,
+    location TEXT NOT NULL,
+    sample TEXT,
+    sample_url TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    first_run INTEGER NOT NULL,
+    last_run INTEGER NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS issues_first_run ON issues (first_run);
+CREATE INDEX IF NOT EXISTS issues_last_run ON issues (last_run);
+CREATE INDEX IF NOT EXISTS issues_count ON issues (count DESC);
+"""
+
+UPSERT = """
+INSERT INTO issues (fingerprint, kind, severity, title, message, url_pattern, location, sample, sample_url,
+                    first_seen, last_seen, first_run, last_run, count)
+VALUES (:fingerprint, :kind, :severity, :title, :message, :url_pattern, :location, :sample, :sample_url,
+        :first_seen, :last_seen, :run, :run, :count)
+ON CONFLICT (fingerprint) DO UPDATE SET
+    last_seen = MAX(last_seen, excluded.last_seen),
+    last_run = MAX(last_run, excluded.last_run),
+    count = count + excluded.count
+"""
+
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-f]{8,}|[0-9a-f-]{32,36})$", re.IGNORECASE)
+
+def url_pattern(url: str) -> str:
+    """Host and path with id-like segments collapsed ("/item/42" -> "/item/:id"); no query or fragment."""
+    parts = urlsplit(url or "")
+    if not parts.netloc:
+        return (url or "").split("?", 1)[0].split("#", 1)[0]
+    segments = [":id" if _ID_SEGMENT.match(s) else s for s in parts.path.rstrip("/").split("/")]
+    return f"{parts.netloc}{'/'.join(segments) or '/'}"
+
+def normalize_message(text: str) -> str:
+    """Drop what varies between occurrences of the same problem: URLs, ids, numbers, quoting, case."""
+    text = str(text or "").lower()
+    text = re.sub(r"https?://\S+", lambda m: url_pattern(m.group(0).rstrip(".,;)'\"")), text)
+    text = re.sub(r"\b[0-9a-f]{8}-[0-9a-f-]{27}\b", "<uuid>", text)
+    text = re.sub(r"\b0x[0-9a-f]+\b|\b[0-9a-f]{12,}\b", "<hex>", text)
+    text = re.sub(r"\d+", "#", text)
+    text = re.sub(r"[\"'`“”‘’]", "", text)
+    text = re.sub(r"[^\w#<>:/.\s-]", " ", text)
+    return re.sub(r"\s+", " ", text).strip(" .")[:300]
+
+def fingerprint(issue: Dict[str, Any]) -> str:
+    """Stable id of an issue: type, normalized message, URL pattern and source location."""
+    parts = [
+        str(FINGERPRINT_VERSION),
+        issue.get("kind", ""),
+        normalize_message(issue.get("description", "")),
+        url_pattern(issue.get("evidence", {}).get("url", "")),
+        issue.get("location", "")
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:20]
+
+class IssueStore:
+    """
+    The Ledger: Deduplicated issue history across steps, sessions and runs.
+    Every issue is reduced to a fingerprint; the store keeps first/last seen, the run that
+    first reported it and an occurrence count in an indexed SQLite file. Occurrences are
+    aggregated in memory and written in one transaction per flush, so a session costs a
+    handful of upserts however often an error repeats. Safe to share between the sessions
+    and worker processes of a sweep (WAL journal, busy timeout).
+    """
+    def __init__(self, path: str = "logs/issues.db", run: Optional[str] = None):
+        self.path = path
+        self.run_label = run or time.strftime("%Y%m%d_%H%M%S")
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._run_id: Optional[int] = None
+
+    @classmethod
+    def from_settings(cls, settings, run: Optional[str] = None) -> "IssueStore":
+        return cls(path=settings.ISSUE_STORE_PATH, run=run)
+
+    # --- Connection ---
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Flushes may run on a worker thread; the lock serializes all use of the connection
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @property
+    def run_id(self) -> int:
+        """Id of this store's run; sessions of one sweep share the run label and so the id."""
+        if self._run_id is None:
+            conn = self._connect()
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO runs (label, started) VALUES (?, ?)", (self.run_label, time.time()))
+            self._run_id = conn.execute("SELECT id FROM runs WHERE label = ?", (self.run_label,)).fetchone()[0]
+        return self._run_id
+
+    # --- Recording ---
+
+    def add(self, issues: List[Dict[str, Any]]):
+        """Count fingerprinted issues (as produced by IssueAnalyzer); nothing is written until flush()."""
+        now = time.time()
+        with self._lock:
+            for issue in issues:
+                key = issue.get("fingerprint") or fingerprint(issue)
+                entry = self._pending.get(key)
+                if entry is None:
+                    url = issue.get("evidence", {}).get("url", "")
+                    self._pending[key] = {
+                        "fingerprint": key,
+                        "kind": issue.get("kind", ""),
+                        "severity": issue.get("severity", ""),
+                        "title": issue.get("title", ""),
+                        "message": normalize_message(issue.get("description", "")),
+                        "url_pattern": url_pattern(url),
+                        "location": issue.get("location", ""),
+                        "sample": str(issue.get("description", ""))[:1000],
+                        "sample_url": url,
+                        "first_seen": now,
+                        "last_seen": now,
+                        "count": 1
+                    }
+                else:
+                    entry["last_seen"] = now
+                    entry["count"] += 1
+
+    def flush(self) -> int:
+        """Write the aggregated occurrences; returns how many fingerprints were upserted."""
+        with self._lock:
+            if not self._pending:
+                return 0
+            rows = list(self._pending.values())
+            try:
+                run = self.run_id
+                conn = self._connect()
+                with conn:
+                    conn.executemany(UPSERT, [dict(row, run=run) for row in rows])
+            except sqlite3.Error as e:
+                # Keep the counts; the next flush retries
+                logger.error(f"Failed to write {len(rows)} issues to {self.path}: {e}")
+                return 0
+            self._pending.clear()
+            return len(rows)
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # --- Queries ---
+
+    def _rows(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            conn = self._connect()
+            conn.row_factory = sqlite3.Row
+            try:
+                return [dict(row) for row in conn.execute(sql, params)]
+            finally:
+                conn.row_factory = None
+
+    def last_run(self, before: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """The most recent run (or the most recent one before run id `before`)."""
+        if before is None:
+            rows = self._rows("SELECT id, label, started FROM runs ORDER BY id DESC LIMIT 1")
+        else:
+            rows = self._rows("SELECT id, label, started FROM runs WHERE id < ? ORDER BY id DESC LIMIT 1", (before,))
+        return rows[0] if rows else None
+
+    def new_in_run(self, run_id: Optional[int] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Issues first reported by a run (default: the latest), most frequent first."""
+        if run_id is None:
+            latest = self.last_run()
+            if latest is None:
+                return []
+            run_id = latest["id"]
+        return self._rows(
+            "SELECT * FROM issues WHERE first_run = ? ORDER BY count DESC LIMIT ?",
+            (run_id, limit)
+        )
+
+    def new_since(self, run_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+        """Issues first reported after run `run_id`, most frequent first."""
+        return self._rows(
+            "SELECT * FROM issues WHERE first_run > ? ORDER BY count DESC LIMIT ?",
+            (run_id, limit)
+        )
+
+    def top(self, limit: int = 20, kind: Optional[str] = None, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Most frequent issues, optionally of one kind or seen since a timestamp."""
+        where, params = [], []
+        if kind:
+            where.append("kind = ?")
+            params.append(kind)
+        if since is not None:
+            where.append("last_seen >= ?")
+            params.append(since)
+        clause = f"WHERE {' AND '.join(where)} " if where else ""
+        return self._rows(f"SELECT * FROM issues {clause}ORDER BY count DESC LIMIT ?", (*params, limit))
+
+    def summary(self) -> Dict[str, Any]:
+        rows = self._rows("SELECT COUNT(*) AS fingerprints, COALESCE(SUM(count), 0) AS occurrences FROM issues")
+        return {
+            **rows[0],
+            "new_this_run": self._rows("SELECT COUNT(*) AS n FROM issues WHERE first_run = ?", (self.run_id,))[0]["n"],
+            "pending": len(self._pending)
+        }
@@ -1,34 +1,202 @@
 import json
 import os
+import textwrap
+import time
+from collections import deque
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 from loguru import logger
 
+JOURNAL_VERSION = 1
+
 class Memory:
     """
     The Notebook: Tracks everything the agent does.
+    Steps are streamed to an append-only JSONL journal as they complete, so a crash
+    loses at most the steps since the last fsync. Only a small recent window stays in RAM.
     """
-    def __init__(self):
-        self.history: List[Dict[str, Any]] = []
+    def __init__(self,
+                 log_dir: str = "logs",
+                 window: int = 20,
+                 fsync_every: int = 5,
+                 fsync_interval: float = 2.0):
         self.start_time = datetime.now()
+        self.log_dir = log_dir
+        self.history = deque(maxlen=window)   # recent steps only; the journal has everything
+        self.step_count = 0
+        self.issue_count = 0
+
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+        self.journal_path: Optional[str] = None
+        self._journal = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    # --- Journal Writing ---
+
+    def _session_stem(self) -> str:
+        return os.path.join(self.log_dir, f"session_{self.start_time.strftime('%Y%m%d_%H%M%S')}")
+
+    def _open_journal(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        self.journal_path = f"{self._session_stem()}.jsonl"
+        is_new = not os.path.exists(self.journal_path)
+        if not is_new:
+            self._truncate_torn_tail(self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        if is_new:
+            self._write_record({
+                "kind": "session",
+                "version": JOURNAL_VERSION,
+                "start_time": self.start_time.isoformat()
+            })
+            self._sync()
+
+    @staticmethod
+    def _truncate_torn_tail(path: str):
+        """Drop a partial last line left by a crash so appended records start on a fresh line."""
+        with open(path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+                logger.warning(f"Truncated torn journal tail in {path}")
+
+    def _write_record(self, record: Dict[str, Any]):
+        self._journal.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._journal.flush()  # hand the line to the OS right away; fsync is batched
+
+    def _sync(self):
+        os.fsync(self._journal.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
 
     def add_step(self, step_data: Dict[str, Any]):
         self.history.append(step_data)
+        self.step_count += 1
+        self.issue_count += self.count_issues(step_data)
+
+        try:
+            if self._journal is None:
+                self._open_journal()
+            self._write_record({"kind": "step", "data": step_data})
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+        except Exception as e:
+            logger.error(f"Failed to journal step {step_data.get('step')}: {e}")
+
+    def add_summary(self, data: Dict[str, Any]):
+        """Append a session-level record (e.g. latency histograms) to the journal."""
+        try:
+            if self._journal is None:
+                self._open_journal()
+            self._write_record({"kind": "summary", "data": data})
+        except Exception as e:
+            logger.error(f"Failed to journal session summary: {e}")
+
+    @staticmethod
+    def count_issues(step_data: Dict[str, Any]) -> int:
+        """Issues first seen in this session; repeats are references to an earlier step's issue."""
+        return sum(1 for issue in step_data.get("issues") or [] if "repeat" not in issue)
 
     def get_history(self) -> List[Dict[str, Any]]:
-        return self.history
-
-    def save_session(self, log_dir: str = "logs"):
-        """Save history to JSON."""
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-        
-        timestamp = self.start_time.strftime("%Y%m%d_%H%M%S")
-        filename = f"{log_dir}/session_{timestamp}.json"
-        
+        """The most recent steps (bounded window). Use `read_journal` for the full session."""
+        return list(self.history)
+
+    def close(self):
+        """Flush and close the journal."""
+        if self._journal is not None:
+            try:
+                self._sync()
+            finally:
+                self._journal.close()
+                self._journal = None
+
+    # --- Journal Reading ---
+
+    @staticmethod
+    def read_journal(journal_path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yield steps from a journal in order.
+        A torn last line (crash mid-write) is skipped instead of failing the whole read.
+        """
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping truncated journal line {line_no} in {journal_path}")
+                    continue
+                if record.get("kind") == "step":
+                    yield record["data"]
+
+    @staticmethod
+    def read_summaries(journal_path: str) -> Dict[str, Any]:
+        """Merge all session-level summary records of a journal (later records win)."""
+        merged: Dict[str, Any] = {}
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("kind") == "summary":
+                    merged.update(record["data"])
+        return merged
+
+    @classmethod
+    def resume(cls, journal_path: str, **kwargs) -> "Memory":
+        """Rebuild a Memory from an existing journal and keep appending to it."""
+        start_time = None
+        with open(journal_path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("kind") == "session":
+                start_time = datetime.fromisoformat(header["start_time"])
+
+        memory = cls(log_dir=os.path.dirname(journal_path) or ".", **kwargs)
+        if start_time:
+            memory.start_time = start_time
+        for step in cls.read_journal(journal_path):
+            memory.history.append(step)
+            memory.step_count += 1
+            memory.issue_count += cls.count_issues(step)
+        logger.info(f"Resumed session from {journal_path} at step {memory.step_count}")
+        return memory
+
+    @classmethod
+    def export_json(cls, journal_path: str, filename: str) -> str:
+        """
+        Write the single-file JSON format (a pretty-printed list of steps).
+        Streams step by step, so the whole session never has to be in memory.
+        """
+        with open(filename, "w", encoding="utf-8") as out:
+            out.write("[")
+            first = True
+            for step in cls.read_journal(journal_path):
+                out.write("\n" if first else ",\n")
+                out.write(textwrap.indent(json.dumps(step, indent=2, ensure_ascii=False, default=str), "  "))
+                first = False
+            out.write("\n]" if not first else "]")
+        return filename
+
+    def save_session(self, log_dir: Optional[str] = None):
+        """Close the journal and export the session as a single JSON file."""
+        if log_dir and self.journal_path is None:
+            self.log_dir = log_dir
+
         try:
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(self.history, f, indent=2, ensure_ascii=False)
+            self.close()
+            if self.journal_path is None:
+                # No steps were recorded; still produce an (empty) session file
+                self._open_journal()
+                self.close()
+
+            filename = f"{os.path.splitext(self.journal_path)[0]}.json"
+            self.export_json(self.journal_path, filename)
             logger.info(f"Session saved to {filename}")
             return filename
         except Exception as e:
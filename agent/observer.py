@@ -1,14 +1,235 @@
-from typing import Dict, Any, List
+import re
+import time
+from typing import Dict, Any, List, Optional
 from loguru import logger
 from browser.playwright_manager import PlaywrightManager
+from config.settings import settings
+from agent.dom_delta import DomDeltaTracker
+
+# Single injected script that collects the whole observation in one round trip.
+# Title, visible text and every interactive-element class are read in one pass
+# over the DOM instead of one `page.evaluate` per element class.
+SNAPSHOT_SCRIPT = """
+() => {
+    const buttons = [];
+    const links = [];
+    const inputs = [];
+
+    const nodes = document.querySelectorAll('button, a, input, textarea, select');
+    for (const el of nodes) {
+        const tag = el.tagName;
+        if (tag === 'BUTTON') {
+            const text = el.innerText.trim();
+            if (text.length > 0) {
+                buttons.push({ text: text, disabled: el.disabled, id: el.id, class: el.className });
+            }
+        } else if (tag === 'A') {
+            const text = el.innerText.trim();
+            if (text.length > 0 && el.href.length > 0) {
+                links.push({ text: text, href: el.href });
+            }
+        } else {
+            const type = el.type || 'text';
+            if (type !== 'hidden') {
+                inputs.push({
+                    tag: tag.toLowerCase(),
+                    type: type,
+                    placeholder: el.placeholder || "",
+                    name: el.name || "",
+                    id: el.id || "",
+                    value: el.value || ""
+                });
+            }
+        }
+    }
+
+    return {
+        title: document.title,
+        text: document.body ? document.body.innerText : "",
+        buttons: buttons,
+        links: links,
+        inputs: inputs
+    };
+}
+"""
+
+# Observation backends: "dom" walks the DOM with SNAPSHOT_SCRIPT, "ax" reads Chromium's
+# accessibility tree (ARIA widgets included, hidden nodes already pruned) in one CDP call.
+OBSERVER_MODES = ("dom", "ax")
+
+# Accessibility roles mapped onto the interactive_elements schema
+AX_BUTTON_ROLES = {"button", "menuitem", "menuitemcheckbox", "menuitemradio", "tab", "switch", "option", "treeitem"}
+AX_INPUT_ROLES = {"textbox", "searchbox", "combobox", "listbox", "spinbutton", "slider", "checkbox", "radio"}
+AX_LANDMARK_ROLES = {"banner", "navigation", "main", "complementary", "contentinfo", "search", "form", "region", "dialog", "alertdialog"}
+AX_SKIPPED_ROLES = {"InlineTextBox", "LineBreak"}
 
 class Observer:
     """
     The Page Perception Layer.
-    Extracts human-visible context using JavaScript execution in the browser.
+    Extracts human-visible context using JavaScript execution in the browser,
+    or from the browser's accessibility tree (mode "ax").
     """
-    def __init__(self, browser: PlaywrightManager):
+    def __init__(self, browser: PlaywrightManager, mode: Optional[str] = None, incremental: Optional[bool] = None):
         self.browser = browser
+        mode = mode or settings.OBSERVER_MODE
+        if mode not in OBSERVER_MODES:
+            logger.warning(f"Unknown observer mode '{mode}', using 'dom'")
+            mode = "dom"
+        self.mode = mode
+        self._cdp = None
+        self._cdp_page = None
+        # Incremental mode: after in-page actions only the regions a MutationObserver saw change are re-read
+        incremental = settings.OBSERVATION_INCREMENTAL if incremental is None else incremental
+        if incremental and mode != "dom":
+            logger.info("Incremental observation needs the DOM observer; taking full snapshots")
+            incremental = False
+        self.delta: Optional[DomDeltaTracker] = DomDeltaTracker(max_chain=settings.OBSERVATION_DELTA_MAX_CHAIN) if incremental else None
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """
+        Collect title, visible text and interactive elements in one browser round trip.
+        """
+        if self.mode == "ax" and not self._cdp_supported():
+            # Non-Chromium browser: there is no CDP, so stay on the DOM walk for the session
+            logger.warning("Accessibility tree needs a Chromium browser (CDP), switching to DOM observation")
+            self.mode = "dom"
+        if self.mode == "ax":
+            try:
+                with self.browser.metrics.span("browser.ax_snapshot"):
+                    return await self.ax_snapshot()
+            except Exception as e:
+                # e.g. a detached target after navigation: this observation uses the DOM walk,
+                # the next one retries on a fresh CDP session
+                logger.warning(f"Accessibility snapshot failed, using DOM observation for this step: {e}")
+                self._cdp = None
+                self._cdp_page = None
+        if self.delta:
+            try:
+                await self.delta.install(self.browser.context)
+                started = time.perf_counter()
+                snapshot = await self.delta.snapshot(self.browser.page)
+                span = "browser.delta_snapshot" if "delta" in snapshot else "browser.snapshot"
+                self.browser.metrics.record(span, (time.perf_counter() - started) * 1000)
+                return snapshot
+            except Exception as e:
+                # e.g. the document changed mid-read; the next observation starts from a full snapshot
+                logger.warning(f"Incremental snapshot failed, taking a full one: {e}")
+                self.delta.baseline = None
+        with self.browser.metrics.span("browser.snapshot"):
+            return await self.browser.page.evaluate(SNAPSHOT_SCRIPT)
+
+    # --- Accessibility Tree ---
+
+    def _cdp_supported(self) -> bool:
+        context = self.browser.context
+        if not hasattr(context, "new_cdp_session"):
+            return False
+        browser = getattr(context, "browser", None)
+        browser_type = getattr(browser, "browser_type", None)
+        return browser_type is None or browser_type.name == "chromium"
+
+    async def _cdp_session(self):
+        page = self.browser.page
+        if self._cdp is None or self._cdp_page is not page:
+            self._cdp = await self.browser.context.new_cdp_session(page)
+            self._cdp_page = page
+        return self._cdp
+
+    async def ax_snapshot(self) -> Dict[str, Any]:
+        """Same shape as SNAPSHOT_SCRIPT's result, built from one Accessibility.getFullAXTree call."""
+        cdp = await self._cdp_session()
+        tree = await cdp.send("Accessibility.getFullAXTree")
+        return self.from_ax_tree(tree.get("nodes", []))
+
+    @staticmethod
+    def _ax_value(field: Optional[Dict[str, Any]]) -> Any:
+        return (field or {}).get("value")
+
+    @staticmethod
+    def _ax_input_type(role: str, name: str) -> str:
+        if role in ("checkbox", "radio"):
+            return role
+        if role == "spinbutton":
+            return "number"
+        if role == "slider":
+            return "range"
+        if role == "searchbox":
+            return "search"
+        # The tree does not say "password"; its accessible name (label or placeholder) usually does
+        if role == "textbox" and re.search(r"pass(word|code)|\bpin\b", name, re.IGNORECASE):
+            return "password"
+        return "text"
+
+    @classmethod
+    def from_ax_tree(cls, nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Prune the tree to interactive and landmark nodes and map them onto buttons/links/inputs.
+        Ignored nodes (display:none, aria-hidden, ...) are skipped along with their subtrees.
+        Elements inside a landmark carry it as "region" (e.g. "navigation", "dialog").
+        """
+        by_id = {node["nodeId"]: node for node in nodes}
+        title = ""
+        text_parts: List[str] = []
+        buttons: List[Dict[str, Any]] = []
+        links: List[Dict[str, Any]] = []
+        inputs: List[Dict[str, Any]] = []
+
+        # Walk in document order from the root; the node list itself is not guaranteed to be ordered
+        roots = [n for n in nodes if not n.get("parentId") or n["parentId"] not in by_id]
+        stack = [(root, None) for root in reversed(roots)]
+        while stack:
+            node, region = stack.pop()
+            role = cls._ax_value(node.get("role")) or ""
+            if role in AX_SKIPPED_ROLES:
+                continue
+            if node.get("ignored"):
+                # An ignored wrapper (generic div) still has visible children; hidden ones have none
+                hidden = any(r.get("type") in ("notRendered", "ariaHiddenElement", "ariaHiddenSubtree")
+                             for r in node.get("ignoredReasons", []))
+                if hidden:
+                    continue
+            name = (cls._ax_value(node.get("name")) or "").strip()
+            props = {p["name"]: cls._ax_value(p.get("value")) for p in node.get("properties", [])}
+            if role == "RootWebArea" and not title:
+                title = name
+            elif role == "StaticText" and name:
+                if not text_parts or text_parts[-1] != name:
+                    text_parts.append(name)
+            elif role in AX_LANDMARK_ROLES:
+                region = role
+            elif role == "link" and name:
+                link = {"text": name, "href": props.get("url") or ""}
+                if region:
+                    link["region"] = region
+                links.append(link)
+            elif role in AX_BUTTON_ROLES and name:
+                button = {"text": name, "disabled": bool(props.get("disabled")), "id": "", "class": "", "role": role}
+                if region:
+                    button["region"] = region
+                buttons.append(button)
+            elif role in AX_INPUT_ROLES:
+                value = cls._ax_value(node.get("value"))
+                field = {
+                    "tag": "textarea" if props.get("multiline") else ("select" if role in ("combobox", "listbox") and not props.get("editable") else "input"),
+                    "type": cls._ax_input_type(role, name),
+                    "placeholder": name,
+                    "name": "",
+                    "id": "",
+                    "value": "" if value is None else str(value),
+                    "role": role
+                }
+                if region:
+                    field["region"] = region
+                inputs.append(field)
+            stack.extend((by_id[child], region) for child in reversed(node.get("childIds", [])) if child in by_id)
+
+        return {
+            "title": title,
+            "text": "\n".join(text_parts),
+            "buttons": buttons,
+            "links": links,
+            "inputs": inputs
+        }
 
     async def observe(self) -> Dict[str, Any]:
         """
@@ -16,74 +237,43 @@ class Observer:
         """
         if not self.browser.page:
             return {"error": "Browser not initialized"}
-        
+
         page = self.browser.page
 
         try:
             logger.info(f"Observing page: {page.url}")
 
-            # 1. Basic Metadata
+            # 1. Basic Metadata (page.url is tracked locally, no round trip)
             url = page.url
-            title = await page.title()
-
-            # 2. Visible Text (What the human sees)
-            # using document.body.innerText is a good approximation of visible text
-            visible_text = await page.evaluate("() => document.body.innerText")
-
-            # 3. Interactive Elements Extraction via JS
-            # We extract Buttons, Links, and Inputs with their properties
-            
-            # Buttons: text, disabled status
-            buttons = await page.evaluate("""
-                () => Array.from(document.querySelectorAll('button'))
-                    .map(b => ({
-                        text: b.innerText.trim(),
-                        disabled: b.disabled,
-                        id: b.id,
-                        class: b.className
-                    }))
-                    .filter(b => b.text.length > 0)
-            """)
-
-            # Links: text, href
-            links = await page.evaluate("""
-                () => Array.from(document.querySelectorAll('a'))
-                    .map(a => ({
-                        text: a.innerText.trim(),
-                        href: a.href
-                    }))
-                    .filter(a => a.text.length > 0 && a.href.length > 0)
-            """)
-
-            # Inputs: type, placeholder, name, label (heuristic)
-            inputs = await page.evaluate("""
-                () => Array.from(document.querySelectorAll('input, textarea, select'))
-                    .map(i => ({
-                        tag: i.tagName.toLowerCase(),
-                        type: i.type || 'text',
-                        placeholder: i.placeholder || "",
-                        name: i.name || "",
-                        id: i.id || "",
-                        value: i.value || ""
-                    }))
-                    .filter(i => i.type !== 'hidden')
-            """)
-
-            # 4. Construct Structured Context
-            # We cap the lists to avoid context window explosion
+
+            # 2. Title, visible text and interactive elements in a single evaluate
+            snapshot = await self.snapshot()
+            title = snapshot.get("title", "")
+            visible_text = snapshot.get("text", "")
+            buttons: List[Dict[str, Any]] = snapshot.get("buttons", [])
+            links: List[Dict[str, Any]] = snapshot.get("links", [])
+            inputs: List[Dict[str, Any]] = snapshot.get("inputs", [])
+
+            # 3. Construct Structured Context
+            # Only loose safety caps here; the Reasoner's prompt encoder picks what fits its token budget
+            max_elements = settings.OBSERVATION_MAX_ELEMENTS
             observation = {
                 "url": url,
                 "title": title,
                 "page_type_signal": "unknown", # To be filled by Reasoner or Heuristic later
-                "visible_text_summary": visible_text[:1500] if visible_text else "", # Cap text
+                "visible_text_summary": visible_text[:settings.OBSERVATION_MAX_TEXT] if visible_text else "",
                 "interactive_elements": {
-                    "buttons": buttons[:15], # Top 15 buttons
-                    "links": links[:15],     # Top 15 links
-                    "inputs": inputs[:10]    # Top 10 inputs
+                    "buttons": buttons[:max_elements],
+                    "links": links[:max_elements],
+                    "inputs": inputs[:max_elements]
                 }
             }
-            
-            logger.info(f"Observation complete. Found {len(buttons)} text-buttons, {len(links)} text-links.")
+            if "delta" in snapshot:
+                delta = snapshot["delta"]
+                observation["delta"] = {key: value[:max_elements] if isinstance(value, list) else value for key, value in delta.items()}
+
+            kind = f"{self.mode}, delta" if "delta" in snapshot else self.mode
+            logger.info(f"Observation complete ({kind}). Found {len(buttons)} text-buttons, {len(links)} text-links.")
             return observation
 
         except Exception as e:
@@ -0,0 +1,115 @@
+import asyncio
+from typing import Dict, Any, Optional
+from loguru import logger
+
+from browser.playwright_manager import PlaywrightManager
+from agent.analyzer import IssueAnalyzer
+from agent.memory import Memory
+from telemetry.metrics import Metrics
+
+class StepPipeline:
+    """
+    The Back Office: Post-action work for finished steps (issue analysis, journaling).
+    In pipelined mode it runs on a background worker while the agent observes and reasons
+    about the next page. One worker handles steps strictly in submission order, so the
+    journal reads exactly as it would in sequential mode.
+    """
+    def __init__(self,
+                 analyzer: IssueAnalyzer,
+                 memory: Memory,
+                 browser: PlaywrightManager,
+                 pipelined: bool = True,
+                 max_pending: int = 4,
+                 metrics: Optional[Metrics] = None):
+        self.analyzer = analyzer
+        self.memory = memory
+        self.browser = browser
+        self.pipelined = pipelined
+        self.max_pending = max(1, max_pending)  # backpressure: the loop waits if the worker falls this far behind
+        self.metrics = metrics or Metrics(enabled=False)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self,
+                     step_data: Dict[str, Any],
+                     observation: Dict[str, Any],
+                     decision: Dict[str, Any],
+                     result: Dict[str, Any]):
+        """
+        Hand over a finished step. Console output is claimed here, at the step boundary,
+        so background analysis never sees entries that belong to the next step.
+        """
+        job = {
+            "step_data": step_data,
+            "observation": observation,
+            "decision": decision,
+            "result": result,
+            "console": self.analyzer.take_console(self.browser)
+        }
+        if not self.pipelined:
+            self._analyze(job)
+            self.memory.add_step(step_data)
+            return
+
+        self._ensure_worker()
+        await self._queue.put(job)
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                self._analyze(job)
+                with self.metrics.span("journal.write"):
+                    await asyncio.to_thread(self.memory.add_step, job["step_data"])
+            except Exception as e:
+                logger.error(f"Post-step work failed for step {job['step_data'].get('step')}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _analyze(self, job: Dict[str, Any]):
+        step_data = job["step_data"]
+        try:
+            with self.metrics.span("phase.analyze") as span:
+                step_data["issues"] = self.analyzer.analyze(
+                    observation=job["observation"],
+                    action=job["decision"],
+                    result=job["result"],
+                    browser=self.browser,
+                    console=job["console"]
+                )
+            if "timings_ms" in step_data:
+                step_data["timings_ms"]["analyze"] = round(span.ms, 2)
+        except Exception as e:
+            # A failed analysis must not cost us the step record
+            logger.error(f"Issue analysis failed for step {step_data.get('step')}: {e}")
+            step_data["issues"] = []
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def flush(self):
+        """Wait until every submitted step is analyzed and journaled."""
+        if self._queue is None:
+            return
+        if self._worker is None or self._worker.done():
+            # Worker is gone (cancelled with the loop): finish the backlog inline, in order
+            while not self._queue.empty():
+                job = self._queue.get_nowait()
+                self._analyze(job)
+                self.memory.add_step(job["step_data"])
+                self._queue.task_done()
+            return
+        await self._queue.join()
+
+    async def close(self):
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
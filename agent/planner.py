@@ -1,22 +1,34 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from loguru import logger
+from config.settings import settings
+
+# Conditions checked before each follow-up action of a multi-action plan
+VALID_GUARDS = ["element_present", "url_unchanged"]
+DEFAULT_GUARDS = ["element_present", "url_unchanged"]
 
 class ActionPlanner:
     """
     The Tactician: Validates abstract LLM decisions into executable plans.
     Ensures safety and correctness before execution.
     """
+    def __init__(self, max_actions: Optional[int] = None):
+        # Upper bound on actions run in one burst (next_action + follow-ups)
+        self.max_actions = max(1, max_actions or settings.PLAN_MAX_ACTIONS)
+
     def plan(self, decision: Dict[str, Any]) -> Dict[str, Any]:
         """
         Validate and normalize the LLM's next_action.
+        Optional `follow_up_actions` are validated into `plan["then"]` for the executor to run
+        in the same burst, without another LLM round trip.
         """
         next_action = decision.get("next_action", {})
-        
+
         # Normalize action type
         action_type = next_action.get("type", "stop").lower().strip()
 
         # Whitelist valid actions
         valid_actions = ["click", "type", "navigate", "stop"]
-        
+
         if action_type not in valid_actions:
             return {
                 "type": "stop",
@@ -24,9 +36,50 @@ class ActionPlanner:
             }
 
         # Construct safe plan
-        return {
+        plan = {
             "type": action_type,
             "target_description": next_action.get("target_description", "").strip(),
             "input_value": next_action.get("input_value", ""),
             "reason": next_action.get("reason", "No reason provided")
         }
+
+        if action_type in ("click", "type"):
+            follow_ups = self._follow_ups(decision.get("follow_up_actions"))
+            if follow_ups:
+                plan["then"] = follow_ups
+        return plan
+
+    def _follow_ups(self, actions) -> List[Dict[str, Any]]:
+        """
+        Only in-page actions (click/type) with a target may follow. The sequence is cut at the
+        first invalid entry, since later actions were planned assuming it would run.
+        """
+        if not isinstance(actions, list):
+            return []
+
+        follow_ups = []
+        for action in actions[: self.max_actions - 1]:
+            if not isinstance(action, dict):
+                break
+            action_type = str(action.get("type", "")).lower().strip()
+            target = str(action.get("target_description", "")).strip()
+            if action_type not in ("click", "type") or not target:
+                logger.warning(f"Follow-up sequence cut at unsupported action: {action_type or 'missing type'}")
+                break
+
+            guards = action.get("guards")
+            if not isinstance(guards, list):
+                guards = DEFAULT_GUARDS
+            guards = [g for g in guards if g in VALID_GUARDS]
+
+            follow_ups.append({
+                "type": action_type,
+                "target_description": target,
+                "input_value": action.get("input_value", ""),
+                "reason": action.get("reason", "No reason provided"),
+                "guards": guards
+            })
+
+        if len(actions) > len(follow_ups) and len(follow_ups) == self.max_actions - 1:
+            logger.warning(f"Follow-up sequence truncated to {self.max_actions} actions per burst.")
+        return follow_ups
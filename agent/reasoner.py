@@ -1,18 +1,63 @@
+import hashlib
 import json
+import re
+from typing import Optional, Tuple
 from loguru import logger
 from llm.prompts import PAGE_REASONING_PROMPT
 from llm.groq_client import GroqLLM
+from llm.prompt_encoder import PromptEncoder, estimate_tokens
+from config.settings import settings
+from telemetry.metrics import Metrics
+from agent.decision_cache import DecisionCache
+from agent.history import HistoryCompressor
+from agent.rules import RuleEngine
+
+SYSTEM_PROMPT = "You are a careful and observant AI QA engineer."
+
+# Step numbers in a pre-rendered history ("Step 12 @", "Earlier steps 1-9") must not split the cache
+_STEP_NUMBERS = re.compile(r"\b[Ss]teps? \d+(?:-\d+)?")
 
 class PageReasoner:
     """
     The Brain: Uses Groq to reason about the page state and decide the next action.
     """
-    def __init__(self, llm: GroqLLM):
+    def __init__(self,
+                 llm: GroqLLM,
+                 cache: Optional[DecisionCache] = None,
+                 token_budget: Optional[int] = None,
+                 metrics: Optional[Metrics] = None,
+                 rules: Optional[RuleEngine] = None):
         self.llm = llm
+        self.cache = cache
+        self.rules = rules
+        self.metrics = metrics or Metrics(enabled=False)
+        self.last_source = None # "llm", "memory", "disk" or "rule:<name>" for the latest decision
+        self.last_prompt_tokens = 0
+
+        # The hard budget covers the whole prompt; the observation gets what the template leaves
+        self.token_budget = token_budget or settings.PROMPT_TOKEN_BUDGET
+        template_tokens = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(PAGE_REASONING_PROMPT)
+        self.history_budget = settings.HISTORY_TOKEN_BUDGET
+        self.encoder = PromptEncoder(budget=max(200, self.token_budget - template_tokens))
 
-    def reason(self, observation: dict, history: list) -> dict:
+    def _history_text(self, history) -> Tuple[str, str]:
+        """
+        Prompt text and decision-cache key of the history. Accepts a pre-rendered summary,
+        a HistoryCompressor, or a raw list of steps.
+        """
+        if isinstance(history, str):
+            return history, _STEP_NUMBERS.sub("#", history)
+        if not isinstance(history, HistoryCompressor):
+            compressor = HistoryCompressor(budget=self.history_budget)
+            for step in history or []:
+                compressor.record(step)
+            history = compressor
+        return history.render(self.history_budget), history.cache_key()
+
+    async def reason(self, observation: dict, history: list, exploration: Optional[str] = None) -> dict:
         """
         Send observation to LLM and parse the decision.
+        `exploration` is the state graph's note on what was already tried on this page.
         """
         if "error" in observation:
              return {
@@ -22,27 +67,62 @@ class PageReasoner:
                 "potential_issues": ["Observer Failure"]
             }
 
+        self.last_source = None
+        self.last_prompt_tokens = 0
+
+        # Fast path: recognized page patterns are answered without the LLM
+        if self.rules:
+            with self.metrics.span("rules.match"):
+                decision = self.rules.match(observation)
+            if decision is not None:
+                self.last_source = f"rule:{self.rules.last_rule}"
+                logger.info(f"Decision from fast-path rule '{self.rules.last_rule}': {decision['next_action']['type']}")
+                return decision
+
+        history_text, history_key = self._history_text(history)
+        exploration_text = exploration or "Not tracked."
+        cache_key = None
+        if self.cache:
+            # Cached decisions type the credentials, so a changed password must not replay the old one
+            credentials = settings.TEST_USERNAME + hashlib.sha256(settings.TEST_PASSWORD.encode("utf-8")).hexdigest()
+            cache_key = self.cache.fingerprint(
+                observation,
+                SYSTEM_PROMPT + PAGE_REASONING_PROMPT + history_key + exploration_text + credentials,
+                getattr(self.llm, "model", "unknown")
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.last_source = self.cache.last_source
+                logger.info(f"Decision served from {self.last_source} cache: {cached.get('next_action', {}).get('type')}")
+                return cached
+
         try:
             # Prepare context for prompt
-            # We dump the dict to a string, possibly filtering or truncating if needed
-            # For now, pass the whole observation as it is structured and capped by Observer
-            context_str = json.dumps(observation, indent=2, ensure_ascii=False)
+            # Compact line-per-element encoding, filled by priority up to whatever the history leaves
+            context_budget = max(200, self.encoder.budget - estimate_tokens(history_text) - estimate_tokens(exploration_text))
+            context_str = self.encoder.encode(observation, budget=context_budget)
             
             messages = [
                 {
                     "role": "system",
-                    "content": "You are a careful and observant AI QA engineer."
+                    "content": SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
                     "content": PAGE_REASONING_PROMPT.format(
-                        page_context=context_str
+                        page_context=context_str,
+                        history=history_text,
+                        exploration=exploration_text,
+                        username=settings.TEST_USERNAME,
+                        password=settings.TEST_PASSWORD
                     )
                 }
             ]
 
-            logger.info("Thinking... (Querying Groq)")
-            raw_output = self.llm.chat(messages)
+            self.last_prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+            logger.info(f"Thinking... (Querying Groq, ~{self.last_prompt_tokens} prompt tokens)")
+            with self.metrics.span("llm.call"):
+                raw_output = await self.llm.achat(messages)
             
             # Defensive Parsing
             # Extract JSON if wrapped in markdown code blocks
@@ -54,6 +134,9 @@ class PageReasoner:
             
             parsed = json.loads(clean_output)
             logger.info(f"Decision: {parsed.get('next_action', {}).get('type')}")
+            self.last_source = "llm"
+            if cache_key:
+                self.cache.put(cache_key, parsed)
             return parsed
 
         except json.JSONDecodeError:
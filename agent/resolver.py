@@ -0,0 +1,120 @@
+from typing import Dict, Any, List, Optional
+from loguru import logger
+
+HANDLE_ATTRIBUTE = "data-aurick-id"
+
+# Enumerates every candidate element in one round trip. Each element is tagged
+# with a handle attribute that survives between calls, so the winner can be
+# clicked directly with a single attribute selector.
+CANDIDATES_SCRIPT = """
+([attr, mode]) => {
+    // ARIA widgets are included so elements the accessibility observer reports can be acted on
+    const selector = mode === 'type'
+        ? "input, textarea, [contenteditable='true'], [contenteditable=''], [role='textbox'], [role='searchbox']"
+        : "button, a, input[type='submit'], input[type='button'], [role='button'], [role='link'], " +
+          "[role='menuitem'], [role='tab'], [role='option'], [role='switch'], [role='treeitem']";
+    const roleKind = (el) => {
+        const role = el.getAttribute('role');
+        if (!role || ['BUTTON', 'A', 'INPUT'].includes(el.tagName)) return null;
+        return role === 'link' ? 'a' : 'button';
+    };
+    const isVisible = (el) => {
+        if (!el.getClientRects().length) return false;
+        const style = getComputedStyle(el);
+        return style.visibility !== 'hidden' && style.display !== 'none';
+    };
+    window.__aurickNextId = window.__aurickNextId || 1;
+
+    const candidates = [];
+    for (const el of document.querySelectorAll(selector)) {
+        const tag = el.tagName.toLowerCase();
+        if (mode === 'type') {
+            if (tag === 'input' && ['hidden', 'submit', 'button', 'checkbox', 'radio'].includes(el.type)) continue;
+            if (!isVisible(el)) continue;
+        }
+        let handle = el.getAttribute(attr);
+        if (!handle) {
+            handle = String(window.__aurickNextId++);
+            el.setAttribute(attr, handle);
+        }
+        // The accessibility tree names elements by aria-label first, the DOM observer by inner text
+        const label = el.getAttribute('aria-label') || "";
+        const inner = (tag === 'input' || tag === 'textarea') ? "" : el.innerText.trim();
+        candidates.push({
+            handle: handle,
+            kind: mode !== 'type' && roleKind(el) ? roleKind(el) : (tag === 'input' && mode !== 'type' ? 'input' : tag),
+            text: label && label !== inner && tag !== 'input' && tag !== 'textarea' ? `${inner} ${label}`.trim() : inner,
+            value: el.value || "",
+            placeholder: el.placeholder || el.getAttribute('aria-placeholder') || label,
+            name: el.name || "",
+            id: el.id || ""
+        });
+    }
+    return candidates;
+}
+"""
+
+class ElementResolver:
+    """
+    The Eyes of the Hands: Pulls all candidate elements in one call and matches intent in Python.
+    Keeps resolution cost flat as the page grows instead of one round trip per element.
+    """
+    async def candidates(self, page, mode: str) -> List[Dict[str, Any]]:
+        """Return tagged candidates for 'click' or 'type'."""
+        return await page.evaluate(CANDIDATES_SCRIPT, [HANDLE_ATTRIBUTE, mode])
+
+    def locator(self, page, candidate: Dict[str, Any]):
+        """Locator for a previously tagged candidate."""
+        return page.locator(f'[{HANDLE_ATTRIBUTE}="{candidate["handle"]}"]')
+
+    def match_click(self, description: str, candidates: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Same priority as the original heuristic: buttons, then links, then submit/button inputs.
+        """
+        description = description.lower()
+        if not description:
+            return None
+
+        # 1. Buttons
+        for c in candidates:
+            if c["kind"] != "button":
+                continue
+            text = c["text"].lower()
+            if text and (description in text or text in description):
+                return c
+
+        # 2. Links (simple substring match for robustness)
+        for c in candidates:
+            if c["kind"] != "a":
+                continue
+            text = c["text"].lower()
+            if text and (description in text or text in description):
+                return c
+
+        # 3. Inputs (e.g. type="submit")
+        # Strict containment is too brittle (e.g. "Login Button" vs "Login"),
+        # so we also check if the main word of the description is in the value
+        for c in candidates:
+            if c["kind"] != "input":
+                continue
+            val_lower = c["value"].lower()
+            if val_lower and (description in val_lower or val_lower in description or description.split()[0] in val_lower):
+                return c
+
+        return None
+
+    def match_type(self, description: str, candidates: List[Dict[str, Any]], strict: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Smart Match: check placeholders, names and ids against description keywords.
+        With `strict`, no match means None instead of falling back to the first input.
+        """
+        keywords = [k for k in description.lower().split() if len(k) > 2]
+        for c in candidates:
+            attrs = f"{c['placeholder']} {c['name']} {c['id']}".lower()
+            if any(k in attrs for k in keywords):
+                return c
+
+        if candidates and not strict:
+            logger.warning(f"No specific match for '{description}', typing in first input.")
+            return candidates[0]
+        return None
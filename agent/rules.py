@@ -0,0 +1,233 @@
+import json
+import re
+from typing import Dict, Any, List, Optional
+from loguru import logger
+from config.settings import settings
+
+# Declarative fast-path rules, checked in order; the first match wins.
+#
+# "when" conditions (all present ones must hold):
+#   "url":      any of these substrings in the page URL
+#   "text":     any of these phrases in the visible text (case-insensitive)
+#   "inputs":   every spec must match a distinct input; a spec is {"type": ...} and/or
+#               {"keywords": [...]} checked against placeholder/name/id
+#   "control":  any of these phrases, as whole words, in a button, submit input or link label;
+#               negated labels ("Don't accept", "Do not agree") never match
+#   "no_control": none of these phrases may appear in a control label
+#
+# "actions" become next_action + follow_up_actions. A target of "input:N" / "control"
+# refers to the element matched above; "{username}" / "{password}" come from settings.
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {
+        "name": "login_form",
+        "when": {
+            "inputs": [
+                {"keywords": ["user", "email", "login"]},
+                {"type": "password"}
+            ],
+            "control": ["log in", "login", "sign in", "signin", "submit"]
+        },
+        "summary": "Login form",
+        "actions": [
+            {"type": "type", "target": "input:0", "value": "{username}"},
+            {"type": "type", "target": "input:1", "value": "{password}"},
+            {"type": "click", "target": "control"}
+        ],
+        "reason": "Log in with the test credentials to reach the application"
+    },
+    {
+        "name": "cookie_banner",
+        "when": {
+            "text": ["cookie"],
+            "control": ["accept all", "accept cookies", "allow all", "i agree", "got it", "accept", "agree", "allow"]
+        },
+        "summary": "Cookie consent banner",
+        "actions": [{"type": "click", "target": "control"}],
+        "reason": "Dismiss the cookie banner so the page underneath is usable"
+    },
+    {
+        "name": "empty_cart",
+        "when": {
+            "text": ["your cart is empty", "cart is empty", "no items in your cart"],
+            "control": ["continue shopping", "start shopping", "shop now"]
+        },
+        "summary": "Empty shopping cart",
+        "actions": [{"type": "click", "target": "control"}],
+        "reason": "The cart is empty, go back to the products"
+    },
+    {
+        "name": "empty_cart_dead_end",
+        "when": {
+            "text": ["your cart is empty", "cart is empty", "no items in your cart"]
+        },
+        "summary": "Empty shopping cart without a way back",
+        "actions": [{"type": "stop"}],
+        "reason": "Empty cart offers no further action",
+        "potential_issues": ["Empty cart page offers no way back to the products"]
+    }
+]
+
+_NEGATION = re.compile(r"\b(?:don'?t|do not|not|never|no|reject|decline|deny|refuse)\b")
+
+class RuleEngine:
+    """
+    The Reflexes: Heuristic decisions for structurally obvious pages.
+    Runs before the LLM and answers in the same decision schema the planner consumes;
+    when no rule matches, the reasoner falls back to the LLM. Keeps per-rule hit counts.
+    """
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None, max_fires_per_url: int = 1):
+        self.rules = rules if rules is not None else DEFAULT_RULES
+        # A rule that already fired on a URL and left us there again probably did not work:
+        # after this many fires the page goes to the LLM instead
+        self.max_fires_per_url = max_fires_per_url
+        self.last_rule: Optional[str] = None
+        self.evaluations = 0
+        self.hits: Dict[str, int] = {rule["name"]: 0 for rule in self.rules}
+        self._fired: Dict[tuple, int] = {}
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "RuleEngine":
+        """Load a JSON rule list in the DEFAULT_RULES format."""
+        with open(path, "r", encoding="utf-8") as f:
+            rules = json.load(f)
+        logger.info(f"Loaded {len(rules)} fast-path rules from {path}")
+        return cls(rules, **kwargs)
+
+    @classmethod
+    def from_settings(cls, settings) -> "RuleEngine":
+        if settings.FAST_PATH_RULES_FILE:
+            return cls.from_file(settings.FAST_PATH_RULES_FILE)
+        return cls()
+
+    # --- Matching ---
+
+    @staticmethod
+    def _contains_any(text: str, phrases: List[str]) -> bool:
+        return any(p in text for p in phrases)
+
+    @staticmethod
+    def _label_matches(label: str, phrase: str) -> bool:
+        """Whole-word phrase in a label that does not negate it ("Disagree", "Don't accept" fail)."""
+        label = label.lower()
+        return (re.search(rf"(?<!\w){re.escape(phrase)}(?!\w)", label) is not None
+                and not _NEGATION.search(label))
+
+    @staticmethod
+    def _controls(elements: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Clickable labels in executor priority order: buttons, links, submit inputs."""
+        controls = [{"label": b.get("text", "")} for b in elements.get("buttons", []) if not b.get("disabled")]
+        controls += [{"label": l.get("text", "")} for l in elements.get("links", [])]
+        controls += [
+            {"label": i.get("value", "")}
+            for i in elements.get("inputs", [])
+            if i.get("type") in ("submit", "button") and i.get("value")
+        ]
+        return controls
+
+    def _match_inputs(self, specs: List[Dict[str, Any]], inputs: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        matched, used = [], set()
+        for spec in specs:
+            for index, field in enumerate(inputs):
+                if index in used:
+                    continue
+                if "type" in spec and field.get("type") != spec["type"]:
+                    continue
+                if "keywords" in spec:
+                    attrs = f"{field.get('placeholder', '')} {field.get('name', '')} {field.get('id', '')}".lower()
+                    if not self._contains_any(attrs, spec["keywords"]):
+                        continue
+                matched.append(field)
+                used.add(index)
+                break
+            else:
+                return None
+        return matched
+
+    def _bind(self, rule: Dict[str, Any], observation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The elements a rule refers to, or None if the page does not match it."""
+        when = rule.get("when", {})
+        elements = observation.get("interactive_elements", {})
+        bound: Dict[str, Any] = {}
+
+        if "url" in when and not self._contains_any(observation.get("url", ""), when["url"]):
+            return None
+        if "text" in when:
+            text = f"{observation.get('title', '')}\n{observation.get('visible_text_summary', '')}".lower()
+            if not self._contains_any(text, when["text"]):
+                return None
+        if "inputs" in when:
+            fields = [i for i in elements.get("inputs", []) if i.get("type") not in ("submit", "button")]
+            bound["inputs"] = self._match_inputs(when["inputs"], fields)
+            if bound["inputs"] is None:
+                return None
+
+        labels = [c["label"] for c in self._controls(elements) if c["label"]]
+        if "no_control" in when and any(self._contains_any(l.lower(), when["no_control"]) for l in labels):
+            return None
+        if "control" in when:
+            # Phrase order is preference order ("accept all" before a bare "accept")
+            bound["control"] = next(
+                (label for phrase in when["control"] for label in labels if self._label_matches(label, phrase)),
+                None
+            )
+            if bound["control"] is None:
+                return None
+        return bound
+
+    @staticmethod
+    def _target(target: str, bound: Dict[str, Any]) -> str:
+        if target == "control":
+            return bound["control"]
+        if target.startswith("input:"):
+            field = bound["inputs"][int(target.split(":", 1)[1])]
+            return field.get("placeholder") or field.get("name") or field.get("id") or field.get("type", "input")
+        return target
+
+    def _decision(self, rule: Dict[str, Any], bound: Dict[str, Any]) -> Dict[str, Any]:
+        values = {"username": settings.TEST_USERNAME, "password": settings.TEST_PASSWORD}
+        actions = []
+        for spec in rule["actions"]:
+            actions.append({
+                "type": spec["type"],
+                "target_description": self._target(spec.get("target", ""), bound),
+                "input_value": spec.get("value", "").format(**values),
+                "reason": rule.get("reason", f"Fast-path rule {rule['name']}")
+            })
+        decision = {
+            "page_summary": rule.get("summary", rule["name"]),
+            "confidence": 1.0,
+            "next_action": actions[0],
+            "potential_issues": list(rule.get("potential_issues", []))
+        }
+        if len(actions) > 1:
+            decision["follow_up_actions"] = actions[1:]
+        return decision
+
+    def match(self, observation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """A decision from the first matching rule, or None to fall back to the LLM."""
+        self.evaluations += 1
+        self.last_rule = None
+        url = observation.get("url", "")
+        for rule in self.rules:
+            if self._fired.get((rule["name"], url), 0) >= self.max_fires_per_url:
+                continue
+            bound = self._bind(rule, observation)
+            if bound is None:
+                continue
+            self._fired[(rule["name"], url)] = self._fired.get((rule["name"], url), 0) + 1
+            self.hits[rule["name"]] = self.hits.get(rule["name"], 0) + 1
+            self.last_rule = rule["name"]
+            return self._decision(rule, bound)
+        return None
+
+    def summary(self) -> Dict[str, Any]:
+        total_hits = sum(self.hits.values())
+        return {
+            "evaluated": self.evaluations,
+            "hits": total_hits,
+            "hit_rate": round(total_hits / self.evaluations, 3) if self.evaluations else 0.0,
+            "rules": {
+                name: {"hits": hits, "hit_rate": round(hits / self.evaluations, 3) if self.evaluations else 0.0}
+                for name, hits in self.hits.items()
+            }
+        }
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Union
+from loguru import logger
+from playwright.async_api import async_playwright
+
+from browser.playwright_manager import PlaywrightManager
+from llm.groq_client import GroqLLM
+from agent.agent import AurickLiteAgent
+from agent.decision_cache import DecisionCache
+
+Scenario = Union[str, Dict[str, Any]]
+
+class SessionRunner:
+    """
+    The Fleet: Runs many agent sessions concurrently on one shared Chromium process.
+    Each session gets its own isolated BrowserContext, memory and log directory.
+    """
+    def __init__(self,
+                 llm: GroqLLM,
+                 headless: bool = True,
+                 concurrency: int = 4,
+                 max_steps: int = 10,
+                 log_dir: str = "logs/sweeps",
+                 decision_cache: Optional[DecisionCache] = None,
+                 settle_profile: str = "fast"):
+        self.llm = llm
+        self.headless = headless
+        self.concurrency = max(1, concurrency)
+        self.max_steps = max_steps
+        self.log_dir = log_dir
+        self.decision_cache = decision_cache
+        self.settle_profile = settle_profile
+
+    @staticmethod
+    def normalize(scenario: Scenario, index: int) -> Dict[str, Any]:
+        """
+        Accept a bare start URL or a dict with url / name / max_steps / observer ("dom" or "ax") /
+        priority (higher gets the LLM first when calls queue behind rate limits).
+        """
+        if isinstance(scenario, str):
+            scenario = {"url": scenario}
+        if not scenario.get("url"):
+            raise ValueError(f"Scenario {index} has no url")
+        return {
+            "name": scenario.get("name") or f"session_{index:04d}",
+            "url": scenario["url"],
+            "max_steps": scenario.get("max_steps"),
+            "observer": scenario.get("observer"),
+            "priority": int(scenario.get("priority") or 0)
+        }
+
+    @classmethod
+    def normalize_all(cls, scenarios: List[Scenario]) -> List[Dict[str, Any]]:
+        """
+        Normalize a sweep. Names key the per-session log directories, results and log
+        filters, so a name used twice (explicitly or as a generated session_NNNN) is an error.
+        """
+        sessions = [cls.normalize(s, i) for i, s in enumerate(scenarios)]
+        seen: Dict[str, int] = {}
+        for index, session in enumerate(sessions):
+            if session["name"] in seen:
+                raise ValueError(f"Scenario {index} reuses the name '{session['name']}' of scenario {seen[session['name']]}")
+            seen[session["name"]] = index
+        return sessions
+
+    async def run(self, scenarios: List[Scenario]) -> Dict[str, Any]:
+        """Run all scenarios with at most `concurrency` sessions alive at once."""
+        sessions = self.normalize_all(scenarios)
+        sweep_dir = os.path.join(self.log_dir, datetime.now().strftime("%Y%m%d_%H%M%S"))
+        os.makedirs(sweep_dir, exist_ok=True)
+
+        logger.info(f"Sweep starting: {len(sessions)} sessions, concurrency {self.concurrency}")
+        started = time.monotonic()
+
+        playwright = await async_playwright().start()
+        browser = await PlaywrightManager.launch_browser(playwright, self.headless, self.settle_profile)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        try:
+            results = await asyncio.gather(*(
+                self._run_session(session, browser, semaphore, sweep_dir)
+                for session in sessions
+            ))
+        finally:
+            await browser.close()
+            await playwright.stop()
+
+        summary = {
+            "sessions": len(results),
+            "succeeded": sum(1 for r in results if r["status"] == "completed"),
+            "failed": sum(1 for r in results if r["status"] != "completed"),
+            "issues": sum(r["issues"] for r in results),
+            "duration_s": round(time.monotonic() - started, 2),
+            "results": results
+        }
+        if hasattr(self.llm, "stats"):
+            summary["llm"] = self.llm.stats()
+        summary_path = os.path.join(sweep_dir, "summary.json")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        logger.info(f"Sweep finished: {summary['succeeded']}/{summary['sessions']} sessions ok. Summary: {summary_path}")
+        return summary
+
+    async def _run_session(self, session: Dict[str, Any], browser, semaphore: asyncio.Semaphore, sweep_dir: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await self.run_session(session, browser, sweep_dir)
+
+    async def run_session(self, session: Dict[str, Any], browser, sweep_dir: str) -> Dict[str, Any]:
+        """Run one normalized session in its own context on an already launched browser."""
+        name = session["name"]
+        session_dir = os.path.join(sweep_dir, name)
+        os.makedirs(session_dir, exist_ok=True)
+
+        # Per-session log file: contextualize() is task-local, so concurrent sessions never mix lines.
+        sink_id = logger.add(
+            os.path.join(session_dir, "agent.log"),
+            filter=lambda record: record["extra"].get("session") == name
+        )
+        result = {"name": name, "url": session["url"], "status": "completed",
+                  "steps": 0, "issues": 0, "log": None, "error": None}
+        started = time.monotonic()
+
+        with logger.contextualize(session=name):
+            manager = PlaywrightManager(
+                headless=self.headless,
+                browser=browser,
+                screenshot_dir=os.path.join(session_dir, "screenshots"),
+                settle_profile=self.settle_profile
+            )
+            # Behind a scheduler each session queues at its own priority and records its wait
+            llm = self.llm
+            if hasattr(llm, "session"):
+                llm = llm.session(priority=session.get("priority", 0), label=name, metrics=manager.metrics)
+            agent = AurickLiteAgent(
+                browser=manager,
+                groq=llm,
+                decision_cache=self.decision_cache,
+                log_dir=session_dir,
+                run=os.path.basename(os.path.normpath(sweep_dir)),
+                observer_mode=session.get("observer")
+            )
+            try:
+                await manager.start()
+                await agent.run(session["url"], max_steps=session["max_steps"] or self.max_steps)
+                if agent.error:
+                    # The agent keeps its own crash from propagating so the session log still gets saved
+                    result["status"] = "failed"
+                    result["error"] = agent.error
+            except Exception as e:
+                # Failures stay inside this session; the rest of the sweep continues.
+                logger.error(f"Session {name} failed: {e}")
+                result["status"] = "failed"
+                result["error"] = str(e)
+            finally:
+                try:
+                    await manager.close()
+                except Exception as e:
+                    logger.warning(f"Failed to close session {name}: {e}")
+
+            result["steps"] = agent.memory.step_count
+            result["issues"] = agent.memory.issue_count
+            result["log"] = agent.log_path
+            result["latency"] = agent.metrics.summary()
+            result["duration_s"] = round(time.monotonic() - started, 2)
+
+        logger.remove(sink_id)
+        return result
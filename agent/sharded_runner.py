@@ -0,0 +1,319 @@
+import asyncio
+import functools
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+from loguru import logger
+
+from config.settings import settings
+from agent.session_runner import SessionRunner, Scenario
+
+def default_llm_factory(share: int = 1):
+    """
+    Builds the LLM client inside each worker (clients hold sockets and cannot cross processes).
+    With the scheduler on, each of the `share` workers gets that fraction of the provider limits.
+    """
+    if settings.LLM_SCHEDULER_ENABLED:
+        from llm.scheduler import LLMScheduler
+        return LLMScheduler.from_settings(settings, share=share)
+    from llm.groq_client import GroqLLM
+    return GroqLLM()
+
+async def _worker_loop(worker_id: int, tasks, events, config: Dict[str, Any]):
+    from playwright.async_api import async_playwright
+    from browser.playwright_manager import PlaywrightManager
+    from agent.decision_cache import DecisionCache
+
+    llm = config["llm_factory"]()
+    cache = DecisionCache.from_settings(settings) if settings.DECISION_CACHE_ENABLED else None
+    runner = SessionRunner(
+        llm=llm,
+        headless=config["headless"],
+        concurrency=config["concurrency"],
+        max_steps=config["max_steps"],
+        decision_cache=cache,
+        settle_profile=config["settle_profile"]
+    )
+
+    playwright = await async_playwright().start()
+    browser = await PlaywrightManager.launch_browser(playwright, config["headless"], config["settle_profile"])
+
+    async def pull():
+        # Each puller runs one session at a time and stops at its own sentinel
+        while True:
+            session = await asyncio.to_thread(tasks.get)
+            if session is None:
+                return
+            events.put(("started", worker_id, session["name"]))
+            result = await runner.run_session(session, browser, config["sweep_dir"])
+            result["worker"] = worker_id
+            events.put(("finished", worker_id, result))
+
+    try:
+        await asyncio.gather(*(pull() for _ in range(config["concurrency"])))
+    finally:
+        await browser.close()
+        await playwright.stop()
+        if hasattr(llm, "stats"):
+            stats = llm.stats()
+            logger.info(f"Worker {worker_id} LLM scheduler: {stats}")
+            # The parent merges these into the sweep summary
+            events.put(("llm", worker_id, stats))
+        if hasattr(llm, "aclose"):
+            await llm.aclose()
+
+def _worker_main(worker_id: int, tasks, events, config: Dict[str, Any]):
+    """Process entry point: its own event loop, browser and LLM client."""
+    # Ctrl+C is handled by the parent, which drains the queue so in-flight sessions can finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        asyncio.run(_worker_loop(worker_id, tasks, events, config))
+        events.put(("exited", worker_id, None))
+    except Exception as e:
+        events.put(("exited", worker_id, f"{type(e).__name__}: {e}"))
+
+class ShardedRunner:
+    """
+    The Fleet, scaled out: spreads sessions over a pool of worker processes.
+    Every worker owns its event loop, Chromium process, LLM client and up to
+    `concurrency` concurrent sessions, and pulls work from a shared queue so fast
+    workers are never idle behind slow shards. A crashed worker only fails its
+    in-flight sessions and is replaced; Ctrl+C stops handing out new sessions.
+    """
+    def __init__(self,
+                 workers: Optional[int] = None,
+                 concurrency: int = 4,
+                 headless: bool = True,
+                 max_steps: int = 10,
+                 log_dir: str = "logs/sweeps",
+                 settle_profile: str = "fast",
+                 llm_factory: Optional[Callable[[], Any]] = None,
+                 grace_seconds: float = 60.0):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.concurrency = max(1, concurrency)
+        self.headless = headless
+        self.max_steps = max_steps
+        self.log_dir = log_dir
+        self.settle_profile = settle_profile
+        self.llm_factory = llm_factory   # must be picklable: a module-level function or functools.partial
+        self.grace_seconds = grace_seconds
+
+    def run(self, scenarios: List[Scenario]) -> Dict[str, Any]:
+        sessions = SessionRunner.normalize_all(scenarios)
+        sweep_dir = os.path.join(self.log_dir, datetime.now().strftime("%Y%m%d_%H%M%S"))
+        os.makedirs(sweep_dir, exist_ok=True)
+        workers = min(self.workers, max(1, len(sessions)))
+        logger.info(f"Sharded sweep starting: {len(sessions)} sessions on {workers} workers x {self.concurrency}")
+        started = time.monotonic()
+
+        # spawn, not fork: Playwright's driver threads do not survive a fork
+        ctx = multiprocessing.get_context("spawn")
+        tasks, events = ctx.Queue(), ctx.Queue()
+        for session in sessions:
+            tasks.put(session)
+        config = {
+            "headless": self.headless,
+            "concurrency": self.concurrency,
+            "max_steps": self.max_steps,
+            "settle_profile": self.settle_profile,
+            "sweep_dir": sweep_dir,
+            # The default client splits the provider limits between the workers
+            "llm_factory": self.llm_factory or functools.partial(default_llm_factory, share=workers)
+        }
+
+        procs: Dict[int, Any] = {}
+        in_flight: Dict[int, set] = {}
+        results: Dict[str, Dict[str, Any]] = {}
+        worker_stats: Dict[int, Dict[str, Any]] = {}
+
+        def spawn():
+            worker_id = len(worker_stats)
+            proc = ctx.Process(target=_worker_main, args=(worker_id, tasks, events, config), daemon=True)
+            proc.start()
+            procs[worker_id] = proc
+            in_flight[worker_id] = set()
+            worker_stats[worker_id] = {"sessions": 0, "started": time.monotonic(), "exit": None}
+            # One sentinel per puller, queued behind all sessions
+            for _ in range(self.concurrency):
+                tasks.put(None)
+
+        for _ in range(workers):
+            spawn()
+
+        unfinished = "failed"
+        restarts = 0
+        try:
+            while len(results) < len(sessions) and procs:
+                self._handle_event(events, results, in_flight, worker_stats)
+
+                # Failure isolation: a dead worker fails only its in-flight sessions
+                for worker_id, proc in list(procs.items()):
+                    if proc.is_alive():
+                        continue
+                    proc.join()
+                    del procs[worker_id]
+                    worker_stats[worker_id]["duration_s"] = round(time.monotonic() - worker_stats[worker_id]["started"], 2)
+                    # Its last results may still sit in the pipe; read them before counting losses
+                    while self._handle_event(events, results, in_flight, worker_stats, timeout=0.1):
+                        pass
+                    lost = in_flight.pop(worker_id)
+                    for name in lost:
+                        results.setdefault(name, self._missing(name, sessions, "failed", f"worker {worker_id} exited with code {proc.exitcode}"))
+                    # Replacements are capped so a worker that cannot start at all does not respawn forever
+                    if (lost or proc.exitcode) and len(results) < len(sessions) and restarts < self.workers:
+                        restarts += 1
+                        logger.warning(f"Worker {worker_id} died (exit code {proc.exitcode}); starting a replacement")
+                        spawn()
+        except KeyboardInterrupt:
+            unfinished = "cancelled"
+            drained = self._drain(tasks)
+            logger.warning(f"Interrupted: {drained} queued sessions cancelled, waiting up to {self.grace_seconds}s for running ones")
+            for _ in range(len(procs) * self.concurrency):
+                tasks.put(None)
+            deadline = time.monotonic() + self.grace_seconds
+            try:
+                while (any(in_flight.get(w) for w in procs) and time.monotonic() < deadline
+                       and any(p.is_alive() for p in procs.values())):
+                    self._handle_event(events, results, in_flight, worker_stats)
+            except KeyboardInterrupt:
+                logger.warning("Second interrupt; terminating workers now")
+
+        return self._finish(sessions, results, procs, events, in_flight, worker_stats, sweep_dir, started, unfinished)
+
+    @staticmethod
+    def _handle_event(events, results, in_flight, worker_stats, timeout: float = 0.5) -> bool:
+        """Apply one worker event, if any arrives within `timeout`."""
+        try:
+            kind, worker_id, payload = events.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        if kind == "started":
+            in_flight.setdefault(worker_id, set()).add(payload)
+        elif kind == "finished":
+            in_flight.get(worker_id, set()).discard(payload["name"])
+            results[payload["name"]] = payload
+            worker_stats[worker_id]["sessions"] += 1
+        elif kind == "llm":
+            worker_stats[worker_id]["llm"] = payload
+        elif kind == "exited":
+            worker_stats[worker_id]["exit"] = payload or "ok"
+            if payload:
+                logger.error(f"Worker {worker_id} stopped with an error: {payload}")
+        return True
+
+    @staticmethod
+    def _drain(tasks) -> int:
+        drained = 0
+        while True:
+            try:
+                item = tasks.get_nowait()
+            except queue.Empty:
+                return drained
+            if item is not None:
+                drained += 1
+
+    @staticmethod
+    def _missing(name: str, sessions: List[Dict[str, Any]], status: str, error: Optional[str]) -> Dict[str, Any]:
+        url = next((s["url"] for s in sessions if s["name"] == name), None)
+        return {"name": name, "url": url, "status": status, "steps": 0, "issues": 0, "log": None, "error": error}
+
+    def _finish(self, sessions, results, procs, events, in_flight, worker_stats, sweep_dir, started, unfinished: str) -> Dict[str, Any]:
+        # Keep reading while the workers wind down: their LLM stats are sent on the way out
+        deadline = time.monotonic() + 5
+        while any(proc.is_alive() for proc in procs.values()) and time.monotonic() < deadline:
+            self._handle_event(events, results, in_flight, worker_stats, timeout=0.1)
+        for proc in procs.values():
+            if proc.is_alive():
+                proc.terminate()
+            proc.join()
+        while self._handle_event(events, results, in_flight, worker_stats, timeout=0.1):
+            pass
+        for stats in worker_stats.values():
+            stats.setdefault("duration_s", round(time.monotonic() - stats["started"], 2))
+
+        # Sessions without a result were interrupted (cancelled) or had no worker left to run them (failed)
+        error = None if unfinished == "cancelled" else "not run: no worker left"
+        ordered = [
+            results.get(s["name"]) or self._missing(s["name"], sessions, unfinished, error)
+            for s in sessions
+        ]
+        summary = self.merge(ordered, time.monotonic() - started)
+        llm_stats = [stats["llm"] for stats in worker_stats.values() if stats.get("llm")]
+        if llm_stats:
+            summary["llm"] = self.merge_llm(llm_stats)
+        summary["workers"] = {
+            str(worker_id): {k: v for k, v in stats.items() if k != "started"}
+            for worker_id, stats in sorted(worker_stats.items())
+        }
+        summary_path = os.path.join(sweep_dir, "summary.json")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        logger.info(f"Sharded sweep finished: {summary['succeeded']}/{summary['sessions']} sessions ok "
+                    f"({summary['sessions_per_min']} sessions/min). Summary: {summary_path}")
+        return summary
+
+    @staticmethod
+    def merge_llm(worker_stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        One LLMScheduler.stats() for the sweep. Counters and current load are summed;
+        wait percentiles are the worst worker's (raw waits stay in the workers) and the
+        per-priority means are weighted by each worker's number of waits at that priority.
+        """
+        merged: Dict[str, Any] = {}
+        for key in ("submitted", "completed", "failed", "retries", "rate_limited", "queue_depth", "in_flight", "concurrency"):
+            merged[key] = sum(stats.get(key, 0) for stats in worker_stats)
+        merged["max_queue_depth"] = max(stats.get("max_queue_depth", 0) for stats in worker_stats)
+        merged["min_concurrency_seen"] = min(stats.get("min_concurrency_seen", 0) for stats in worker_stats)
+        for key in ("wait_p50_ms", "wait_p95_ms", "wait_max_ms"):
+            merged[key] = max(stats.get(key, 0.0) for stats in worker_stats)
+
+        by_priority: Dict[str, List[float]] = {}
+        for stats in worker_stats:
+            counts = stats.get("waits_by_priority") or {}
+            for priority, mean in (stats.get("wait_mean_ms_by_priority") or {}).items():
+                weight = counts.get(priority, 0)
+                totals = by_priority.setdefault(priority, [0.0, 0])
+                totals[0] += mean * weight
+                totals[1] += weight
+        merged["wait_mean_ms_by_priority"] = {
+            priority: round(total / weight, 2) if weight else 0.0
+            for priority, (total, weight) in sorted(by_priority.items(), key=lambda item: int(item[0]))
+        }
+        merged["waits_by_priority"] = {
+            priority: weight for priority, (_, weight) in sorted(by_priority.items(), key=lambda item: int(item[0]))
+        }
+        merged["workers"] = len(worker_stats)
+        return merged
+
+    @staticmethod
+    def merge(results: List[Dict[str, Any]], duration_s: float) -> Dict[str, Any]:
+        """One summary for all workers: totals, throughput and span timings summed over sessions."""
+        timings: Dict[str, Dict[str, float]] = {}
+        for result in results:
+            for name, stats in (result.get("latency") or {}).items():
+                merged = timings.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+                merged["count"] += stats["count"]
+                merged["total_ms"] = round(merged["total_ms"] + stats["total_ms"], 2)
+                merged["max_ms"] = max(merged["max_ms"], stats["max_ms"])
+        for merged in timings.values():
+            merged["mean_ms"] = round(merged["total_ms"] / merged["count"], 2) if merged["count"] else 0.0
+
+        steps = sum(r["steps"] for r in results)
+        return {
+            "sessions": len(results),
+            "succeeded": sum(1 for r in results if r["status"] == "completed"),
+            "failed": sum(1 for r in results if r["status"] == "failed"),
+            "cancelled": sum(1 for r in results if r["status"] == "cancelled"),
+            "issues": sum(r["issues"] for r in results),
+            "steps": steps,
+            "duration_s": round(duration_s, 2),
+            "sessions_per_min": round(len(results) / duration_s * 60, 2) if duration_s else 0.0,
+            "steps_per_sec": round(steps / duration_s, 3) if duration_s else 0.0,
+            "timings": timings,
+            "results": results
+        }
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit
+from loguru import logger
+
+AUTH_STATE_VERSION = 1
+
+# Restores localStorage for one origin, once per tab: later navigations must see what the
+# app itself stored (e.g. a logout), not the cached copy again.
+RESTORE_STORAGE_SCRIPT = """
+(() => {
+    const origins = %s;
+    const entries = origins[location.origin];
+    if (!entries) return;
+    try {
+        if (sessionStorage.getItem('__aurickAuthRestored')) return;
+        for (const item of entries) localStorage.setItem(item.name, item.value);
+        sessionStorage.setItem('__aurickAuthRestored', '1');
+    } catch (e) {}
+})();
+"""
+
+def _has_password_field(observation: Dict[str, Any]) -> bool:
+    return any(i.get("type") == "password" for i in observation.get("interactive_elements", {}).get("inputs", []))
+
+class AuthStateCache:
+    """
+    The Keyring: Authenticated browser storage (cookies + localStorage) per origin and
+    credential profile, saved after a successful login and restored into new contexts so
+    sessions skip the login flow. Entries expire after `ttl_seconds` or when their cookies
+    do; a restored state that lands on a login form is dropped and the session logs in again.
+    """
+    def __init__(self, directory: str = "logs/auth_state", ttl_seconds: float = 12 * 3600, profile: str = "default"):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.profile = profile
+        self.stats = {"restored": 0, "saved": 0, "stale": 0, "expired": 0, "misses": 0}
+
+        # Per-session state machine: restored -> probed; login typed -> saved on the next page
+        self.restored_origin: Optional[str] = None
+        self._probe_pending = False
+        self._login_attempted = False
+        self._login_url: Optional[str] = None
+
+    @classmethod
+    def from_settings(cls, settings) -> "AuthStateCache":
+        return cls(
+            directory=settings.AUTH_STATE_DIR,
+            ttl_seconds=settings.AUTH_STATE_TTL,
+            profile=settings.AUTH_PROFILE or settings.TEST_USERNAME or "default"
+        )
+
+    # --- Storage ---
+
+    @staticmethod
+    def origin(url: str) -> str:
+        parts = urlsplit(url or "")
+        return f"{parts.scheme}://{parts.netloc}" if parts.netloc else ""
+
+    def _path(self, origin: str) -> str:
+        host = re.sub(r"[^a-zA-Z0-9.-]+", "_", urlsplit(origin).netloc or "local")
+        # The profile is hashed so usernames do not end up in file names
+        profile = hashlib.sha256(self.profile.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.directory, f"{host}_{profile}.json")
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        """A fresh entry ({"state", "login_url", "landing_url", ...}) for the URL's origin, or None."""
+        origin = self.origin(url)
+        path = self._path(origin)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable auth state {path}: {e}")
+            return None
+
+        now = time.time()
+        cookies = entry.get("state", {}).get("cookies", [])
+        # Session cookies (expires == -1) live as long as the entry; dated ones must not have lapsed
+        dated = [c for c in cookies if c.get("expires", -1) > 0]
+        if (entry.get("v") != AUTH_STATE_VERSION or entry.get("origin") != origin
+                or (self.ttl_seconds > 0 and now - entry.get("saved", 0) > self.ttl_seconds)
+                or (dated and all(c["expires"] < now for c in dated))):
+            self.stats["expired"] += 1
+            self._remove(path)
+            return None
+        return entry
+
+    def save(self, url: str, state: Dict[str, Any], login_url: Optional[str] = None) -> Optional[str]:
+        """`url` is the first page after the login; sessions starting on `login_url` resume there."""
+        origin = self.origin(url)
+        path = self._path(origin)
+        entry = {"v": AUTH_STATE_VERSION, "origin": origin, "saved": time.time(),
+                 "login_url": login_url, "landing_url": url, "state": state}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            # Session cookies are credentials: keep the file private to the user
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self.stats["saved"] += 1
+            return path
+        except Exception as e:
+            logger.error(f"Failed to save auth state for {origin}: {e}")
+            return None
+
+    def invalidate(self, url: str):
+        self._remove(self._path(self.origin(url)))
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # --- Session Flow ---
+
+    async def restore(self, browser, url: str) -> Optional[str]:
+        """
+        Apply the cached state for the start URL's origin to the browser's context.
+        Returns the URL to open instead of `url`: a session that would start on the login
+        page resumes on the page the login led to (the probe of the restored state).
+        """
+        entry = self.load(url)
+        if entry is None:
+            return None
+        await browser.apply_storage_state(entry["state"])
+        self.restored_origin = self.origin(url)
+        self._probe_pending = True
+        self.stats["restored"] += 1
+        logger.info(f"Restored authenticated state for {self.restored_origin} (profile {self.profile})")
+        if entry.get("login_url") and url.split("#", 1)[0].rstrip("/") == entry["login_url"].split("#", 1)[0].rstrip("/"):
+            return entry["landing_url"]
+        return url
+
+    def note_actions(self, actions: List[Dict[str, Any]], password: str):
+        """Remember that this step typed the profile's password (a login attempt)."""
+        if password and any(a.get("type") == "type" and a.get("input_value") == password for a in actions):
+            self._login_attempted = True
+
+    async def check(self, observation: Dict[str, Any], browser) -> Optional[str]:
+        """
+        Called with every observation. Probes a restored state on the first page (a login form
+        there means it went stale) and saves the state once a login attempt led off the login form.
+        Returns "stale" or "saved" when either happened.
+        """
+        url = observation.get("url", "")
+        login_form = _has_password_field(observation)
+        if login_form:
+            self._login_url = url
+
+        if self._probe_pending:
+            self._probe_pending = False
+            if login_form and self.origin(url) == self.restored_origin:
+                logger.info(f"Cached auth state for {self.restored_origin} is stale; logging in again")
+                self.stats["stale"] += 1
+                self.invalidate(url)
+                await browser.clear_storage_state()
+                self.restored_origin = None
+                return "stale"
+
+        if self._login_attempted and not login_form and self.origin(url):
+            self._login_attempted = False
+            path = self.save(url, await browser.storage_state(), login_url=self._login_url)
+            if path:
+                logger.info(f"Saved authenticated state for {self.origin(url)} to {path}")
+                return "saved"
+        return None
@@ -0,0 +1,50 @@
+from collections import deque
+from typing import Dict, Any, List, Tuple
+
+class ConsoleRingBuffer:
+    """
+    Fixed-capacity store for browser console entries.
+    Every entry gets a monotonically increasing sequence number, so readers can keep a
+    cursor and fetch exactly what arrived since their last read. Overflowed entries are counted.
+    """
+    def __init__(self, capacity: int = 500):
+        self.capacity = max(1, capacity)
+        self._entries = deque(maxlen=self.capacity)
+        self.next_seq = 0   # sequence number the next entry will get
+        self.overflow = 0   # entries evicted to make room for newer ones
+
+    def append(self, entry: Dict[str, Any]):
+        if len(self._entries) == self.capacity:
+            self.overflow += 1
+        entry["seq"] = self.next_seq
+        self._entries.append(entry)
+        self.next_seq += 1
+
+    def since(self, cursor: int) -> Tuple[List[Dict[str, Any]], int, int]:
+        """
+        Entries with seq >= cursor, the cursor for the next read, and how many
+        entries in that range were already evicted.
+        """
+        oldest = self.next_seq - len(self._entries)
+        missed = max(0, oldest - cursor)
+        start = max(cursor, oldest) - oldest
+        entries = [self._entries[i] for i in range(start, len(self._entries))]
+        return entries, self.next_seq, missed
+
+    def clear(self):
+        self._entries.clear()
+
+    # List-like access so existing callers (len, iteration, slicing) keep working.
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __bool__(self) -> bool:
+        return bool(self._entries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._entries)[index]
+        return self._entries[index]
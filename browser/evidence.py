@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+import time
+from typing import Dict, Any, Optional
+from loguru import logger
+
+from telemetry.metrics import Metrics
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional: only needed for WebP and downscaled thumbnails
+    Image = None
+
+class EvidencePipeline:
+    """
+    Background screenshot pipeline.
+    Captures raw frames from the page, then hashes, encodes and writes them off the agent loop
+    into a per-session content-addressed store. Identical frames are written once.
+    """
+    def __init__(self,
+                 directory: str = "logs/screenshots",
+                 image_format: str = "jpeg",
+                 quality: int = 70,
+                 scale: float = 1.0,
+                 full_page: bool = False,
+                 clip: Optional[Dict[str, float]] = None,
+                 metrics: Optional[Metrics] = None):
+        self.directory = directory
+        self.image_format = image_format.lower()
+        self.quality = quality
+        self.scale = scale
+        self.full_page = full_page
+        self.clip = clip
+        self.metrics = metrics or Metrics(enabled=False)
+
+        if self.image_format not in ("png", "jpeg", "webp"):
+            logger.warning(f"Unsupported screenshot format '{image_format}', using jpeg.")
+            self.image_format = "jpeg"
+        if Image is None and (self.image_format == "webp" or self.scale < 1.0):
+            logger.warning("Pillow is not installed: WebP and downscaling disabled, using jpeg at full size.")
+            self.image_format = "jpeg"
+            self.scale = 1.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._known = set()  # hashes already queued or on disk this session
+        self.stats = {"captured": 0, "deduplicated": 0, "written": 0, "bytes_written": 0, "failed": 0}
+
+    @property
+    def extension(self) -> str:
+        return "jpg" if self.image_format == "jpeg" else self.image_format
+
+    def _needs_reencode(self) -> bool:
+        return self.image_format == "webp" or self.scale < 1.0
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], f"{digest}.{self.extension}")
+
+    async def capture(self, page, label: str = "step") -> str:
+        """
+        Grab a frame and return its final path immediately; encoding and disk I/O happen later.
+        """
+        # Chromium encodes JPEG/PNG itself; WebP and thumbnails are produced from a lossless PNG.
+        capture_type = "png" if self._needs_reencode() or self.image_format == "png" else "jpeg"
+        options: Dict[str, Any] = {"type": capture_type, "full_page": self.full_page}
+        if capture_type == "jpeg":
+            options["quality"] = self.quality
+        if self.clip:
+            options["clip"] = self.clip
+
+        raw = await page.screenshot(**options)
+        self.stats["captured"] += 1
+
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._object_path(digest)
+        job = {"label": label, "time": time.time(), "hash": digest, "path": path, "url": page.url}
+
+        if digest in self._known:
+            self.stats["deduplicated"] += 1
+            job["raw"] = None
+        else:
+            self._known.add(digest)
+            job["raw"] = raw
+
+        self._ensure_worker()
+        self._queue.put_nowait(job)
+        return path
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                with self.metrics.span("screenshot.write"):
+                    await asyncio.to_thread(self._persist, job)
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"Screenshot write failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _encode(self, raw: bytes) -> bytes:
+        if not self._needs_reencode():
+            return raw
+        image = Image.open(io.BytesIO(raw))
+        if self.scale < 1.0:
+            size = (max(1, int(image.width * self.scale)), max(1, int(image.height * self.scale)))
+            image = image.resize(size, Image.LANCZOS)
+        if self.image_format == "jpeg":
+            image = image.convert("RGB")
+        out = io.BytesIO()
+        save_format = "JPEG" if self.image_format == "jpeg" else self.image_format.upper()
+        image.save(out, format=save_format, quality=self.quality)
+        return out.getvalue()
+
+    def _persist(self, job: Dict[str, Any]):
+        """Runs in a worker thread: encode, write the object once, append to the manifest."""
+        path = job["path"]
+        os.makedirs(self.directory, exist_ok=True)
+        if job["raw"] is not None and not os.path.exists(path):
+            data = self._encode(job["raw"])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self.stats["written"] += 1
+            self.stats["bytes_written"] += len(data)
+            logger.info(f"Screenshot saved: {path}")
+
+        entry = {k: job[k] for k in ("label", "time", "hash", "path", "url")}
+        with open(os.path.join(self.directory, "manifest.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    async def flush(self):
+        """Wait until every queued frame is on disk."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        if self.stats["captured"]:
+            logger.info(f"Screenshot pipeline stats: {self.stats}")
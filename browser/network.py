@@ -0,0 +1,427 @@
+import asyncio
+import email.utils
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Any, Optional, Set
+from urllib.parse import urlsplit
+from loguru import logger
+
+from telemetry.metrics import Metrics
+
+# Third-party hosts that never matter for what the agent sees (matched as hostname substrings)
+ANALYTICS_HOSTS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "facebook.net", "connect.facebook.com", "hotjar.com", "segment.io", "segment.com",
+    "mixpanel.com", "amplitude.com", "fullstory.com", "clarity.ms", "newrelic.com", "nr-data.net"
+]
+
+# Request interception profiles.
+# "faithful" loads everything (static assets may come from the local cache; without one it
+# installs no route, so Chromium's own HTTP cache stays in charge);
+# "text-only" drops what observation never uses; "off" installs no route at all.
+NETWORK_PROFILES: Dict[str, Dict[str, Any]] = {
+    "faithful": {
+        "route": True,
+        "block_types": [],
+        "block_hosts": [],
+        "cache_types": ["script", "stylesheet", "font", "image"]
+    },
+    "text-only": {
+        "route": True,
+        "block_types": ["image", "media", "font"],
+        "block_hosts": ANALYTICS_HOSTS,
+        "cache_types": ["script", "stylesheet"]
+    },
+    "off": {
+        "route": False,
+        "block_types": [],
+        "block_hosts": [],
+        "cache_types": []
+    }
+}
+
+# Headers that describe the wire encoding, not the (already decoded) cached body
+HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+# Lets the resource timing buffer hold a whole page's worth of requests (default is 250)
+RESOURCE_TIMING_INIT_SCRIPT = """
+(() => { try { performance.setResourceTimingBufferSize(5000); } catch (e) {} })();
+"""
+
+# Navigation timing of the current document plus resource entries after `index`.
+# A new timeOrigin means a new document, so the index restarts and its load is reported.
+RESOURCE_TIMING_SCRIPT = """
+([origin, index]) => {
+    const fresh = performance.timeOrigin !== origin;
+    const entries = performance.getEntriesByType('resource');
+    const nav = performance.getEntriesByType('navigation')[0];
+    return {
+        origin: performance.timeOrigin,
+        next: entries.length,
+        resources: entries.slice(fresh ? 0 : index)
+            .filter(e => e.transferSize > 0)
+            .map(e => [e.name, e.transferSize]),
+        navigation: fresh && nav ? {
+            url: nav.name,
+            dom_content_loaded_ms: Math.round(nav.domContentLoadedEventEnd),
+            load_ms: nav.loadEventEnd > 0 ? Math.round(nav.loadEventEnd) : null,
+            bytes: nav.transferSize || 0
+        } : null
+    };
+}
+"""
+
+class AssetCache:
+    """
+    On-disk cache of static assets, keyed by URL and revalidated with the stored validators.
+    Size-bounded like the decision cache: least recently used entries go first.
+    One instance per directory is shared by all sessions in the process.
+    """
+    _shared: Dict[str, "AssetCache"] = {}
+
+    def __init__(self, cache_dir: str = "logs/asset_cache", max_bytes: int = 200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._disk_bytes: Optional[int] = None
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @classmethod
+    def shared(cls, cache_dir: str, max_bytes: int) -> "AssetCache":
+        cache = cls._shared.get(cache_dir)
+        if cache is None:
+            cache = cls._shared[cache_dir] = cls(cache_dir, max_bytes)
+        return cache
+
+    @classmethod
+    def from_settings(cls, settings) -> Optional["AssetCache"]:
+        if not settings.ASSET_CACHE_ENABLED:
+            return None
+        return cls.shared(settings.ASSET_CACHE_DIR, settings.ASSET_CACHE_MAX_MB * 1024 * 1024)
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return f"{base}.json", f"{base}.body"
+
+    # --- Freshness ---
+
+    @staticmethod
+    def _cache_control(headers: Dict[str, str]) -> Dict[str, Optional[str]]:
+        directives = {}
+        for part in headers.get("cache-control", "").lower().split(","):
+            name, _, value = part.strip().partition("=")
+            if name:
+                directives[name] = value.strip('"') or None
+        return directives
+
+    @classmethod
+    def storable(cls, status: int, headers: Dict[str, str]) -> bool:
+        directives = cls._cache_control(headers)
+        if status != 200 or "no-store" in directives or "private" in directives:
+            return False
+        # Without a lifetime or a validator the entry could never be served
+        return cls._lifetime(headers) > 0 or "etag" in headers or "last-modified" in headers
+
+    @classmethod
+    def _lifetime(cls, headers: Dict[str, str]) -> float:
+        directives = cls._cache_control(headers)
+        if "no-cache" in directives:
+            return 0.0
+        for name in ("s-maxage", "max-age"):
+            if directives.get(name, "") and directives[name].isdigit():
+                return float(directives[name])
+        if "expires" in headers:
+            try:
+                expires = email.utils.parsedate_to_datetime(headers["expires"]).timestamp()
+                return max(0.0, expires - time.time())
+            except (TypeError, ValueError):
+                return 0.0
+        return 0.0
+
+    # --- Lookup / Store ---
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Cached metadata for `url` (with a `fresh` flag), or None."""
+        meta_path, _ = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable asset cache entry {meta_path}: {e}")
+            self._remove(url)
+            return None
+        if meta.get("url") != url:
+            return None  # hash collision guard
+        meta["fresh"] = time.time() - meta["stored"] < meta["lifetime"]
+        return meta
+
+    def read_body(self, url: str) -> Optional[bytes]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(body_path, "rb") as f:
+                body = f.read()
+            os.utime(meta_path)  # keep recently used entries out of eviction
+            return body
+        except FileNotFoundError:
+            return None
+
+    def validators(self, meta: Dict[str, Any]) -> Dict[str, str]:
+        headers = {}
+        if meta["headers"].get("etag"):
+            headers["if-none-match"] = meta["headers"]["etag"]
+        if meta["headers"].get("last-modified"):
+            headers["if-modified-since"] = meta["headers"]["last-modified"]
+        return headers
+
+    def store(self, url: str, status: int, headers: Dict[str, str], body: bytes):
+        meta_path, body_path = self._paths(url)
+        headers = {k: v for k, v in headers.items() if k not in HOP_HEADERS and k != "set-cookie"}
+        meta = json.dumps({
+            "url": url,
+            "status": status,
+            "headers": headers,
+            "stored": time.time(),
+            "lifetime": self._lifetime(headers),
+            "size": len(body)
+        })
+        try:
+            os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+            previous = sum(os.path.getsize(p) for p in (meta_path, body_path) if os.path.exists(p))
+            usage = self.disk_usage()
+            for path, data, mode in ((body_path, body, "wb"), (meta_path, meta.encode("utf-8"), "wb")):
+                tmp_path = f"{path}.{os.getpid()}.tmp"  # sharded sweeps write from several processes
+                with open(tmp_path, mode) as f:
+                    f.write(data)
+                os.replace(tmp_path, path)  # the body lands before the metadata that points at it
+            self.stats["writes"] += 1
+            self._disk_bytes = usage + len(body) + len(meta) - previous
+            if self._disk_bytes > self.max_bytes:
+                self._evict()
+        except Exception as e:
+            logger.warning(f"Failed to cache asset {url}: {e}")
+
+    def refresh(self, url: str, meta: Dict[str, Any], headers: Dict[str, str]):
+        """A 304 confirmed the entry: restart its lifetime with the new response headers."""
+        meta_path, _ = self._paths(url)
+        merged = dict(meta["headers"])
+        merged.update({k: v for k, v in headers.items() if k not in HOP_HEADERS and k != "set-cookie"})
+        meta = {k: v for k, v in meta.items() if k != "fresh"}
+        meta.update({"headers": merged, "stored": time.time(), "lifetime": self._lifetime(merged)})
+        try:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        except Exception as e:
+            logger.warning(f"Failed to refresh cached asset {url}: {e}")
+
+    # --- Disk Housekeeping ---
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    meta_path = os.path.join(root, name)
+                    body_path = meta_path[:-5] + ".body"
+                    try:
+                        stat = os.stat(meta_path)
+                        size = stat.st_size + (os.path.getsize(body_path) if os.path.exists(body_path) else 0)
+                        entries.append((stat.st_mtime, size, meta_path, body_path))
+                    except FileNotFoundError:
+                        pass
+        return entries
+
+    def disk_usage(self) -> int:
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(entry[1] for entry in self._entries())
+        return self._disk_bytes
+
+    def _remove(self, url: str):
+        for path in self._paths(url):
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                if self._disk_bytes is not None:
+                    self._disk_bytes -= size
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        """Drop the least recently used entries until usage is back under 90% of the budget."""
+        entries = sorted(self._entries())
+        total = sum(entry[1] for entry in entries)
+        target = int(self.max_bytes * 0.9)
+        for _, size, meta_path, body_path in entries:
+            if total <= target:
+                break
+            for path in (meta_path, body_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            self.stats["evictions"] += 1
+        self._disk_bytes = total
+
+    def summary(self) -> Dict[str, Any]:
+        return dict(self.stats, disk_bytes=self.disk_usage())
+
+class RequestRouter:
+    """
+    The Gatekeeper: Intercepts every request of a browser context.
+    Blocks what the active profile excludes, answers static assets from the AssetCache
+    (revalidating with ETag/Last-Modified when stale) and counts requests and bytes so
+    each agent step can report page-load time and traffic.
+    """
+    def __init__(self,
+                 profile: str = "faithful",
+                 cache: Optional[AssetCache] = None,
+                 metrics: Optional[Metrics] = None):
+        if profile not in NETWORK_PROFILES:
+            logger.warning(f"Unknown network profile '{profile}', using 'faithful'")
+            profile = "faithful"
+        self.profile_name = profile
+        self.profile = NETWORK_PROFILES[profile]
+        self.cache = cache
+        self.metrics = metrics or Metrics(enabled=False)
+        self._counters = self._zero()
+        # Answered here, so resource timing must not count them again. Reset per report; the previous
+        # report's set is kept one more round for requests whose timing entry lands in the next report.
+        self._handled_urls: Set[str] = set()
+        self._handled_before: Set[str] = set()
+        self._timing_origin = 0.0
+        self._timing_index = 0
+
+    @staticmethod
+    def _zero() -> Dict[str, int]:
+        return {"requests": 0, "blocked": 0, "cache_hits": 0, "revalidated": 0, "bytes_network": 0, "bytes_cache": 0}
+
+    @property
+    def routing(self) -> bool:
+        """Routing sends every request through Python and disables Chromium's HTTP cache: only when it buys something."""
+        profile = self.profile
+        return profile["route"] and (self.cache is not None or bool(profile["block_types"] or profile["block_hosts"]))
+
+    async def attach(self, context):
+        await context.add_init_script(RESOURCE_TIMING_INIT_SCRIPT)
+        if self.routing:
+            await context.route("**/*", self._handle)
+            logger.info(f"Request routing enabled (profile: {self.profile_name}, asset cache: {'on' if self.cache else 'off'})")
+
+    def _blocked(self, request) -> bool:
+        if request.resource_type in self.profile["block_types"]:
+            return True
+        host = urlsplit(request.url).hostname or ""
+        return any(pattern in host for pattern in self.profile["block_hosts"])
+
+    async def _handle(self, route):
+        request = route.request
+        self._counters["requests"] += 1
+        try:
+            if self._blocked(request):
+                self._counters["blocked"] += 1
+                await route.abort("blockedbyclient")
+                return
+            if (self.cache is None
+                    or request.method != "GET"
+                    or request.resource_type not in self.profile["cache_types"]
+                    or not request.url.startswith("http")):
+                await route.continue_()
+                return
+            await self._serve_cached(route, request.url)
+        except Exception as e:
+            logger.debug(f"Request routing failed for {request.url}: {e}")
+            # A route left unhandled hangs the request, and PageSettler waits on it until max_wait_ms
+            try:
+                await route.continue_()
+            except Exception:
+                pass  # already handled, or the page is gone
+
+    async def _serve_cached(self, route, url: str):
+        with self.metrics.span("network.cache_lookup"):
+            meta = await asyncio.to_thread(self.cache.lookup, url)
+            body = await asyncio.to_thread(self.cache.read_body, url) if meta else None
+        if body is None:
+            meta = None
+
+        if meta and meta["fresh"]:
+            self.cache.stats["hits"] += 1
+            await self._fulfill_cached(route, url, meta, body)
+            return
+
+        extra = self.cache.validators(meta) if meta else {}
+        try:
+            response = await route.fetch(headers={**route.request.headers, **extra})
+            headers = {k.lower(): v for k, v in response.headers.items()}
+            revalidated = bool(meta) and response.status == 304
+            fetched = b"" if revalidated else await response.body()
+        except Exception as e:
+            # DNS failure, refused connection, timeout: fail the request like the network would
+            logger.debug(f"Fetch failed for {url}: {e}")
+            await route.abort("failed")
+            return
+
+        if revalidated:
+            self.cache.stats["revalidated"] += 1
+            self._counters["revalidated"] += 1
+            await self._cache_write(self.cache.refresh, url, meta, headers)
+            await self._fulfill_cached(route, url, meta, body)
+            return
+
+        self.cache.stats["misses"] += 1
+        self._counters["bytes_network"] += len(fetched)
+        self._handled_urls.add(url)
+        if AssetCache.storable(response.status, headers):
+            await self._cache_write(self.cache.store, url, response.status, headers, fetched)
+        await route.fulfill(
+            status=response.status,
+            headers={k: v for k, v in headers.items() if k not in HOP_HEADERS},
+            body=fetched
+        )
+
+    async def _cache_write(self, write, *args):
+        """Disk trouble costs the cache entry, never the response the page is waiting for."""
+        try:
+            await asyncio.to_thread(write, *args)
+        except Exception as e:
+            logger.warning(f"Asset cache write failed for {args[0]}: {e}")
+
+    async def _fulfill_cached(self, route, url: str, meta: Dict[str, Any], body: bytes):
+        self._counters["cache_hits"] += 1
+        self._counters["bytes_cache"] += len(body)
+        self._handled_urls.add(url)
+        await route.fulfill(status=meta["status"], headers=meta["headers"], body=body)
+
+    async def take_stats(self, page) -> Dict[str, Any]:
+        """
+        Traffic since the previous call, plus load timings if a new document loaded.
+        Bytes of requests not answered here come from Resource Timing, which reports
+        0 for cross-origin responses without Timing-Allow-Origin, so treat them as a lower bound.
+        """
+        stats: Dict[str, Any] = self._counters
+        self._counters = self._zero()
+        handled = self._handled_urls | self._handled_before
+        self._handled_before, self._handled_urls = self._handled_urls, set()
+        try:
+            timing = await page.evaluate(RESOURCE_TIMING_SCRIPT, [self._timing_origin, self._timing_index])
+        except Exception as e:
+            logger.debug(f"Resource timing unavailable: {e}")
+            timing = None
+
+        if timing:
+            self._timing_origin = timing["origin"]
+            self._timing_index = timing["next"]
+            stats["bytes_network"] += sum(size for name, size in timing["resources"] if name not in handled)
+            navigation = timing["navigation"]
+            if navigation:
+                stats["bytes_network"] += navigation["bytes"]
+                stats["page_load_ms"] = navigation["load_ms"]
+                stats["dom_content_loaded_ms"] = navigation["dom_content_loaded_ms"]
+                if navigation["load_ms"] is not None:
+                    self.metrics.record("page.load", navigation["load_ms"])
+        return stats
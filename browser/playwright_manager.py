@@ -1,39 +1,129 @@
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext
-import os
-import datetime
 from loguru import logger
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional
 import asyncio
+import json
+
+from config.settings import settings
+from browser.settle import PageSettler, SETTLE_PROFILES
+from browser.evidence import EvidencePipeline
+from browser.console_buffer import ConsoleRingBuffer
+from browser.network import RequestRouter, AssetCache
+from browser.pool import PoolClient
+from browser.auth_state import RESTORE_STORAGE_SCRIPT
+from telemetry.metrics import Metrics
 
 class PlaywrightManager:
     """
     Manages browser lifecycle, observations (screenshots, console), and interactions.
     """
-    def __init__(self, headless=False):
+    def __init__(self,
+                 headless=False,
+                 browser: Optional[Browser] = None,
+                 screenshot_dir: str = "logs/screenshots",
+                 settle_profile: Optional[str] = None,
+                 network_profile: Optional[str] = None):
         self.headless = headless
-        self.browser: Optional[Browser] = None
+        self.browser: Optional[Browser] = browser
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.playwright = None
-        self.console_logs: List[Dict[str, Any]] = []
+        # Bounded, sequence-numbered console history; readers track their own cursor
+        self.console_logs = ConsoleRingBuffer(settings.CONSOLE_BUFFER_SIZE)
+        self.screenshot_dir = screenshot_dir
+        # A browser passed in is shared with other sessions; we only own our context.
+        self.owns_browser = browser is None
+        # Browser leased from a warm pool (BROWSER_POOL_URL); returned instead of closed
+        self.pool = PoolClient(settings.BROWSER_POOL_URL) if settings.BROWSER_POOL_URL else None
+        self.lease: Optional[Dict[str, Any]] = None
+        # Pacing: "standard"/"fast" wait on page signals, "demo" keeps human-watchable delays
+        self.settler = PageSettler(settle_profile or settings.SETTLE_PROFILE)
+        # Latency spans for browser calls; the agent reads the same object for its phase spans
+        self.metrics = Metrics(enabled=settings.METRICS_ENABLED)
+        # Screenshots are encoded and written in the background into a content-addressed store
+        self.evidence = EvidencePipeline(
+            directory=screenshot_dir,
+            image_format=settings.SCREENSHOT_FORMAT,
+            quality=settings.SCREENSHOT_QUALITY,
+            scale=settings.SCREENSHOT_SCALE,
+            full_page=settings.SCREENSHOT_FULL_PAGE,
+            metrics=self.metrics
+        )
+        # Request interception: "faithful", "text-only" (no images/media/fonts/analytics) or "off"
+        self.router = RequestRouter(
+            profile=network_profile or settings.NETWORK_PROFILE,
+            cache=AssetCache.from_settings(settings),
+            metrics=self.metrics
+        )
 
-    async def start(self):
-        """Start the browser session."""
-        logger.info(f"Starting browser (Headless: {self.headless})")
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(
-            headless=self.headless,
-            slow_mo=500 # Added for visibility during demo
+    @staticmethod
+    async def launch_browser(playwright, headless=False, settle_profile: str = "standard") -> Browser:
+        """Launch a Chromium process. Shared by single sessions and the multi-session runner."""
+        profile = SETTLE_PROFILES.get(settle_profile, SETTLE_PROFILES["standard"])
+        return await playwright.chromium.launch(
+            headless=headless,
+            slow_mo=profile["slow_mo"] # Non-zero only in the demo profile, for visibility
         )
+
+    async def start(self):
+        """Start the browser session (or just an isolated context on a shared browser)."""
+        if self.browser is None:
+            self.playwright = await async_playwright().start()
+            if self.pool:
+                self.browser = await self._attach_pooled()
+            if self.browser is None:
+                logger.info(f"Starting browser (Headless: {self.headless})")
+                self.browser = await self.launch_browser(self.playwright, self.headless, self.settler.profile_name)
+        else:
+            logger.info("Creating isolated context on shared browser")
         self.context = await self.browser.new_context(
             viewport={"width": 1280, "height": 720},
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         )
+        await self.router.attach(self.context)
         self.page = await self.context.new_page()
+        await self.settler.attach(self.context, self.page)
         
         # Capture console logs
         self.page.on("console", self._capture_console)
 
+    async def _attach_pooled(self) -> Optional[Browser]:
+        """Connect to a warm browser from the pool; None falls back to an in-process launch."""
+        with self.metrics.span("browser.pool_attach"):
+            lease = await self.pool.acquire()
+            if lease is None:
+                return None
+            try:
+                # The pool launched the browser, so the settle profile's slow_mo does not apply to it
+                browser = await self.playwright.chromium.connect_over_cdp(lease["cdp"], timeout=5000)
+            except Exception as e:
+                logger.warning(f"Could not attach to pooled browser {lease['browser']}: {e}")
+                await self.pool.release(lease["lease"], healthy=False)
+                return None
+        self.lease = lease
+        logger.info(f"Attached to pooled browser {lease['browser']}")
+        return browser
+
+    async def storage_state(self) -> Dict[str, Any]:
+        """Cookies and localStorage of the session's context."""
+        return await self.context.storage_state()
+
+    async def apply_storage_state(self, state: Dict[str, Any]):
+        """Load a saved storage state into the running context (cookies now, localStorage on first visit)."""
+        if state.get("cookies"):
+            await self.context.add_cookies(state["cookies"])
+        origins = {o["origin"]: o.get("localStorage", []) for o in state.get("origins", []) if o.get("localStorage")}
+        if origins:
+            await self.context.add_init_script(RESTORE_STORAGE_SCRIPT % json.dumps(origins))
+
+    async def clear_storage_state(self):
+        """Drop cookies and the current origin's storage, e.g. after a restored login went stale."""
+        await self.context.clear_cookies()
+        try:
+            await self.page.evaluate("() => { localStorage.clear(); }")
+        except Exception as e:
+            logger.debug(f"Could not clear localStorage: {e}")
+
     async def open(self, url: str):
         """Navigate to a URL with retry logic."""
         if not self.page:
@@ -43,8 +133,9 @@ class PlaywrightManager:
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                await self.page.goto(url, wait_until="domcontentloaded", timeout=60000)
-                await self.page.wait_for_timeout(2000) # Give extra time for hydration
+                with self.metrics.span("browser.navigate"):
+                    await self.page.goto(url, wait_until="domcontentloaded", timeout=60000)
+                await self.settle() # Wait for hydration to finish
                 return
             except Exception as e:
                 logger.warning(f"Navigation attempt {attempt + 1} failed: {e}")
@@ -56,25 +147,35 @@ class PlaywrightManager:
                     logger.error(f"All navigation retries failed for {url}")
                     raise e
     
+    async def settle(self, max_wait_ms: Optional[int] = None) -> Dict[str, Any]:
+        """Wait until network, DOM and animation frames are quiet (bounded by the profile)."""
+        if not self.page:
+            return {"settled": False, "waited_ms": 0}
+        with self.metrics.span("browser.settle"):
+            return await self.settler.settle(self.page, max_wait_ms)
+
+    async def network_report(self) -> Dict[str, Any]:
+        """Requests, blocked requests, cache hits and bytes since the last report; load timings after a navigation."""
+        if not self.page:
+            return {}
+        return await self.router.take_stats(self.page)
+
+    async def step_pause(self):
+        """Idle between agent steps. Only the demo profile pauses."""
+        if self.settler.profile["step_pause"]:
+            await asyncio.sleep(self.settler.profile["step_pause"])
+
     # Alias for backward compatibility with Executor if needed, or we update Executor later
     async def open_url(self, url: str):
         await self.open(url)
 
     async def screenshot(self, name_prefix="step") -> str:
-        """Capture and save a screenshot."""
+        """Capture a screenshot. Returns the final path; the file is written in the background."""
         if not self.page: return ""
         
-        directory = "logs/screenshots"
-        os.makedirs(directory, exist_ok=True)
-        
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{name_prefix}_{timestamp}.png"
-        path = os.path.join(directory, filename)
-        
         try:
-            await self.page.screenshot(path=path)
-            logger.info(f"Screenshot saved: {path}")
-            return path
+            with self.metrics.span("screenshot.capture"):
+                return await self.evidence.capture(self.page, name_prefix)
         except Exception as e:
             logger.error(f"Screenshot failed: {e}")
             return ""
@@ -96,14 +197,42 @@ class PlaywrightManager:
 
     async def close(self):
         """Clean up resources."""
-        if self.context:
-            await self.context.close()
-        if self.browser:
-            await self.browser.close()
-        if self.playwright:
-            await self.playwright.stop()
+        await self.evidence.close()
+        if self.router.cache and self.router.cache.stats["writes"] + self.router.cache.stats["hits"]:
+            logger.info(f"Asset cache stats: {self.router.cache.summary()}")
+        if not self.owns_browser:
+            await self._close_context()
+            logger.info("Session context closed.")
+            return
+        healthy = True
+        try:
+            await self._close_context()
+            if self.browser:
+                # For a pooled browser this only disconnects; the pool keeps it running
+                await self.browser.close()
+        except Exception:
+            healthy = False  # e.g. the pooled browser died mid-session: the pool should recycle it
+            raise
+        finally:
+            # Whatever failed above, the lease goes back now (not at lease_timeout) and the driver stops
+            try:
+                if self.lease:
+                    await self.pool.release(self.lease["lease"], healthy=healthy)
+                    self.lease = None
+            finally:
+                if self.playwright:
+                    await self.playwright.stop()
+                    self.playwright = None
         logger.info("Browser stopped.")
 
+    async def _close_context(self):
+        if self.context:
+            try:
+                await self.context.close()
+            finally:
+                self.context = None
+                self.page = None
+
     # --- Interaction Methods (Preserved for Step 4) ---
 
     async def get_state(self) -> Dict[str, Any]:
@@ -150,6 +279,7 @@ class PlaywrightManager:
                     }}
                 }}""", selector
             )
-            await asyncio.sleep(0.5)
+            if self.settler.profile["highlight_pause"]:
+                await asyncio.sleep(self.settler.profile["highlight_pause"])
         except Exception:
             pass
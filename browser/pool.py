@@ -0,0 +1,378 @@
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional
+
+from loguru import logger
+
+try:
+    import psutil
+except ImportError:  # psutil is optional: without it memory is read from /proc (Linux) or not checked
+    psutil = None
+
+CHROMIUM_ARGS = [
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-sync",
+    "--metrics-recording-only",
+    "--mute-audio"
+]
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _tree_rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process and all its children (Chromium spawns one per renderer)."""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in procs if p.is_running()) / (1024 * 1024)
+        except psutil.Error:
+            return None
+    if not os.path.isdir("/proc"):
+        return None
+    children: Dict[int, list] = {}
+    rss_pages: Dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        rss_pages[int(entry)] = int(fields[21])
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += rss_pages.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+class BrowserPool:
+    """
+    The Warm Bench: A long-lived local process that keeps Chromium instances launched and idle,
+    so a session attaches over CDP instead of paying for a cold browser start.
+    Each browser is leased to one session at a time. Browsers are health-checked while idle
+    and recycled after `max_sessions` leases, above `max_rss_mb`, when they stop answering,
+    or when a lease is never returned.
+    Control endpoint (JSON over HTTP): POST /acquire, POST /release, GET /health.
+    """
+    def __init__(self,
+                 size: int = 2,
+                 host: str = "127.0.0.1",
+                 port: int = 9300,
+                 headless: bool = True,
+                 max_sessions: int = 50,
+                 max_rss_mb: float = 1500,
+                 health_interval: float = 10.0,
+                 lease_timeout: float = 1800.0,
+                 executable: Optional[str] = None):
+        self.size = max(1, size)
+        self.host = host
+        self.port = port
+        self.headless = headless
+        self.max_sessions = max_sessions
+        self.max_rss_mb = max_rss_mb
+        self.health_interval = health_interval
+        self.lease_timeout = lease_timeout
+        self.executable = executable
+        # browser id -> {"proc", "port", "cdp", "profile", "sessions", "lease", "leased_at", "started"}
+        self.browsers: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"launched": 0, "recycled": 0, "leases": 0, "misses": 0, "unhealthy": 0}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._topping_up = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @classmethod
+    def from_settings(cls, settings) -> "BrowserPool":
+        return cls(
+            size=settings.BROWSER_POOL_SIZE,
+            port=settings.BROWSER_POOL_PORT,
+            headless=settings.BROWSER_POOL_HEADLESS,
+            max_sessions=settings.BROWSER_POOL_MAX_SESSIONS,
+            max_rss_mb=settings.BROWSER_POOL_MAX_RSS_MB
+        )
+
+    # --- Browser Processes ---
+
+    def _executable(self) -> str:
+        if not self.executable:
+            # The Chromium build Playwright installed, so attached sessions see the same browser
+            from playwright.sync_api import sync_playwright
+            with sync_playwright() as playwright:
+                self.executable = playwright.chromium.executable_path
+        return self.executable
+
+    def _launch(self) -> Dict[str, Any]:
+        port = _free_port()
+        profile = tempfile.mkdtemp(prefix="aurick-pool-")
+        args = [self._executable(), f"--remote-debugging-port={port}", f"--user-data-dir={profile}", *CHROMIUM_ARGS]
+        if self.headless:
+            args.append("--headless=new")
+        proc = subprocess.Popen(args + ["about:blank"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        cdp = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 15
+        while not self._responds(cdp):
+            if proc.poll() is not None or time.monotonic() > deadline:
+                proc.kill()
+                shutil.rmtree(profile, ignore_errors=True)
+                raise RuntimeError(f"Chromium did not come up on port {port}")
+            time.sleep(0.05)
+        self.stats["launched"] += 1
+        return {"proc": proc, "port": port, "cdp": cdp, "profile": profile,
+                "sessions": 0, "lease": None, "leased_at": None, "started": time.time()}
+
+    @staticmethod
+    def _responds(cdp: str, timeout: float = 1.0) -> bool:
+        try:
+            with urllib.request.urlopen(f"{cdp}/json/version", timeout=timeout) as response:
+                return response.status == 200
+        except Exception:
+            return False
+
+    def _kill(self, browser: Dict[str, Any]):
+        proc = browser["proc"]
+        if proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        shutil.rmtree(browser["profile"], ignore_errors=True)
+
+    def _add(self):
+        try:
+            browser = self._launch()
+        except Exception as e:
+            logger.error(f"Pool failed to launch a browser: {e}")
+            return
+        with self._lock:
+            self.browsers[uuid.uuid4().hex[:8]] = browser
+
+    def _recycle(self, browser_id: str, reason: str, lease: Optional[str] = None) -> bool:
+        """
+        Kill a browser whose health was judged outside the lock. `lease` is the lease it had
+        then (None: idle); if it has changed since, a session now holds it and it is kept.
+        """
+        with self._lock:
+            browser = self.browsers.get(browser_id)
+            if browser is None or browser["lease"] != lease:
+                return False
+            del self.browsers[browser_id]
+        self.stats["recycled"] += 1
+        logger.info(f"Recycling pooled browser {browser_id} ({reason}, {browser['sessions']} sessions)")
+        self._kill(browser)
+        return True
+
+    def _idle(self) -> int:
+        return sum(1 for b in self.browsers.values() if b["lease"] is None)
+
+    # --- Leases ---
+
+    def acquire(self) -> Optional[Dict[str, Any]]:
+        """Lease an idle browser; None when all are busy (the client then launches its own)."""
+        with self._lock:
+            for browser_id, browser in self.browsers.items():
+                if browser["lease"] is None and browser["proc"].poll() is None:
+                    browser["lease"] = uuid.uuid4().hex
+                    browser["leased_at"] = time.monotonic()
+                    self.stats["leases"] += 1
+                    lease = {"lease": browser["lease"], "browser": browser_id, "cdp": browser["cdp"]}
+                    break
+            else:
+                self.stats["misses"] += 1
+                lease = None
+        # Refill in the background so the next acquire finds a warm browser again
+        threading.Thread(target=self._top_up, daemon=True).start()
+        return lease
+
+    def release(self, lease: str, healthy: bool = True) -> bool:
+        with self._lock:
+            match = next(((i, b) for i, b in self.browsers.items() if b["lease"] == lease), None)
+            if match is None:
+                return False
+            browser_id, browser = match
+            browser["sessions"] += 1
+        # Judged while still leased, so acquire() cannot hand out a browser that is about to be killed
+        reason = self._recycle_reason(browser, healthy)
+        if reason and self._recycle(browser_id, reason, lease=lease):
+            threading.Thread(target=self._top_up, daemon=True).start()
+            return True
+        with self._lock:
+            if browser["lease"] == lease:
+                browser["lease"] = None
+                browser["leased_at"] = None
+        return True
+
+    def _recycle_reason(self, browser: Dict[str, Any], healthy: bool = True) -> Optional[str]:
+        if not healthy:
+            return "reported unhealthy"
+        if browser["proc"].poll() is not None:
+            return "process exited"
+        if browser["sessions"] >= self.max_sessions:
+            return "session limit"
+        rss = _tree_rss_mb(browser["proc"].pid)
+        if rss is not None and rss > self.max_rss_mb:
+            return f"{rss:.0f} MB resident"
+        return None
+
+    # --- Maintenance ---
+
+    def _top_up(self):
+        """Launch browsers until `size` are idle (never while stopping)."""
+        if not self._topping_up.acquire(blocking=False):
+            return  # another top-up is already running and re-checks after every launch
+        try:
+            while not self._stopping.is_set():
+                with self._lock:
+                    missing = self.size - self._idle()
+                if missing <= 0:
+                    return
+                self._add()
+        finally:
+            self._topping_up.release()
+
+    def _check(self):
+        """Health pass: idle browsers must answer CDP; leases past the timeout are reclaimed."""
+        with self._lock:
+            snapshot = [(i, b, b["lease"], b["leased_at"]) for i, b in self.browsers.items()]
+        for browser_id, browser, lease, leased_at in snapshot:
+            if lease is not None:
+                if time.monotonic() - leased_at > self.lease_timeout:
+                    self._recycle(browser_id, "lease never returned", lease=lease)
+                continue
+            # The probes below take up to seconds; _recycle skips the browser if it got leased meanwhile
+            reason = self._recycle_reason(browser)
+            if reason is None and not self._responds(browser["cdp"], timeout=2.0):
+                reason = "not answering"
+            if reason and self._recycle(browser_id, reason):
+                self.stats["unhealthy"] += 1
+        self._top_up()
+
+    def _maintain(self):
+        while not self._stopping.wait(self.health_interval):
+            try:
+                self._check()
+            except Exception as e:
+                logger.error(f"Pool health check failed: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            browsers = {
+                browser_id: {
+                    "leased": b["lease"] is not None,
+                    "sessions": b["sessions"],
+                    "uptime_s": round(time.time() - b["started"], 1),
+                    "alive": b["proc"].poll() is None
+                }
+                for browser_id, b in self.browsers.items()
+            }
+        return {"size": self.size, "idle": sum(1 for b in browsers.values() if not b["leased"]),
+                "browsers": browsers, "stats": dict(self.stats)}
+
+    # --- Control Endpoint ---
+
+    def serve_forever(self):
+        """Warm up, then serve leases until interrupted."""
+        self._top_up()
+        threading.Thread(target=self._maintain, daemon=True).start()
+        self._server = ThreadingHTTPServer((self.host, self.port), _PoolHandler)
+        self._server.pool = self
+        logger.info(f"Browser pool ready on http://{self.host}:{self.port} with {len(self.browsers)} warm browsers")
+        try:
+            self._server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        self._stopping.set()
+        if self._server is not None:
+            self._server.server_close()
+        with self._lock:
+            browsers = list(self.browsers.values())
+            self.browsers.clear()
+        for browser in browsers:
+            self._kill(browser)
+        logger.info(f"Browser pool stopped: {self.stats}")
+
+class _PoolHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, self.server.pool.status())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        pool: BrowserPool = self.server.pool
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/acquire":
+            lease = pool.acquire()
+            self._send_json(200 if lease else 503, lease or {"error": "no idle browser"})
+        elif self.path == "/release":
+            released = pool.release(request.get("lease", ""), healthy=request.get("healthy", True))
+            self._send_json(200 if released else 404, {"released": released})
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+class PoolClient:
+    """Client side of the pool's control endpoint; every failure means "launch locally instead"."""
+    def __init__(self, url: str, timeout: float = 2.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        # Plain urllib on purpose: an HTTP client with TLS setup would cost more than the attach itself
+        request = urllib.request.Request(
+            f"{self.url}{path}",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read() or b"{}")
+
+    async def acquire(self) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.to_thread(self._post, "/acquire", {})
+        except urllib.error.HTTPError as e:
+            logger.info(f"Browser pool has no idle browser ({e.code})")
+        except Exception as e:
+            logger.info(f"Browser pool at {self.url} unavailable: {e}")
+        return None
+
+    async def release(self, lease: str, healthy: bool = True):
+        try:
+            await asyncio.to_thread(self._post, "/release", {"lease": lease, "healthy": healthy})
+        except Exception as e:
+            # The pool reclaims leases that are never returned
+            logger.warning(f"Failed to return browser lease to the pool: {e}")
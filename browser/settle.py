@@ -0,0 +1,167 @@
+import asyncio
+from typing import Dict, Any, Optional
+from loguru import logger
+
+# Pacing profiles. "standard" and "fast" wait on real page signals only;
+# "demo" keeps the original fixed delays so a human can follow along.
+SETTLE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "fast": {
+        "slow_mo": 0,            # ms Playwright adds to every browser command
+        "max_wait_ms": 3000,     # hard upper bound for one settle
+        "network_idle_ms": 250,  # no requests in flight for this long
+        "dom_quiet_ms": 100,     # no DOM mutations for this long
+        "min_wait_ms": 0,        # fixed delay before signal checks
+        "highlight_pause": 0.0,  # seconds to hold an element highlight
+        "step_pause": 0.0        # seconds to idle between agent steps
+    },
+    "standard": {
+        "slow_mo": 0,
+        "max_wait_ms": 8000,
+        "network_idle_ms": 500,
+        "dom_quiet_ms": 300,
+        "min_wait_ms": 0,
+        "highlight_pause": 0.0,
+        "step_pause": 0.0
+    },
+    "demo": {
+        "slow_mo": 500,
+        "max_wait_ms": 10000,
+        "network_idle_ms": 500,
+        "dom_quiet_ms": 300,
+        "min_wait_ms": 2000,
+        "highlight_pause": 0.5,
+        "step_pause": 2.0
+    }
+}
+
+# Extra time the bounded settle evaluate allows beyond the settle deadline
+SETTLE_EVALUATE_SLACK_S = 0.25
+
+# Installed into every document of the context. Records the time of the last DOM
+# mutation so settle checks only need to read one number.
+MUTATION_TRACKER_SCRIPT = """
+(() => {
+    if (window.__aurickMutations) return;
+    window.__aurickMutations = { last: performance.now() };
+    const start = () => {
+        new MutationObserver(() => { window.__aurickMutations.last = performance.now(); })
+            .observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+    };
+    if (document.documentElement) start();
+    else document.addEventListener('readystatechange', start, { once: true });
+})();
+"""
+
+# Resolves once the DOM has been quiet for `quietMs` and two animation frames have
+# run (so pending rAF callbacks are flushed), or when `timeoutMs` is reached.
+# Hidden tabs get no animation frames, so there a timer stands in for them.
+DOM_QUIET_SCRIPT = """
+([quietMs, timeoutMs]) => new Promise(resolve => {
+    const started = performance.now();
+    if (!window.__aurickMutations) {
+        window.__aurickMutations = { last: started };
+        new MutationObserver(() => { window.__aurickMutations.last = performance.now(); })
+            .observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+    }
+    const hidden = () => document.visibilityState === 'hidden';
+    const check = () => {
+        const now = performance.now();
+        if (now - window.__aurickMutations.last >= quietMs) {
+            if (hidden()) setTimeout(() => resolve(true), 0);
+            else requestAnimationFrame(() => requestAnimationFrame(() => resolve(true)));
+        } else if (now - started >= timeoutMs) {
+            resolve(false);
+        } else {
+            setTimeout(check, Math.min(50, quietMs));
+        }
+    };
+    // rAF does not fire in background tabs; fall back to timers there.
+    if (hidden()) { check(); return; }
+    requestAnimationFrame(check);
+})
+"""
+
+class PageSettler:
+    """
+    Waits for a page to settle on real signals instead of fixed sleeps:
+    network quiescence, DOM mutation quiescence and pending animation frames.
+    """
+    def __init__(self, profile: str = "standard"):
+        if profile not in SETTLE_PROFILES:
+            logger.warning(f"Unknown settle profile '{profile}', using 'standard'.")
+            profile = "standard"
+        self.profile_name = profile
+        self.profile = SETTLE_PROFILES[profile]
+        self.inflight = 0
+        self._last_network_activity = 0.0
+
+    async def attach(self, context, page):
+        """Install the mutation tracker and start counting in-flight requests."""
+        await context.add_init_script(MUTATION_TRACKER_SCRIPT)
+        page.on("request", self._on_request_start)
+        page.on("requestfinished", self._on_request_end)
+        page.on("requestfailed", self._on_request_end)
+
+    def _now(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    def _on_request_start(self, request):
+        self.inflight += 1
+        self._last_network_activity = self._now()
+
+    def _on_request_end(self, request):
+        self.inflight = max(0, self.inflight - 1)
+        self._last_network_activity = self._now()
+
+    async def _wait_network_idle(self, deadline: float) -> bool:
+        idle_s = self.profile["network_idle_ms"] / 1000
+        while self._now() < deadline:
+            if self.inflight == 0 and self._now() - self._last_network_activity >= idle_s:
+                return True
+            await asyncio.sleep(0.025)
+        return False
+
+    async def settle(self, page, max_wait_ms: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Block until the page is quiet or the profile's upper bound is reached.
+        Returns what was observed so callers can log slow pages.
+        """
+        started = self._now()
+        budget_ms = max_wait_ms if max_wait_ms is not None else self.profile["max_wait_ms"]
+        deadline = started + budget_ms / 1000
+
+        if self.profile["min_wait_ms"]:
+            await page.wait_for_timeout(self.profile["min_wait_ms"])
+
+        network_idle = dom_quiet = False
+        while self._now() < deadline:
+            network_idle = await self._wait_network_idle(deadline)
+            remaining = max(0.0, deadline - self._now())
+            try:
+                # The script times itself out at the deadline; the outer bound covers a page
+                # that never answers. The slack lets the script's own answer normally win.
+                dom_quiet = await asyncio.wait_for(
+                    page.evaluate(DOM_QUIET_SCRIPT, [self.profile["dom_quiet_ms"], int(remaining * 1000)]),
+                    timeout=remaining + SETTLE_EVALUATE_SLACK_S
+                )
+            except asyncio.TimeoutError:
+                dom_quiet = False
+                break
+            except Exception as e:
+                dom_quiet = False
+                if page.is_closed():
+                    logger.debug(f"Settle check stopped, page closed: {e}")
+                    break
+                # Navigation during the check destroys the execution context: poll the new document
+                logger.debug(f"Settle check interrupted, retrying: {e}")
+                await asyncio.sleep(0.05)
+                continue
+            # DOM changes may have kicked off new requests; only stop when both are quiet.
+            if network_idle and dom_quiet and self.inflight == 0:
+                break
+
+        waited_ms = int((self._now() - started) * 1000)
+        settled = network_idle and dom_quiet
+        if not settled:
+            logger.info(f"Page not fully settled after {waited_ms}ms (network idle: {network_idle}, DOM quiet: {dom_quiet})")
+        return {"settled": settled, "waited_ms": waited_ms}
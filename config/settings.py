@@ -9,5 +9,100 @@ class Settings:
     HEADLESS = os.getenv("HEADLESS", "false").lower() == "true"
     DEFAULT_MODEL = "llama-3.3-70b-versatile"
     MAX_STEPS = int(os.getenv("MAX_STEPS", 10))
+    # Page settle profile: "standard", "fast" (headless fleets) or "demo" (slow, watchable)
+    SETTLE_PROFILE = os.getenv("SETTLE_PROFILE", "standard")
+    CONSOLE_BUFFER_SIZE = int(os.getenv("CONSOLE_BUFFER_SIZE", 500))
+    # Request interception: "faithful", "text-only" (blocks images/media/fonts/analytics) or "off"
+    NETWORK_PROFILE = os.getenv("NETWORK_PROFILE", "faithful")
+    # Static assets (scripts, styles, ...) kept on disk across sessions and revalidated with ETag/Last-Modified.
+    # Opt-in: serving them routes every request through Python instead of Chromium's HTTP cache
+    ASSET_CACHE_ENABLED = os.getenv("ASSET_CACHE_ENABLED", "false").lower() == "true"
+    ASSET_CACHE_DIR = os.getenv("ASSET_CACHE_DIR", "logs/asset_cache")
+    ASSET_CACHE_MAX_MB = int(os.getenv("ASSET_CACHE_MAX_MB", 200))
+
+    # Latency spans per phase / browser call / LLM call, and optional Prometheus text export
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_EXPORT = os.getenv("METRICS_EXPORT", "false").lower() == "true"
+
+    # Observation backend: "dom" (DOM walk) or "ax" (accessibility tree via CDP, Chromium only)
+    OBSERVER_MODE = os.getenv("OBSERVER_MODE", "dom")
+    # Re-read only the regions changed since the last step (DOM observer); full snapshot after this many deltas
+    OBSERVATION_INCREMENTAL = os.getenv("OBSERVATION_INCREMENTAL", "false").lower() == "true"
+    OBSERVATION_DELTA_MAX_CHAIN = int(os.getenv("OBSERVATION_DELTA_MAX_CHAIN", 5))
+    # Observation safety caps and the hard token budget for one reasoning prompt
+    OBSERVATION_MAX_ELEMENTS = int(os.getenv("OBSERVATION_MAX_ELEMENTS", 200))
+    OBSERVATION_MAX_TEXT = int(os.getenv("OBSERVATION_MAX_TEXT", 8000))
+    PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 1800))
+    # Share of that budget reserved for the rolling step history, and steps kept verbatim
+    HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 300))
+    HISTORY_RECENT_STEPS = int(os.getenv("HISTORY_RECENT_STEPS", 3))
+
+    # Session journal: steps kept in RAM and steps per fsync
+    MEMORY_WINDOW = int(os.getenv("MEMORY_WINDOW", 20))
+    JOURNAL_FSYNC_EVERY = int(os.getenv("JOURNAL_FSYNC_EVERY", 5))
+    # Run issue analysis and journaling of a step in the background, at most this many steps behind
+    PIPELINED_STEPS = os.getenv("PIPELINED_STEPS", "true").lower() == "true"
+    PIPELINE_MAX_PENDING = int(os.getenv("PIPELINE_MAX_PENDING", 4))
+    # Most actions one decision may run in a burst (next_action + follow_up_actions)
+    PLAN_MAX_ACTIONS = int(os.getenv("PLAN_MAX_ACTIONS", 4))
+
+    # Screenshot evidence: jpeg/png natively, webp and SCREENSHOT_SCALE < 1 need Pillow
+    SCREENSHOT_FORMAT = os.getenv("SCREENSHOT_FORMAT", "jpeg")
+    SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY", 70))
+    SCREENSHOT_SCALE = float(os.getenv("SCREENSHOT_SCALE", 1.0))
+    SCREENSHOT_FULL_PAGE = os.getenv("SCREENSHOT_FULL_PAGE", "false").lower() == "true"
+    # Warm browser pool (python run_pool.py); sessions attach to it when BROWSER_POOL_URL is set
+    BROWSER_POOL_URL = os.getenv("BROWSER_POOL_URL")
+    BROWSER_POOL_PORT = int(os.getenv("BROWSER_POOL_PORT", 9300))
+    BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", 2))
+    BROWSER_POOL_MAX_SESSIONS = int(os.getenv("BROWSER_POOL_MAX_SESSIONS", 50))
+    BROWSER_POOL_MAX_RSS_MB = int(os.getenv("BROWSER_POOL_MAX_RSS_MB", 1500))
+    # Pools usually run on display-less servers, so they are headless unless asked otherwise (not HEADLESS)
+    BROWSER_POOL_HEADLESS = os.getenv("BROWSER_POOL_HEADLESS", "true").lower() == "true"
+    SWEEP_CONCURRENCY = int(os.getenv("SWEEP_CONCURRENCY", 4))
+    # Worker processes for sweeps (each with its own browser and SWEEP_CONCURRENCY sessions); 0 = one per CPU core
+    SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", 1))
+
+    # Shared LLM admission queue: provider limits (split between sweep workers), adaptive concurrency and retries
+    LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "true").lower() == "true"
+    LLM_RPM = float(os.getenv("LLM_RPM", 30))
+    LLM_TPM = float(os.getenv("LLM_TPM", 12000))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 5))
+    LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", 1.0))
+    LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", 60.0))
+    # Completion tokens charged to the TPM bucket on top of the prompt estimate
+    LLM_COMPLETION_TOKENS = int(os.getenv("LLM_COMPLETION_TOKENS", 300))
+
+    # Fingerprinted issue history (first/last seen, counts) shared by all sessions and runs
+    ISSUE_STORE_ENABLED = os.getenv("ISSUE_STORE_ENABLED", "true").lower() == "true"
+    ISSUE_STORE_PATH = os.getenv("ISSUE_STORE_PATH", "logs/issues.db")
+
+    # Fast-path rules checked before the LLM; a JSON file replaces the built-in rule set
+    FAST_PATH_RULES = os.getenv("FAST_PATH_RULES", "true").lower() == "true"
+    FAST_PATH_RULES_FILE = os.getenv("FAST_PATH_RULES_FILE")
+    # Test credentials used by the login rule
+    TEST_USERNAME = os.getenv("TEST_USERNAME", "standard_user")
+    TEST_PASSWORD = os.getenv("TEST_PASSWORD", "secret_sauce")
+
+    # Authenticated storage state (cookies, localStorage) per origin and credential profile, reused across sessions
+    AUTH_STATE_ENABLED = os.getenv("AUTH_STATE_ENABLED", "true").lower() == "true"
+    AUTH_STATE_DIR = os.getenv("AUTH_STATE_DIR", "logs/auth_state")
+    AUTH_STATE_TTL = float(os.getenv("AUTH_STATE_TTL", 12 * 3600))
+    AUTH_PROFILE = os.getenv("AUTH_PROFILE")  # defaults to TEST_USERNAME
+
+    # Exploration state graph: one file per site, untried actions replace ones repeated this often
+    EXPLORATION_ENABLED = os.getenv("EXPLORATION_ENABLED", "true").lower() == "true"
+    EXPLORE_DIR = os.getenv("EXPLORE_DIR", "logs/explore")
+    EXPLORE_MAX_REPEATS = int(os.getenv("EXPLORE_MAX_REPEATS", 2))
+    EXPLORE_MAX_STATES = int(os.getenv("EXPLORE_MAX_STATES", 2000))  # per site graph; least recently seen states are dropped
+
+    # Decision cache (set DECISION_CACHE_BYPASS=true for exploratory runs)
+    DECISION_CACHE_ENABLED = os.getenv("DECISION_CACHE_ENABLED", "true").lower() == "true"
+    DECISION_CACHE_BYPASS = os.getenv("DECISION_CACHE_BYPASS", "false").lower() == "true"
+    DECISION_CACHE_DIR = os.getenv("DECISION_CACHE_DIR", "logs/decision_cache")
+    DECISION_CACHE_TTL = float(os.getenv("DECISION_CACHE_TTL", 7 * 24 * 3600))
+    DECISION_CACHE_MAX_MB = int(os.getenv("DECISION_CACHE_MAX_MB", 50))
+    DECISION_CACHE_MEMORY_ENTRIES = int(os.getenv("DECISION_CACHE_MEMORY_ENTRIES", 256))
 
 settings = Settings()
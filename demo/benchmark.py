@@ -0,0 +1,240 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+# Ensure root is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.playwright_manager import PlaywrightManager
+from agent.agent import AurickLiteAgent
+from agent.decision_cache import DecisionCache
+from agent.issue_store import IssueStore
+from llm.scripted_client import ScriptedLLM
+from demo.fixture_server import FixtureServer
+from config.settings import settings
+
+# Offline benchmark: local fixture sites + a scripted LLM stand-in, machine-readable output.
+# Usage: python demo/benchmark.py [--latency 0.3] [--scenario login] [--out bench.json]
+
+def act(action_type, target="", value="", then=None):
+    decision = {
+        "page_summary": "scripted",
+        "confidence": 1.0,
+        "next_action": {"type": action_type, "target_description": target, "input_value": value, "reason": "benchmark script"},
+        "potential_issues": []
+    }
+    if then:
+        decision["follow_up_actions"] = [follow_up["next_action"] for follow_up in then]
+    return decision
+
+SCENARIOS = {
+    "login": {
+        "path": "login.html",
+        "script": {
+            "login.html": [act("type", "username", "standard_user"), act("type", "password", "secret_sauce"), act("click", "login")],
+            "inventory.html": [act("click", "add to cart"), act("click", "add to cart"), act("click", "cart")],
+            "cart.html": [act("stop")]
+        }
+    },
+    # Same flow, but each page's obvious actions come back as one multi-action decision
+    "login_burst": {
+        "path": "login.html",
+        "script": {
+            "login.html": [act("type", "username", "standard_user", then=[act("type", "password", "secret_sauce"), act("click", "login")])],
+            "inventory.html": [act("click", "add to cart", then=[act("click", "add to cart"), act("click", "cart")])],
+            "cart.html": [act("stop")]
+        }
+    },
+    # A reasoner stuck going back and forth; the exploration graph should break the cycle
+    "ping_pong": {
+        "path": "inventory.html",
+        "script": {
+            "inventory.html": [act("click", "cart")] * 6,
+            "cart.html": [act("click", "continue shopping")] * 6
+        }
+    },
+    # Dead end: the empty_cart_dead_end rule stops the session and must report why
+    "empty_cart": {
+        "path": "empty_cart.html",
+        "script": {},
+        "expect_issues": ["Empty cart page offers no way back to the products"]
+    },
+    "catalog_5000": {
+        "path": "catalog.html?links=5000",
+        "script": {"catalog.html": [act("click", "next page"), act("click", "next page"), act("stop")]}
+    },
+    "slow_hydration": {
+        "path": "hydrate.html?delay=800",
+        "script": {"hydrate.html": [act("click", "load more"), act("click", "hydrated product 3"), act("stop")]}
+    },
+    "console_noise": {
+        "path": "console.html",
+        "script": {"console.html": [act("click", "trigger errors"), act("click", "reload dashboard"), act("click", "trigger errors"), act("stop")]}
+    }
+}
+
+class RssSampler:
+    """Tracks peak resident memory of this process plus its descendants (the browser) via /proc."""
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.peak_total_kb = 0
+        self._task = None
+
+    @staticmethod
+    def _rss_kb(pid):
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            pass
+        return 0
+
+    def _tree_rss_kb(self):
+        children = defaultdict(list)
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    with open(f"/proc/{entry}/stat") as f:
+                        ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+                    children[ppid].append(int(entry))
+                except (FileNotFoundError, ProcessLookupError, IndexError, ValueError):
+                    pass
+        total, stack = 0, [os.getpid()]
+        while stack:
+            pid = stack.pop()
+            total += self._rss_kb(pid)
+            stack.extend(children.get(pid, []))
+        return total
+
+    async def _run(self):
+        while True:
+            self.peak_total_kb = max(self.peak_total_kb, self._tree_rss_kb())
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if os.path.isdir("/proc"):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+async def run_scenario(name, scenario, server, latency, work_dir):
+    llm = ScriptedLLM(scenario["script"], latency=latency)
+    session_dir = os.path.join(work_dir, name)
+    settings.EXPLORE_DIR = os.path.join(session_dir, "explore")  # every scenario starts with an empty graph
+    browser = PlaywrightManager(
+        headless=True,
+        screenshot_dir=os.path.join(session_dir, "screenshots"),
+        settle_profile="fast"
+    )
+    agent = AurickLiteAgent(
+        browser=browser,
+        groq=llm,
+        decision_cache=DecisionCache(cache_dir=os.path.join(work_dir, "cache"), bypass=True),
+        # A throwaway store: benchmark issues must not land in the real logs/issues.db history
+        issue_store=IssueStore(os.path.join(work_dir, "issues.db"), run=name),
+        log_dir=session_dir
+    )
+
+    # Built-in spans: phases, browser calls, LLM calls and screenshot writes
+    agent.metrics.enabled = True
+
+    await browser.start()
+    started = time.perf_counter()
+    try:
+        await agent.run(server.url(scenario["path"]), max_steps=20)
+    finally:
+        wall = time.perf_counter() - started
+        await browser.close()
+
+    steps = agent.memory.step_count
+    reported = [issue.get("description") for step in agent.memory.get_history() for issue in step.get("issues", [])]
+    if agent.rules:
+        # Without rules the scripted LLM only says stop, so the expectation belongs to the rule
+        for expected in scenario.get("expect_issues", []):
+            assert expected in reported, f"{name}: expected issue '{expected}' was not recorded (got {reported})"
+    return {
+        "scenario": name,
+        "steps": steps,
+        "llm_calls": llm.calls,
+        "issues": agent.memory.issue_count,
+        "wall_s": round(wall, 3),
+        "steps_per_sec": round(steps / wall, 3) if wall else 0.0,
+        "rules": agent.rules.summary() if agent.rules else None,
+        "coverage": agent.explorer.coverage() if agent.explorer else None,
+        "spans": agent.metrics.summary()
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description="Offline Aurick-Lite benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated LLM latency in seconds")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--out", help="write the JSON report here (default logs/bench/bench_<commit>_<ts>.json)")
+    parser.add_argument("--no-rules", action="store_true", help="send every page to the (scripted) LLM, no fast-path rules")
+    parser.add_argument("--no-explore", action="store_true", help="disable the exploration graph (no loop breaking)")
+    args = parser.parse_args()
+    if args.no_rules:
+        settings.FAST_PATH_RULES = False
+    if args.no_explore:
+        settings.EXPLORATION_ENABLED = False
+
+    names = args.scenario or list(SCENARIOS)
+    sampler = RssSampler()
+    sampler.start()
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix="aurick_bench_") as work_dir, FixtureServer() as server:
+        for name in names:
+            results.append(await run_scenario(name, SCENARIOS[name], server, args.latency, work_dir))
+    await sampler.stop()
+
+    total_steps = sum(r["steps"] for r in results)
+    total_wall = sum(r["wall_s"] for r in results)
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "llm_latency_s": args.latency,
+        "fast_path_rules": not args.no_rules,
+        "exploration": not args.no_explore,
+        "steps": total_steps,
+        "steps_per_sec": round(total_steps / total_wall, 3) if total_wall else 0.0,
+        "peak_rss_mb": {
+            "python": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "python_and_browser": round(sampler.peak_total_kb / 1024, 1)
+        },
+        "scenarios": results
+    }
+
+    out = args.out or os.path.join("logs", "bench", f"bench_{commit}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    print(f"Report written to {out}", file=sys.stderr)
+
+if __name__ == "__main__":
+    asyncio.run(main())
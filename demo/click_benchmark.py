@@ -0,0 +1,56 @@
+import asyncio
+import os
+import sys
+import time
+
+# Ensure root is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.playwright_manager import PlaywrightManager
+from agent.resolver import ElementResolver
+from demo.fixture_server import FixtureServer
+
+# The footer link sits after every product card, the worst case for a linear walk.
+TARGET = "about us"
+SIZES = [10, 100, 300, 1000]
+
+async def legacy_resolve(page, description):
+    """The previous heuristic: one inner_text round trip per button, then per link."""
+    for selector in ["button", "a"]:
+        elements = page.locator(selector)
+        count = await elements.count()
+        for i in range(count):
+            text = (await elements.nth(i).inner_text()).lower()
+            if text and (description in text or text in description):
+                return elements.nth(i)
+    return None
+
+async def indexed_resolve(page, description, resolver):
+    candidates = await resolver.candidates(page, "click")
+    match = resolver.match_click(description, candidates)
+    return resolver.locator(page, match) if match else None
+
+async def timed(fn):
+    start = time.perf_counter()
+    await fn()
+    return (time.perf_counter() - start) * 1000
+
+async def benchmark():
+    browser = PlaywrightManager(headless=True)
+    await browser.start()
+    resolver = ElementResolver()
+
+    try:
+        with FixtureServer() as server:
+            print(f"{'items':>6} {'before ms':>10} {'after ms':>10}")
+            for size in SIZES:
+                await browser.open(server.url(f"spa.html?items={size}"))
+                page = browser.page
+                before = await timed(lambda: legacy_resolve(page, TARGET))
+                after = await timed(lambda: indexed_resolve(page, TARGET, resolver))
+                print(f"{size:>6} {before:>10.1f} {after:>10.1f}")
+    finally:
+        await browser.close()
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
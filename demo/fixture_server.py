@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+import time
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def _catalog_page(links: int, page: int) -> str:
+    """Server-rendered catalog with `links` product links and a pager at the very end."""
+    rows = "".join(
+        f'<li><a href="/product.html?sku={page}-{i}">Catalog entry {page}-{i:05d}</a></li>'
+        for i in range(links)
+    )
+    return (
+        f"<!DOCTYPE html><html><head><title>Fixture Catalog page {page}</title></head><body>"
+        f"<h2>Catalog</h2><ul>{rows}</ul>"
+        f'<a href="/catalog.html?links={links}&page={page + 1}">Next page</a>'
+        "</body></html>"
+    )
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler that does not print a line per request, plus a few dynamic fixtures."""
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body: str, content_type: str):
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        if parts.path == "/catalog.html":
+            links = int(query.get("links", ["5000"])[0])
+            page = int(query.get("page", ["1"])[0])
+            self._send(_catalog_page(links, page), "text/html; charset=utf-8")
+        elif parts.path == "/api/products":
+            time.sleep(int(query.get("delay", ["800"])[0]) / 1000)
+            self._send(json.dumps([f"Hydrated product {i}" for i in range(200)]), "application/json")
+        else:
+            super().do_GET()
+
+class FixtureServer:
+    """
+    Serves the local fixture pages on 127.0.0.1 from a background thread.
+    Usable as a context manager so demos and benchmarks never touch the internet.
+    """
+    def __init__(self, directory: str = FIXTURES_DIR, port: int = 0):
+        handler = partial(_QuietHandler, directory=directory)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import os
+import sys
+
+# Ensure root is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.history import HistoryCompressor
+from agent.reasoner import PageReasoner
+from llm.prompt_encoder import estimate_tokens
+from config.settings import settings
+
+# A long synthetic session: many distinct pages and actions, some repeated, some failing
+STEPS = 120
+PAGES = [f"https://shop.example.com/{section}/{i}" for section in ("item", "category", "help") for i in range(15)]
+
+class RecordingLLM:
+    """Stands in for GroqLLM: answers every step and keeps the prompts it was sent."""
+    model = "recording"
+
+    def __init__(self):
+        self.prompts = []
+
+    async def achat(self, messages):
+        self.prompts.append(messages)
+        return json.dumps({"page_summary": "synthetic", "confidence": 1.0, "potential_issues": [],
+                           "next_action": {"type": "click", "target_description": "next", "reason": "explore"}})
+
+def synthetic_step(step):
+    url = PAGES[(step * 7) % len(PAGES)]
+    status = "error" if step % 9 == 0 else "success"
+    return {
+        "step": step,
+        "url": url,
+        "plan": {"type": "click", "target_description": f"Product card number {step % 23} with a long label"},
+        "result": {"status": status, "details": "Timeout 5000ms exceeded waiting for locator" if status == "error" else ""}
+    }
+
+def observation(step):
+    return {
+        "url": PAGES[(step * 7) % len(PAGES)],
+        "title": f"Page {step}",
+        "visible_text_summary": "Lorem ipsum dolor sit amet. " * 40,
+        "interactive_elements": {
+            "buttons": [{"text": f"Button {i}"} for i in range(10)],
+            "links": [{"text": f"Link {i}", "href": f"/item/{i}"} for i in range(20)],
+            "inputs": [{"type": "text", "placeholder": "Search"}]
+        }
+    }
+
+async def test():
+    budget = settings.HISTORY_TOKEN_BUDGET
+    history = HistoryCompressor(recent=settings.HISTORY_RECENT_STEPS, budget=budget)
+    llm = RecordingLLM()
+    reasoner = PageReasoner(llm)
+    history_tokens, prompt_tokens = [], []
+
+    for step in range(1, STEPS + 1):
+        await reasoner.reason(observation(step), history)
+        prompt_tokens.append(reasoner.last_prompt_tokens)
+        history.record(synthetic_step(step))
+        history_tokens.append(estimate_tokens(history.render(budget)))
+
+    print(f"{STEPS} steps, {history.folded_steps} folded into the summary")
+    print(f"History tokens: step 10 {history_tokens[9]}, step 60 {history_tokens[59]}, "
+          f"step {STEPS} {history_tokens[-1]}, max {max(history_tokens)} (budget {budget})")
+    print(f"Prompt tokens: step 10 {prompt_tokens[9]}, step 60 {prompt_tokens[59]}, "
+          f"step {STEPS} {prompt_tokens[-1]}, max {max(prompt_tokens)} (budget {reasoner.token_budget})")
+
+    # The history never outgrows its budget, so neither does the prompt
+    assert max(history_tokens) <= budget
+    assert max(prompt_tokens) <= reasoner.token_budget
+    # Constant size: late steps cost no more than the first full window of steps
+    assert max(prompt_tokens[60:]) <= max(prompt_tokens[:20]) + budget // 10
+    assert len(llm.prompts) == STEPS
+
+    print("Test Complete.")
+
+if __name__ == "__main__":
+    asyncio.run(test())
@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+from datetime import datetime
+
+# Ensure root is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.issue_store import IssueStore
+from config.settings import settings
+
+def _line(row):
+    seen = datetime.fromtimestamp(row["last_seen"]).strftime("%Y-%m-%d %H:%M")
+    where = row["location"] or row["url_pattern"]
+    return f"  {row['count']:>7}x  [{row['severity']:<6}] {row['kind']:<12} {row['message'][:70]:<70}  {where}  (last {seen})"
+
+def main():
+    parser = argparse.ArgumentParser(description="New and most frequent issues from the issue store")
+    parser.add_argument("--db", default=settings.ISSUE_STORE_PATH)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--kind", choices=["console", "llm", "action_error"])
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"No issue store at {args.db} yet.")
+        return
+
+    store = IssueStore(args.db)
+    latest = store.last_run()
+    if latest:
+        previous = store.last_run(before=latest["id"])
+        new = store.new_in_run(latest["id"], limit=args.top)
+        print(f"New in run {latest['label']} (since {previous['label'] if previous else 'the beginning'}): {len(new)}")
+        for row in new:
+            print(_line(row))
+
+    top = store.top(limit=args.top, kind=args.kind)
+    print(f"\nTop {len(top)} issues by frequency:")
+    for row in top:
+        print(_line(row))
+    store.close()
+
+if __name__ == "__main__":
+    main()
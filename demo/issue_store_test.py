@@ -0,0 +1,81 @@
+import os
+import sys
+import tempfile
+import time
+
+# Ensure root is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.issue_store import IssueStore, normalize_message, fingerprint
+
+ROWS = 20000
+
+def issue(message, url="https://shop.example.com/item/42?ref=home", kind="console", location="app.js:10"):
+    return {
+        "kind": kind,
+        "severity": "high",
+        "title": "Console error",
+        "description": message,
+        "evidence": {"url": url},
+        "location": location
+    }
+
+def test():
+    # 1. Normalization: what varies between occurrences of one problem is dropped
+    a = normalize_message("Failed to load https://cdn.example.com/img/123.png?v=9 : 404 (id 0xdeadbeef)")
+    b = normalize_message('failed to load "https://cdn.example.com/img/77.png" : 500 (id 0x1f2e)')
+    print(f"Normalized: {a!r}")
+    assert a == b, (a, b)
+
+    # 2. Fingerprints: same problem on another item page matches, another message or location does not
+    same = fingerprint(issue("TypeError: x is undefined at line 12", url="https://shop.example.com/item/7"))
+    assert fingerprint(issue("TypeError: x is undefined at line 40")) == same
+    assert fingerprint(issue("TypeError: y is undefined at line 12")) != same
+    assert fingerprint(issue("TypeError: x is undefined at line 12", location="cart.js:3")) != same
+    assert fingerprint(issue("TypeError: x is undefined at line 12", kind="llm")) != same
+
+    with tempfile.TemporaryDirectory(prefix="aurick_issues_") as work_dir:
+        path = os.path.join(work_dir, "issues.db")
+
+        # 3. Run 1 reports many distinct issues, most of them repeatedly
+        first = IssueStore(path, run="run-1")
+        started = time.perf_counter()
+        for i in range(ROWS):
+            first.add([issue(f"Error in widget w{i % 1000}x", location=f"w{i % 1000}.js")] * (1 + i % 3))
+        written = first.flush()
+        print(f"Run 1: {written} fingerprints from {ROWS} reports in {(time.perf_counter() - started) * 1000:.0f}ms")
+        assert written == 1000
+        run_1 = first.run_id
+        first.close()
+
+        # 4. Run 2 repeats some of them and adds two new ones
+        second = IssueStore(path, run="run-2")
+        second.add([issue("Error in widget w1x", location="w1.js")] * 5)
+        second.add([issue("Checkout button does nothing", kind="llm", location="")])
+        second.add([issue("Unhandled rejection: timeout after 3000ms", location="api.js:88")] * 3)
+        second.flush()
+
+        # 5. Queries, timed over the full table
+        started = time.perf_counter()
+        new = second.new_in_run()
+        since = second.new_since(run_1)
+        top = second.top(limit=5)
+        top_llm = second.top(kind="llm")
+        print(f"Queries over {second.summary()['fingerprints']} fingerprints: {(time.perf_counter() - started) * 1000:.1f}ms")
+
+        assert [row["message"] for row in new] == ["unhandled rejection: timeout after #ms", "checkout button does nothing"]
+        assert {row["fingerprint"] for row in since} == {row["fingerprint"] for row in new}
+        assert len(second.new_in_run(run_1, limit=ROWS)) == 1000
+        assert [row["message"] for row in top_llm] == ["checkout button does nothing"]
+        assert top[0]["message"] == "error in widget w#x" and len(top) == 5
+        print(f"New in run 2: {[row['message'] for row in new]}")
+        print(f"Top: {[(row['message'], row['count']) for row in top[:3]]}")
+
+        summary = second.summary()
+        assert summary["new_this_run"] == 2 and summary["pending"] == 0
+        second.close()
+
+    print("Test Complete.")
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import sys
+import time
+
+# Ensure root is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm.groq_client import GroqLLM
+from agent.reasoner import PageReasoner
+from demo.llm_stub_server import StubCompletionsServer
+
+MESSAGES = [{"role": "user", "content": "ping"}]
+
+async def ticker(stop: asyncio.Event, ticks: list):
+    """Records loop ticks; a stalled event loop produces none."""
+    while not stop.is_set():
+        ticks.append(time.perf_counter())
+        await asyncio.sleep(0.01)
+
+async def test():
+    os.environ.setdefault("GROQ_API_KEY", "stub-key")
+
+    with StubCompletionsServer(delay=0.3) as server:
+        llm = GroqLLM(base_url=server.base_url, timeout=5)
+        try:
+            # 1. Event loop keeps running during a completion
+            stop, ticks = asyncio.Event(), []
+            tick_task = asyncio.create_task(ticker(stop, ticks))
+            reply = await llm.achat(MESSAGES)
+            stop.set()
+            await tick_task
+            print(f"Reply received ({len(reply)} chars), loop ticked {len(ticks)} times during the call")
+            assert len(ticks) > 5, "event loop was blocked"
+
+            # 2. Concurrent calls share pooled keep-alive connections
+            start = time.perf_counter()
+            await asyncio.gather(*(llm.achat(MESSAGES) for _ in range(8)))
+            elapsed = time.perf_counter() - start
+            await asyncio.gather(*(llm.achat(MESSAGES) for _ in range(8)))
+            print(f"8 concurrent calls took {elapsed:.2f}s; {server.requests} requests over "
+                  f"{len(server.connections)} connections")
+            assert elapsed < 1.5, "calls did not run concurrently"
+            assert len(server.connections) < server.requests, "connections were not reused"
+
+            # 3. Per-call timeout
+            try:
+                await llm.achat(MESSAGES, timeout=0.05)
+                timed_out = False
+            except Exception as e:
+                timed_out = True
+                print(f"Timeout enforced: {type(e).__name__}")
+            assert timed_out, "timeout was not enforced"
+
+            # 4. Cancellation
+            task = asyncio.create_task(llm.achat(MESSAGES))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            try:
+                await task
+                raise AssertionError("cancellation was ignored")
+            except asyncio.CancelledError:
+                print("Cancellation propagated")
+
+            # 5. Reasoner awaits the async client end to end
+            decision = await PageReasoner(llm).reason({"url": server.base_url, "title": "Stub"}, [])
+            print(f"Reasoner decision: {decision['next_action']['type']}")
+            assert decision["next_action"]["type"] == "stop"
+
+            print("Test Complete.")
+        finally:
+            await llm.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(test())
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import sys
+import time
+
+# Ensure root is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm.groq_client import GroqLLM
+from llm.scheduler import LLMScheduler
+from demo.llm_stub_server import StubCompletionsServer
+
+MESSAGES = [{"role": "user", "content": "ping"}]
+CALLS = 30
+# The stub allows 10 requests per second, i.e. 600 RPM
+LIMIT, WINDOW = 10, 1.0
+
+async def burst(llm, calls: int = CALLS, priority_of=lambda i: 0):
+    async def one(i):
+        started = time.perf_counter()
+        try:
+            if isinstance(llm, LLMScheduler):
+                await llm.achat(MESSAGES, priority=priority_of(i))
+            else:
+                await llm.achat(MESSAGES)
+            return priority_of(i), time.perf_counter() - started, None
+        except Exception as e:
+            return priority_of(i), time.perf_counter() - started, type(e).__name__
+    return await asyncio.gather(*(one(i) for i in range(calls)))
+
+async def test():
+    os.environ.setdefault("GROQ_API_KEY", "stub-key")
+
+    # 1. Unscheduled: a burst beyond the limit fails outright (this is what ended sessions)
+    with StubCompletionsServer(delay=0.05, rate_limit=(LIMIT, WINDOW)) as server:
+        llm = GroqLLM(base_url=server.base_url, timeout=5, max_retries=0)
+        try:
+            results = await burst(llm)
+        finally:
+            await llm.aclose()
+        failed = sum(1 for _, _, error in results if error)
+        print(f"Unscheduled: {failed}/{CALLS} calls failed, stub sent {server.rate_limited} 429s")
+        assert failed > 0
+
+    # 2. Scheduled at the provider's real limit: every call succeeds, (almost) no 429s
+    with StubCompletionsServer(delay=0.05, rate_limit=(LIMIT, WINDOW)) as server:
+        llm = LLMScheduler(GroqLLM(base_url=server.base_url, timeout=5, max_retries=0),
+                           rpm=LIMIT * 60 / WINDOW, tpm=0, window=WINDOW, max_concurrency=8, seed=1)
+        started = time.perf_counter()
+        try:
+            results = await burst(llm)
+        finally:
+            await llm.aclose()
+        stats = llm.stats()
+        print(f"Scheduled at the limit: {stats['completed']}/{CALLS} ok in {time.perf_counter() - started:.2f}s, "
+              f"{server.rate_limited} 429s, wait p50 {stats['wait_p50_ms']}ms p95 {stats['wait_p95_ms']}ms, "
+              f"max queue {stats['max_queue_depth']}")
+        assert stats["completed"] == CALLS and stats["failed"] == 0
+
+    # 3. Configured far above the real limit: 429s are retried after retry-after and concurrency backs off
+    with StubCompletionsServer(delay=0.05, rate_limit=(LIMIT, WINDOW)) as server:
+        llm = LLMScheduler(GroqLLM(base_url=server.base_url, timeout=5, max_retries=0),
+                           rpm=100000, tpm=0, max_concurrency=16, backoff_base=0.2, max_retries=8, seed=1)
+        try:
+            results = await burst(llm)
+        finally:
+            await llm.aclose()
+        stats = llm.stats()
+        print(f"Scheduled above the limit: {stats['completed']}/{CALLS} ok, {stats['rate_limited']} rate limited, "
+              f"{stats['retries']} retries, concurrency 16 -> {stats['min_concurrency_seen']} -> {stats['concurrency']}")
+        assert stats["completed"] == CALLS and stats["rate_limited"] > 0
+        assert stats["min_concurrency_seen"] < 16
+
+    # 4. Priorities: under the same limit, high-priority sessions wait less
+    with StubCompletionsServer(delay=0.05, rate_limit=(LIMIT, WINDOW)) as server:
+        llm = LLMScheduler(GroqLLM(base_url=server.base_url, timeout=5, max_retries=0),
+                           rpm=LIMIT * 60 / WINDOW, tpm=0, window=WINDOW, max_concurrency=4, seed=1)
+        try:
+            results = await burst(llm, priority_of=lambda i: 10 if i % 3 == 0 else 0)
+        finally:
+            await llm.aclose()
+        waits = llm.stats()["wait_mean_ms_by_priority"]
+        print(f"Mean queue wait by priority: {waits}")
+        assert waits["10"] < waits["0"]
+
+    print("Test Complete.")
+
+if __name__ == "__main__":
+    asyncio.run(test())
@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+DEFAULT_REPLY = json.dumps({
+    "page_summary": "Stub page",
+    "confidence": 0.9,
+    "next_action": {"type": "stop", "target_description": "", "reason": "Stub server reply"},
+    "potential_issues": []
+})
+
+class _CompletionsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client timed out or cancelled before the reply
+
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        stub.record(self.client_address, request)
+
+        if self.path != COMPLETIONS_PATH:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        limited = stub.admit()
+        if limited is not None:
+            retry_after, headers = limited
+            self._send_json(429, {"error": {
+                "message": f"Rate limit reached. Please try again in {retry_after:.2f}s.",
+                "type": "requests",
+                "code": "rate_limit_exceeded"
+            }}, {"retry-after": f"{retry_after:.2f}", **headers})
+            return
+
+        if stub.delay:
+            time.sleep(stub.delay)
+
+        self._send_json(200, {
+            "id": f"chatcmpl-stub-{stub.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": stub.reply},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }, stub.limit_headers())
+
+class StubCompletionsServer:
+    """
+    Minimal local imitation of the Groq chat-completions endpoint.
+    Tracks request count and distinct client connections so pooling can be verified.
+    With `rate_limit=(n, window_s)` it answers 429 with retry-after (and x-ratelimit-*
+    headers) once more than n requests arrive within a sliding window.
+    """
+    def __init__(self, reply: str = DEFAULT_REPLY, delay: float = 0.0, rate_limit=None):
+        self.reply = reply
+        self.delay = delay
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self.rate_limited = 0
+        self.connections = set()
+        self._accepted = deque()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _CompletionsHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def record(self, client_address, request):
+        with self._lock:
+            self.requests += 1
+            self.connections.add(client_address)
+
+    def _window(self, now: float):
+        limit, window = self.rate_limit
+        while self._accepted and now - self._accepted[0] >= window:
+            self._accepted.popleft()
+        return limit, window
+
+    def admit(self):
+        """None if the request may proceed, else (retry_after seconds, rate-limit headers)."""
+        if not self.rate_limit:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            limit, window = self._window(now)
+            if len(self._accepted) < limit:
+                self._accepted.append(now)
+                return None
+            self.rate_limited += 1
+            retry_after = window - (now - self._accepted[0])
+            return retry_after, {
+                "x-ratelimit-limit-requests": str(limit),
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-reset-requests": f"{retry_after:.3f}s"
+            }
+
+    def limit_headers(self):
+        if not self.rate_limit:
+            return {}
+        with self._lock:
+            now = time.monotonic()
+            limit, window = self._window(now)
+            reset = window - (now - self._accepted[0]) if self._accepted else 0.0
+            return {
+                "x-ratelimit-limit-requests": str(limit),
+                "x-ratelimit-remaining-requests": str(max(0, limit - len(self._accepted))),
+                "x-ratelimit-reset-requests": f"{reset:.3f}s"
+            }
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
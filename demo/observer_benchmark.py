@@ -0,0 +1,115 @@
+import asyncio
+import os
+import sys
+import time
+
+# Ensure root is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.playwright_manager import PlaywrightManager
+from agent.observer import Observer
+from llm.prompt_encoder import PromptEncoder, estimate_tokens
+from demo.fixture_server import FixtureServer
+
+ITERATIONS = 20
+PAGES = ["login.html", "widgets.html", "spa.html?items=300", "spa.html?items=1500", "spa.html?items=5000"]
+
+class CountingPage:
+    """Wraps a Playwright page and counts the calls that cross into the browser."""
+    def __init__(self, page):
+        self._page = page
+        self.round_trips = 0
+
+    @property
+    def url(self):
+        return self._page.url
+
+    async def title(self):
+        self.round_trips += 1
+        return await self._page.title()
+
+    async def evaluate(self, *args, **kwargs):
+        self.round_trips += 1
+        return await self._page.evaluate(*args, **kwargs)
+
+async def legacy_observe(page):
+    """The previous extraction: one round trip for the title, text and each element class."""
+    await page.title()
+    await page.evaluate("() => document.body.innerText")
+    await page.evaluate("""
+        () => Array.from(document.querySelectorAll('button'))
+            .map(b => ({text: b.innerText.trim(), disabled: b.disabled, id: b.id, class: b.className}))
+            .filter(b => b.text.length > 0)
+    """)
+    await page.evaluate("""
+        () => Array.from(document.querySelectorAll('a'))
+            .map(a => ({text: a.innerText.trim(), href: a.href}))
+            .filter(a => a.text.length > 0 && a.href.length > 0)
+    """)
+    await page.evaluate("""
+        () => Array.from(document.querySelectorAll('input, textarea, select'))
+            .map(i => ({tag: i.tagName.toLowerCase(), type: i.type || 'text', placeholder: i.placeholder || "",
+                        name: i.name || "", id: i.id || "", value: i.value || ""}))
+            .filter(i => i.type !== 'hidden')
+    """)
+
+async def measure(label, fn, counter=None):
+    """`counter` counts page round trips; without one the backend makes a single CDP call."""
+    if counter:
+        counter.round_trips = 0
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        observation = await fn()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / ITERATIONS
+    trips = counter.round_trips / ITERATIONS if counter else 1.0
+    seen = ""
+    if isinstance(observation, dict) and "interactive_elements" in observation:
+        elements = observation["interactive_elements"]
+        seen = f"  {len(elements['buttons'])} buttons / {len(elements['links'])} links / {len(elements['inputs'])} inputs"
+    print(f"  {label:<10} {trips:>5.1f} round trips  {elapsed_ms:>8.2f} ms/observe{seen}")
+    return elapsed_ms
+
+async def benchmark():
+    browser = PlaywrightManager(headless=True)
+    await browser.start()
+
+    try:
+        with FixtureServer() as server:
+            for path in PAGES:
+                await browser.open(server.url(path))
+
+                counter = CountingPage(browser.page)
+                observer = Observer(browser, mode="dom")
+                real_page = browser.page
+                browser.page = counter
+
+                print(f"\n{path}")
+                try:
+                    before = await measure("before", lambda: legacy_observe(counter), counter)
+                    after = await measure("after", observer.observe, counter)
+                finally:
+                    browser.page = real_page
+                # The accessibility backend needs the real page for its CDP session
+                ax = await measure("ax", Observer(browser, mode="ax").observe)
+                print(f"  speedup    {before / after:>5.2f}x (dom)  {before / ax:>5.2f}x (ax)")
+
+            # In-page change on a large page: a full re-read vs. only the touched region
+            await browser.open(server.url("spa.html?items=1500"))
+            encoder = PromptEncoder(budget=1200)
+            print("\nspa.html?items=1500, one field typed between observations")
+            for label, incremental in (("full", False), ("delta", True)):
+                observer = Observer(browser, mode="dom", incremental=incremental)
+                await observer.observe()  # baseline
+                elapsed, tokens = 0.0, 0
+                for i in range(ITERATIONS):
+                    await browser.page.fill("input[name=q]", f"query {i}")
+                    start = time.perf_counter()
+                    observation = await observer.observe()
+                    elapsed += time.perf_counter() - start
+                    tokens += estimate_tokens(encoder.encode(observation))
+                print(f"  {label:<10} {elapsed * 1000 / ITERATIONS:>8.2f} ms/observe  {tokens / ITERATIONS:>7.0f} prompt tokens")
+    finally:
+        await browser.close()
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
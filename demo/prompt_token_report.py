@@ -0,0 +1,67 @@
+import asyncio
+import json
+import os
+import sys
+
+# Ensure root is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.playwright_manager import PlaywrightManager
+from agent.observer import Observer
+from agent.reasoner import PageReasoner, SYSTEM_PROMPT
+from llm.prompts import PAGE_REASONING_PROMPT
+from llm.prompt_encoder import estimate_tokens
+from demo.fixture_server import FixtureServer
+
+# Each fixture stands in for one agent step
+PAGES = ["login.html", "spa.html?items=20", "spa.html?items=300", "spa.html?items=1500"]
+
+# First-step values for the other prompt sections, so only the page context differs
+PROMPT_FILL = {
+    "history": "None yet (this is the first step).",
+    "exploration": "Not tracked.",
+    "username": "standard_user",
+    "password": "secret_sauce"
+}
+
+def legacy_prompt_tokens(observation):
+    """Previous prompt: fixed [:15]/[:15]/[:10]/[:1500] caps and json.dumps(indent=2)."""
+    elements = observation["interactive_elements"]
+    capped = dict(observation)
+    capped["visible_text_summary"] = observation["visible_text_summary"][:1500]
+    capped["interactive_elements"] = {
+        "buttons": elements["buttons"][:15],
+        "links": elements["links"][:15],
+        "inputs": elements["inputs"][:10]
+    }
+    context = json.dumps(capped, indent=2, ensure_ascii=False)
+    return estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(PAGE_REASONING_PROMPT.format(page_context=context, **PROMPT_FILL))
+
+def compact_prompt_tokens(reasoner, observation):
+    context = reasoner.encoder.encode(observation)
+    return estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(PAGE_REASONING_PROMPT.format(page_context=context, **PROMPT_FILL))
+
+async def report():
+    browser = PlaywrightManager(headless=True)
+    await browser.start()
+    reasoner = PageReasoner(llm=None)
+    observer = Observer(browser)
+    totals = [0, 0]
+
+    try:
+        with FixtureServer() as server:
+            print(f"{'step':<5}{'page':<22}{'before':>8}{'after':>8}")
+            for step, path in enumerate(PAGES, 1):
+                await browser.open(server.url(path))
+                observation = await observer.observe()
+                before = legacy_prompt_tokens(observation)
+                after = compact_prompt_tokens(reasoner, observation)
+                totals[0] += before
+                totals[1] += after
+                print(f"{step:<5}{path:<22}{before:>8}{after:>8}")
+            print(f"{'total':<27}{totals[0]:>8}{totals[1]:>8}  (budget {reasoner.token_budget}/step)")
+    finally:
+        await browser.close()
+
+if __name__ == "__main__":
+    asyncio.run(report())
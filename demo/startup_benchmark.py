@@ -0,0 +1,44 @@
+import asyncio
+import os
+import sys
+import time
+
+# Ensure root is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from browser.playwright_manager import PlaywrightManager
+from agent.observer import Observer
+from demo.fixture_server import FixtureServer
+
+RUNS = 5
+
+async def first_observation(url: str, pool_url):
+    """Session start to first observation, the way run_agent.py starts a session."""
+    settings.BROWSER_POOL_URL = pool_url
+    started = time.perf_counter()
+    browser = PlaywrightManager(headless=True, settle_profile="fast")
+    try:
+        await browser.start()
+        await browser.open(url)
+        await Observer(browser).observe()
+        return (time.perf_counter() - started) * 1000, browser.lease is not None
+    finally:
+        await browser.close()
+
+async def benchmark(pool_url: str):
+    with FixtureServer() as server:
+        url = server.url("login.html")
+        for label, target in (("cold launch", None), ("pooled", pool_url)):
+            timings = []
+            for _ in range(RUNS):
+                ms, pooled = await first_observation(url, target)
+                timings.append(ms)
+            note = "" if target is None or pooled else "  (pool unavailable, fell back to launching)"
+            print(f"  {label:<12} {min(timings):>8.1f} ms best  {sum(timings) / len(timings):>8.1f} ms mean{note}")
+
+if __name__ == "__main__":
+    # Start the pool first: python run_pool.py
+    pool_url = settings.BROWSER_POOL_URL or f"http://127.0.0.1:{settings.BROWSER_POOL_PORT}"
+    print(f"Time to first observation ({RUNS} runs, pool at {pool_url})")
+    asyncio.run(benchmark(pool_url))
@@ -1,18 +1,56 @@
+import asyncio
 import os
-from groq import Groq
+from typing import Callable, Mapping, Optional
+
+import httpx
+from groq import Groq, AsyncGroq
 from loguru import logger
 
 class GroqLLM:
     """
     Wrapper for Groq API provided by the `groq` python library.
     Default Model: llama-3.3-70b-versatile
+
+    `chat` is the blocking client kept for scripts; `achat` is the async client used by
+    the agent loop. The async client shares one pooled, keep-alive HTTP connection set.
+    Behind an LLMScheduler, build it with max_retries=0 so only the scheduler retries.
     """
-    def __init__(self, model="llama-3.3-70b-versatile"):
+    def __init__(self,
+                 model="llama-3.3-70b-versatile",
+                 base_url: Optional[str] = None,
+                 timeout: float = 60.0,
+                 max_connections: int = 20,
+                 max_keepalive_connections: int = 10,
+                 max_retries: int = 2):
         self.api_key = os.getenv("GROQ_API_KEY")
         if not self.api_key:
             logger.warning("GROQ_API_KEY environment variable is not set.")
-        self.client = Groq(api_key=self.api_key)
+        self.base_url = base_url or os.getenv("GROQ_BASE_URL") or None
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.client = Groq(api_key=self.api_key, base_url=self.base_url, max_retries=max_retries)
         self.model = model
+        # Called with the response headers of every async completion (rate-limit bookkeeping)
+        self.response_hook: Optional[Callable[[Mapping[str, str]], None]] = None
+
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self._async_client: Optional[AsyncGroq] = None
+
+    @property
+    def async_client(self) -> AsyncGroq:
+        """Lazily create the pooled async client (must be created inside a running loop's lifetime)."""
+        if self._async_client is None:
+            http_client = httpx.AsyncClient(limits=self._limits, timeout=self.timeout)
+            self._async_client = AsyncGroq(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=self.max_retries,
+                http_client=http_client
+            )
+        return self._async_client
 
     def chat(self, messages, temperature=0.2):
         """
@@ -28,3 +66,41 @@ class GroqLLM:
         except Exception as e:
             logger.error(f"Groq API Error: {e}")
             raise e
+
+    async def achat(self, messages, temperature=0.2, timeout: Optional[float] = None):
+        """
+        Send a chat completion request without blocking the event loop.
+        `timeout` bounds this call only; cancelling the awaiting task aborts the request.
+        """
+        call_timeout = timeout if timeout is not None else self.timeout
+        try:
+            completions = self.async_client.chat.completions
+            create = completions.with_raw_response.create if self.response_hook else completions.create
+            response = await asyncio.wait_for(
+                create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=call_timeout
+                ),
+                timeout=call_timeout
+            )
+            if self.response_hook:
+                self.response_hook(response.headers)
+                response = await response.parse()
+            return response.choices[0].message.content
+        except asyncio.CancelledError:
+            logger.warning("Groq request cancelled.")
+            raise
+        except asyncio.TimeoutError:
+            logger.error(f"Groq API Timeout after {call_timeout}s")
+            raise
+        except Exception as e:
+            logger.error(f"Groq API Error: {e}")
+            raise e
+
+    async def aclose(self):
+        """Close pooled connections held by the async client."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
@@ -0,0 +1,172 @@
+import math
+import re
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local token estimate for Llama-style BPE vocabularies, no tokenizer download needed.
+    Punctuation counts as one token each; words cost roughly one token per four characters.
+    """
+    if not text:
+        return 0
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _TOKEN_PIECES.findall(text))
+
+def _quote(text: str, limit: int = 80) -> str:
+    text = " ".join(text.split())
+    if len(text) > limit:
+        text = text[:limit - 1] + "…"
+    return '"' + text.replace('"', "'") + '"'
+
+def _short_href(href: str, page_url: str) -> str:
+    """Same-origin links become paths; fragments are dropped."""
+    href = href.split("#", 1)[0]
+    if not href:
+        return ""
+    target, page = urlsplit(href), urlsplit(page_url or "")
+    if target.scheme in ("http", "https") and (target.scheme, target.netloc) == (page.scheme, page.netloc):
+        return (target.path or "/") + (f"?{target.query}" if target.query else "")
+    return href
+
+class PromptEncoder:
+    """
+    Compact, token-budgeted rendering of an observation for the reasoning prompt.
+    One line per element (`BUTTON: "Add to Cart"`), empty fields omitted, duplicates folded,
+    and elements admitted by priority until the budget is spent.
+    """
+    # Lower rank is admitted first: form fields drive most flows, then actions, then navigation.
+    PRIORITY = {"input": 0, "button": 1, "link": 2, "disabled": 3}
+    # Share of the budget left for the unchanged part of the page when encoding a delta
+    DELTA_REST_SHARE = 0.4
+
+    def __init__(self, budget: int = 1200, text_share: float = 0.3):
+        self.budget = budget
+        self.text_share = text_share
+
+    # --- Element lines ---
+
+    def _input_line(self, item: Dict[str, Any]) -> str:
+        tag = item.get("tag") or "input"
+        attrs = []
+        if tag == "input" and item.get("type") not in (None, "", "text"):
+            attrs.append(f"type={item['type']}")
+        for key in ("placeholder", "name", "id"):
+            if item.get(key):
+                attrs.append(f"{key}={_quote(item[key], 40)}")
+        if item.get("value"):
+            attrs.append("value=<filled>" if item.get("type") == "password" else f"value={_quote(item['value'], 40)}")
+        return f"{tag.upper()}: {' '.join(attrs)}" if attrs else tag.upper()
+
+    def _line(self, kind: str, item: Dict[str, Any], page_url: str) -> Tuple[int, str]:
+        """Rank and line of one element; `kind` is "input", "button" or "link"."""
+        if kind == "input":
+            return self.PRIORITY["input"], self._input_line(item)
+        if kind == "button":
+            if item.get("disabled"):
+                return self.PRIORITY["disabled"], f"BUTTON: {_quote(item.get('text', ''))} [disabled]"
+            return self.PRIORITY["button"], f"BUTTON: {_quote(item.get('text', ''))}"
+        href = _short_href(item.get("href", ""), page_url)
+        line = f"LINK: {_quote(item.get('text', ''))}"
+        return self.PRIORITY["link"], f"{line} -> {href}" if href else line
+
+    def _element_lines(self, observation: Dict[str, Any]) -> List[Tuple[int, str]]:
+        elements = observation.get("interactive_elements", {})
+        page_url = observation.get("url", "")
+        ranked: List[Tuple[int, str]] = []
+
+        for kind, group in (("input", "inputs"), ("button", "buttons"), ("link", "links")):
+            for item in elements.get(group, []):
+                ranked.append(self._line(kind, item, page_url))
+
+        # Fold exact duplicates ("Add to cart" x 6) while keeping first-seen order
+        counts: Dict[str, int] = {}
+        order: List[Tuple[int, str]] = []
+        for rank, line in ranked:
+            if line not in counts:
+                order.append((rank, line))
+                counts[line] = 0
+            counts[line] += 1
+        folded = [(rank, f"{line} (x{counts[line]})" if counts[line] > 1 else line) for rank, line in order]
+        return sorted(folded, key=lambda pair: pair[0])  # stable: document order within a rank
+
+    def _delta_lines(self, observation: Dict[str, Any]) -> List[str]:
+        """What changed since the previous step: + added, ~ changed, - removed, then new text."""
+        delta = observation["delta"]
+        page_url = observation.get("url", "")
+        lines = []
+        for mark, group in (("+", "added"), ("~", "changed"), ("-", "removed")):
+            for item in delta.get(group, []):
+                lines.append(f"{mark} {self._line(item.get('kind', 'button'), item, page_url)[1]}")
+        for text in delta.get("text", []):
+            lines.append(f"+ TEXT: {_quote(text, 200)}")
+        return lines
+
+    # --- Encoding ---
+
+    def encode(self, observation: Dict[str, Any], budget: Optional[int] = None) -> str:
+        """
+        Observations with a "delta" (incremental mode) lead with the changes; the unchanged
+        rest of the page then gets at most DELTA_REST_SHARE of the budget.
+        """
+        budget = budget or self.budget
+        header = [f"URL: {observation.get('url', '')}"]
+        if observation.get("title"):
+            header.append(f"TITLE: {_quote(observation['title'], 120)}")
+
+        if observation.get("delta"):
+            changes = self._delta_lines(observation) or ["(no visible change)"]
+            change_budget = budget // 2
+            kept = []
+            for line in changes:
+                if estimate_tokens("\n".join(kept + [line])) > change_budget:
+                    kept.append(f"({len(changes) - len(kept)} more changes omitted)")
+                    break
+                kept.append(line)
+            header += ["CHANGES SINCE THE PREVIOUS STEP:"] + kept + ["REST OF THE PAGE (unchanged):"]
+            budget = min(budget, estimate_tokens("\n".join(header)) + int(budget * self.DELTA_REST_SHARE))
+        used = estimate_tokens("\n".join(header))
+
+        text = " ".join((observation.get("visible_text_summary") or "").split())
+        text_reserve = min(estimate_tokens(text), int(budget * self.text_share))
+
+        lines = []
+        element_lines = self._element_lines(observation)
+        if observation.get("delta"):
+            # Added and changed elements were already listed with the changes
+            listed = {line[2:] for line in header if line[:2] in ("+ ", "~ ")}
+            element_lines = [(rank, line) for rank, line in element_lines if line not in listed]
+        element_limit = budget - text_reserve - 8  # keep room for the "omitted" note
+        omitted = 0
+        for _, line in element_lines:
+            cost = estimate_tokens(line) + 1
+            if used + cost > element_limit:
+                omitted += 1
+                continue  # a shorter, lower-priority line may still fit
+            lines.append(line)
+            used += cost
+        if omitted:
+            note = f"({omitted} more elements omitted)"
+            lines.append(note)
+            used += estimate_tokens(note) + 1
+
+        text_budget = budget - used - 2
+        if text and text_budget > 0:
+            lines.append(f"TEXT: {self._fit_text(text, text_budget)}")
+
+        return "\n".join(header + lines)
+
+    @staticmethod
+    def _fit_text(text: str, budget: int) -> str:
+        if estimate_tokens(text) <= budget:
+            return text
+        # Binary search on a character cut so the estimate lands inside the budget
+        lo, hi = 0, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if estimate_tokens(text[:mid]) + 1 <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        return text[:lo].rstrip() + "…"
@@ -0,0 +1,399 @@
+import asyncio
+import heapq
+import itertools
+import random
+import re
+import time
+from collections import deque, defaultdict
+from typing import Dict, Any, List, Mapping, Optional
+
+from groq import APIConnectionError, APITimeoutError
+from loguru import logger
+
+from llm.prompt_encoder import estimate_tokens
+
+# Statuses worth another attempt: rate limited, request timeout, conflicts and server-side failures
+RETRYABLE_STATUS = {408, 409, 429}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds from a rate-limit header: "2", "0.5", "7.66s", "1m2.5s" or "120ms"."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+def _headers_of(error: BaseException) -> Mapping[str, str]:
+    response = getattr(error, "response", None)
+    return getattr(response, "headers", None) or {}
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """The server's wait hint: retry-after-ms, retry-after, then the rate-limit reset headers."""
+    if headers.get("retry-after-ms") is not None:
+        ms = parse_duration(headers.get("retry-after-ms"))
+        if ms is not None:
+            return ms / 1000
+    for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        seconds = parse_duration(headers.get(name))
+        if seconds is not None:
+            return seconds
+    return None
+
+def is_retryable(error: BaseException) -> bool:
+    # Timeouts are the caller's budget for this call; retrying would silently double it
+    if isinstance(error, (asyncio.TimeoutError, APITimeoutError)):
+        return False
+    if isinstance(error, APIConnectionError):
+        return True
+    status = getattr(error, "status_code", None)
+    return status in RETRYABLE_STATUS or (status is not None and status >= 500)
+
+class TokenBucket:
+    """
+    Refills `per_minute` units a minute; holds what `window` seconds of refill add up to
+    (the provider's enforcement window), so bursts never exceed one window's allowance.
+    A rate of 0 means unlimited.
+    """
+    def __init__(self, per_minute: float, window: float = 60.0):
+        self.rate = max(0.0, per_minute) / 60
+        self.capacity = max(1.0, self.rate * window)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (a request above capacity waits for a full bucket)."""
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float):
+        if self.rate:
+            self._refill(now)
+            self.level -= min(amount, self.capacity)
+
+    def limit_to(self, remaining: float, now: float):
+        """Trust the provider's count when it has less left than we think."""
+        if self.rate:
+            self._refill(now)
+            self.level = min(self.level, remaining)
+
+class _Ticket:
+    __slots__ = ("priority", "seq", "cost", "future", "epoch", "enqueued")
+
+    def __init__(self, priority: int, seq: int, cost: float, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.cost = cost
+        self.future = future
+        self.epoch = 0
+        self.enqueued = time.monotonic()
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        # Higher priority first, then first come first served (a retry keeps its original place)
+        return (-self.priority, self.seq) < (-other.priority, other.seq)
+
+class ScheduledClient:
+    """One session's view of the scheduler: same achat/chat/aclose surface as GroqLLM."""
+    def __init__(self, scheduler: "LLMScheduler", priority: int = 0, label: Optional[str] = None, metrics=None):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.label = label
+        self.metrics = metrics
+
+    @property
+    def model(self) -> str:
+        return self.scheduler.model
+
+    def chat(self, messages, temperature=0.2):
+        return self.scheduler.chat(messages, temperature=temperature)
+
+    async def achat(self, messages, temperature=0.2, timeout: Optional[float] = None):
+        return await self.scheduler.achat(messages, temperature=temperature, timeout=timeout,
+                                          priority=self.priority, metrics=self.metrics)
+
+    async def aclose(self):
+        pass  # the scheduler and its client outlive any one session
+
+class LLMScheduler:
+    """
+    The Dispatcher: One admission queue in front of the LLM client for every session of a
+    process. A request leaves the queue (highest priority first) once a concurrency slot is
+    free and the requests-per-minute and tokens-per-minute buckets can pay for it. Rate
+    limits and server errors are retried with jittered exponential backoff; a 429 pauses
+    the whole queue for the server's retry-after and halves the concurrency limit, which
+    then grows back by one per window of successes. Drop-in for GroqLLM (`achat`, `model`),
+    or hand each session its own priority with `session()`.
+    """
+    def __init__(self,
+                 llm,
+                 rpm: float = 30,
+                 tpm: float = 12000,
+                 max_concurrency: int = 8,
+                 min_concurrency: int = 1,
+                 max_retries: int = 5,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 60.0,
+                 completion_tokens: int = 300,
+                 window: float = 60.0,
+                 seed: Optional[int] = None):
+        self.llm = llm
+        self.requests = TokenBucket(rpm, window)
+        self.tokens = TokenBucket(tpm, window)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.concurrency = self.max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.completion_tokens = completion_tokens
+        self._random = random.Random(seed)
+
+        self._queue: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_at = 0.0
+        # AIMD: one decrease per epoch, so a burst of 429s from the same window counts once
+        self._epoch = 0
+        self._successes = 0
+
+        self._waits = deque(maxlen=5000)
+        self._waits_by_priority: Dict[int, List[float]] = defaultdict(lambda: [0, 0.0])
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "retries": 0,
+                         "rate_limited": 0, "max_queue_depth": 0, "min_concurrency_seen": self.concurrency}
+
+        # Successful responses carry the provider's remaining quota
+        if hasattr(llm, "response_hook"):
+            llm.response_hook = self.observe_headers
+
+    @classmethod
+    def from_settings(cls, settings, llm=None, share: int = 1) -> "LLMScheduler":
+        """
+        Scheduler over a GroqLLM without SDK retries. `share` splits the account's limits
+        between processes that each run a scheduler (sweep workers).
+        """
+        if llm is None:
+            from llm.groq_client import GroqLLM
+            llm = GroqLLM(max_retries=0)
+        share = max(1, share)
+        return cls(
+            llm,
+            rpm=settings.LLM_RPM / share,
+            tpm=settings.LLM_TPM / share,
+            max_concurrency=max(1, settings.LLM_MAX_CONCURRENCY // share),
+            max_retries=settings.LLM_MAX_RETRIES,
+            backoff_base=settings.LLM_BACKOFF_BASE,
+            backoff_max=settings.LLM_BACKOFF_MAX,
+            completion_tokens=settings.LLM_COMPLETION_TOKENS
+        )
+
+    @property
+    def model(self) -> str:
+        return getattr(self.llm, "model", "unknown")
+
+    def session(self, priority: int = 0, label: Optional[str] = None, metrics=None) -> ScheduledClient:
+        """A client for one session; its requests queue at `priority` and record llm.queue_wait in `metrics`."""
+        return ScheduledClient(self, priority=priority, label=label, metrics=metrics)
+
+    # --- Admission ---
+
+    def _cost(self, messages) -> float:
+        return sum(estimate_tokens(str(m.get("content", ""))) for m in messages) + self.completion_tokens
+
+    def _schedule(self, delay: float):
+        """Wake the queue after `delay`, unless an earlier wake-up is already set."""
+        loop = asyncio.get_running_loop()
+        at = loop.time() + delay
+        if self._timer is not None:
+            if self._timer_at <= at:
+                return
+            self._timer.cancel()
+        self._timer_at = at
+        self._timer = loop.call_later(delay, self._wake)
+
+    def _wake(self):
+        self._timer = None
+        self._pump()
+
+    def _pump(self):
+        """Admit queued requests in priority order while slots and both buckets allow."""
+        now = time.monotonic()
+        while self._queue:
+            ticket = self._queue[0]
+            if ticket.future.done():  # cancelled while waiting
+                heapq.heappop(self._queue)
+                continue
+            if self._in_flight >= self.concurrency:
+                return  # a finishing request pumps again
+            wait = max(self._paused_until - now,
+                       self.requests.wait_time(1, now),
+                       self.tokens.wait_time(ticket.cost, now))
+            if wait > 0:
+                self._schedule(wait)
+                return
+            heapq.heappop(self._queue)
+            self.requests.take(1, now)
+            self.tokens.take(ticket.cost, now)
+            self._in_flight += 1
+            ticket.epoch = self._epoch
+            ticket.future.set_result(None)
+
+    async def _admit(self, ticket: _Ticket):
+        heapq.heappush(self._queue, ticket)
+        self.counters["max_queue_depth"] = max(self.counters["max_queue_depth"], self.queue_depth)
+        self._pump()
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            # Admitted in the same tick the waiter was cancelled: give the slot back
+            if ticket.future.done() and not ticket.future.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        self._in_flight -= 1
+        self._pump()
+
+    # --- Feedback ---
+
+    def _backoff(self, attempt: int, hint: Optional[float]) -> float:
+        """Full jitter on the exponential step; a server hint is a floor, jittered upwards only."""
+        step = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        if hint is not None:
+            return min(self.backoff_max, hint) + self._random.uniform(0, self.backoff_base)
+        return self._random.uniform(step / 2, step)
+
+    def _on_success(self):
+        self._successes += 1
+        if self.concurrency < self.max_concurrency and self._successes >= self.concurrency:
+            self._successes = 0
+            self.concurrency += 1
+            self._pump()
+
+    def _on_rate_limited(self, ticket: _Ticket, delay: float):
+        self.counters["rate_limited"] += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        if ticket.epoch == self._epoch:
+            self._epoch += 1
+            self._successes = 0
+            self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+            self.counters["min_concurrency_seen"] = min(self.counters["min_concurrency_seen"], self.concurrency)
+            logger.warning(f"LLM rate limited: pausing {delay:.1f}s, concurrency now {self.concurrency}")
+
+    def observe_headers(self, headers: Mapping[str, str]):
+        """Align the buckets with the provider's x-ratelimit-* view of the account."""
+        now = time.monotonic()
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None:
+            try:
+                self.tokens.limit_to(float(remaining_tokens), now)
+            except ValueError:
+                pass
+        if headers.get("x-ratelimit-remaining-requests") in ("0", "0.0"):
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                self._paused_until = max(self._paused_until, now + reset)
+
+    # --- Calls ---
+
+    async def achat(self, messages, temperature=0.2, timeout: Optional[float] = None,
+                    priority: int = 0, metrics=None):
+        """Queue, send and retry one completion; raises the last error once retries run out."""
+        loop = asyncio.get_running_loop()
+        ticket = _Ticket(priority, next(self._seq), self._cost(messages), loop.create_future())
+        self.counters["submitted"] += 1
+        attempt = 0
+        while True:
+            await self._admit(ticket)
+            waited_ms = (time.monotonic() - ticket.enqueued) * 1000
+            self._record_wait(priority, waited_ms, metrics)
+            try:
+                reply = await self.llm.achat(messages, temperature=temperature, timeout=timeout)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self.counters["failed"] += 1
+                    self._release()
+                    raise
+                headers = _headers_of(e)
+                delay = self._backoff(attempt, retry_after(headers))
+                if getattr(e, "status_code", None) == 429:
+                    self._on_rate_limited(ticket, delay)
+                    self.observe_headers(headers)
+                attempt += 1
+                self.counters["retries"] += 1
+                logger.info(f"LLM call failed ({type(e).__name__}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                self._release()
+                await asyncio.sleep(delay)
+                # Back in line at the original position among equal priorities
+                ticket.future = loop.create_future()
+                ticket.enqueued = time.monotonic()
+                continue
+            except BaseException:
+                self._release()  # cancelled mid-call
+                raise
+            self.counters["completed"] += 1
+            self._on_success()
+            self._release()
+            return reply
+
+    def chat(self, messages, temperature=0.2):
+        """Blocking passthrough for scripts; not queued, since it cannot share the event loop."""
+        return self.llm.chat(messages, temperature=temperature)
+
+    async def aclose(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if hasattr(self.llm, "aclose"):
+            await self.llm.aclose()
+
+    # --- Metrics ---
+
+    def _record_wait(self, priority: int, ms: float, metrics):
+        self._waits.append(ms)
+        totals = self._waits_by_priority[priority]
+        totals[0] += 1
+        totals[1] += ms
+        if metrics is not None:
+            metrics.record("llm.queue_wait", ms)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for t in self._queue if not t.future.done())
+
+    def stats(self) -> Dict[str, Any]:
+        ordered = sorted(self._waits)
+
+        def pct(p: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))], 2) if ordered else 0.0
+
+        return {
+            **self.counters,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "concurrency": self.concurrency,
+            "wait_p50_ms": pct(50),
+            "wait_p95_ms": pct(95),
+            "wait_max_ms": round(ordered[-1], 2) if ordered else 0.0,
+            "wait_mean_ms_by_priority": {
+                str(p): round(total / count, 2) for p, (count, total) in sorted(self._waits_by_priority.items())
+            },
+            # Weights for combining the means of several schedulers (e.g. the workers of a sharded sweep)
+            "waits_by_priority": {str(p): count for p, (count, _) in sorted(self._waits_by_priority.items())}
+        }
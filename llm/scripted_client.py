@@ -0,0 +1,85 @@
+import asyncio
+import json
+import random
+import time
+from typing import Dict, Any, List, Optional
+from loguru import logger
+
+STOP_DECISION = {
+    "page_summary": "Script exhausted",
+    "confidence": 1.0,
+    "next_action": {"type": "stop", "target_description": "", "reason": "No scripted action left"},
+    "potential_issues": []
+}
+
+class ScriptedLLM:
+    """
+    Deterministic stand-in for GroqLLM used by offline benchmarks.
+    Returns decisions from a script instead of calling a provider, with a configurable
+    simulated latency so the rest of the agent loop can be measured reproducibly.
+
+    A script is either an ordered list of decisions, or a dict mapping a URL substring to
+    the ordered decisions for pages whose URL contains it.
+    """
+    def __init__(self,
+                 script,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 seed: int = 0,
+                 model: str = "scripted"):
+        self.model = model
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)  # seeded, so jittered runs are still repeatable
+        self._by_url: Dict[str, List[Dict[str, Any]]] = script if isinstance(script, dict) else {"": list(script)}
+        self._cursors = {key: 0 for key in self._by_url}
+        self.calls = 0
+
+    @classmethod
+    def from_session(cls, path: str, **kwargs) -> "ScriptedLLM":
+        """Replay the decisions recorded in a session file (.json) or journal (.jsonl)."""
+        if path.endswith(".jsonl"):
+            from agent.memory import Memory
+            steps = list(Memory.read_journal(path))
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                steps = json.load(f)
+        decisions = [step["decision"] for step in steps if step.get("decision")]
+        logger.info(f"Replaying {len(decisions)} decisions from {path}")
+        return cls(decisions, **kwargs)
+
+    def _url_of(self, messages) -> str:
+        for message in messages:
+            for line in message.get("content", "").splitlines():
+                if line.startswith("URL: "):
+                    return line[5:].strip()
+        return ""
+
+    def _next_decision(self, messages) -> Dict[str, Any]:
+        url = self._url_of(messages)
+        # Longest matching key wins, so specific pages can override a catch-all ""
+        for key in sorted(self._by_url, key=len, reverse=True):
+            if key in url:
+                cursor = self._cursors[key]
+                if cursor < len(self._by_url[key]):
+                    self._cursors[key] += 1
+                    return self._by_url[key][cursor]
+        return STOP_DECISION
+
+    def _delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def chat(self, messages, temperature=0.2):
+        self.calls += 1
+        time.sleep(self._delay())
+        return json.dumps(self._next_decision(messages))
+
+    async def achat(self, messages, temperature=0.2, timeout: Optional[float] = None):
+        self.calls += 1
+        await asyncio.sleep(self._delay())
+        return json.dumps(self._next_decision(messages))
+
+    async def aclose(self):
+        pass
@@ -9,8 +9,10 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from config.settings import settings
 from browser.playwright_manager import PlaywrightManager
-from llm.groq_client import GroqClient
+from llm.groq_client import GroqLLM
+from llm.scheduler import LLMScheduler
 from agent.agent import AurickLiteAgent
+from agent.sharded_runner import ShardedRunner
 
 async def main():
     # 1. Setup
@@ -27,7 +29,8 @@ async def main():
 
     # 2. Initialize Core Systems
     browser_manager = PlaywrightManager()
-    groq_client = GroqClient(api_key=settings.GROQ_API_KEY)
+    # Retries rate limits with backoff instead of ending the session on the first 429
+    groq_client = LLMScheduler.from_settings(settings) if settings.LLM_SCHEDULER_ENABLED else GroqLLM()
     
     agent = AurickLiteAgent(browser=browser_manager, groq=groq_client)
 
@@ -43,7 +46,24 @@ async def main():
     except Exception as e:
         logger.critical(f"Unexpected crash: {e}")
     finally:
-        await browser_manager.stop()
+        await browser_manager.close()
+        await groq_client.aclose()
+
+def sweep(urls):
+    """Several start URLs: one session each, spread over worker processes (SWEEP_WORKERS, 0 = per core)."""
+    if not settings.GROQ_API_KEY:
+        logger.error("GROQ_API_KEY is missing via .env or environment variable.")
+        return
+    runner = ShardedRunner(
+        workers=settings.SWEEP_WORKERS or None,
+        concurrency=settings.SWEEP_CONCURRENCY,
+        max_steps=settings.MAX_STEPS
+    )
+    summary = runner.run(urls)
+    logger.info(f"{summary['succeeded']}/{summary['sessions']} sessions completed, {summary['issues']} issues.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if len(sys.argv) > 2:
+        sweep(sys.argv[1:])
+    else:
+        asyncio.run(main())
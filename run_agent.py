@@ -55,6 +55,7 @@ async def main():
         print(f"❌ Session failed: {e}")
     finally:
         await browser.close()
+        await llm.aclose()
         print("✅ Session complete. Logs saved in /logs folder.")
 
 if __name__ == "__main__":
@@ -0,0 +1,25 @@
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load env immediately
+load_dotenv()
+
+# Ensure root is in path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import settings
+from browser.pool import BrowserPool
+
+# Usage:
+#   python run_pool.py
+# then run sessions with BROWSER_POOL_URL=http://127.0.0.1:9300 (BROWSER_POOL_PORT) so they
+# attach to a warm browser instead of launching one. Sessions fall back to launching
+# their own browser when the pool is down or has no idle browser.
+
+if __name__ == "__main__":
+    pool = BrowserPool.from_settings(settings)
+    try:
+        pool.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load env immediately
+load_dotenv()
+
+# Ensure root is in path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import settings
+from llm.groq_client import GroqLLM
+from llm.scheduler import LLMScheduler
+from agent.session_runner import SessionRunner
+from agent.sharded_runner import ShardedRunner
+from agent.decision_cache import DecisionCache
+
+# Usage:
+#   python run_sweep.py scenarios.json        (JSON list of URLs or {"url", "name", "max_steps", "observer", "priority"} objects)
+#   python run_sweep.py urls.txt              (one start URL per line)
+#   python run_sweep.py https://a.example https://b.example
+# SWEEP_WORKERS > 1 (or 0 for one per CPU core) spreads the sessions over worker processes.
+
+def load_scenarios(args):
+    if len(args) == 1 and os.path.isfile(args[0]):
+        with open(args[0], "r", encoding="utf-8") as f:
+            if args[0].endswith(".json"):
+                return json.load(f)
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return args
+
+def run_sharded(scenarios):
+    """Process pool: runs in the main thread so Ctrl+C reaches the runner and stops it gracefully."""
+    runner = ShardedRunner(
+        workers=settings.SWEEP_WORKERS or None,
+        concurrency=settings.SWEEP_CONCURRENCY,
+        max_steps=settings.MAX_STEPS
+    )
+    print(f"🚀 Sweeping {len(scenarios)} scenarios on {runner.workers} workers x {settings.SWEEP_CONCURRENCY}...")
+    summary = runner.run(scenarios)
+    print(f"✅ {summary['succeeded']}/{summary['sessions']} sessions completed, {summary['issues']} issues.")
+
+async def main(scenarios):
+    # All sessions share one admission queue, so together they stay under the provider's limits
+    llm = LLMScheduler.from_settings(settings) if settings.LLM_SCHEDULER_ENABLED else GroqLLM()
+    cache = DecisionCache.from_settings(settings) if settings.DECISION_CACHE_ENABLED else None
+    runner = SessionRunner(
+        llm=llm,
+        headless=True,
+        concurrency=settings.SWEEP_CONCURRENCY,
+        max_steps=settings.MAX_STEPS,
+        decision_cache=cache
+    )
+
+    print(f"🚀 Sweeping {len(scenarios)} scenarios with concurrency {settings.SWEEP_CONCURRENCY}...")
+    try:
+        summary = await runner.run(scenarios)
+        print(f"✅ {summary['succeeded']}/{summary['sessions']} sessions completed, {summary['issues']} issues.")
+    finally:
+        await llm.aclose()
+
+if __name__ == "__main__":
+    if not os.getenv("GROQ_API_KEY"):
+        print("ERROR: GROQ_API_KEY not found in env.")
+        sys.exit(1)
+
+    scenarios = load_scenarios(sys.argv[1:])
+    if not scenarios:
+        print("ERROR: no start URLs or scenario file given.")
+        sys.exit(1)
+    try:
+        SessionRunner.normalize_all(scenarios)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    if settings.SWEEP_WORKERS != 1:
+        run_sharded(scenarios)
+    else:
+        asyncio.run(main(scenarios))
@@ -0,0 +1,99 @@
+import os
+import time
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
+
+class _Span:
+    """Times one block with the monotonic clock and records it on exit."""
+    __slots__ = ("metrics", "name", "start", "ms")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+        self.ms = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.start) * 1000
+        self.metrics.record(self.name, self.ms)
+        return False
+
+class _NoopSpan:
+    """Shared do-nothing span so disabled metrics cost one attribute lookup and a call."""
+    __slots__ = ()
+    ms = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+class Metrics:
+    """
+    Per-session latency instrumentation.
+    `span(name)` times a block (usable in sync and async code); `summary()` gives
+    p50/p95/max histograms; `export_prometheus()` writes a Prometheus text-format file.
+    """
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, ms: float):
+        if self.enabled:
+            self.samples[name].append(ms)  # list.append is atomic, so worker threads may record too
+
+    @staticmethod
+    def _percentile(ordered: List[float], pct: float) -> float:
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for name, values in sorted(self.samples.items()):
+            if not values:
+                continue
+            ordered = sorted(values)
+            result[name] = {
+                "count": len(ordered),
+                "total_ms": round(sum(ordered), 2),
+                "p50_ms": round(self._percentile(ordered, 50), 2),
+                "p95_ms": round(self._percentile(ordered, 95), 2),
+                "max_ms": round(ordered[-1], 2)
+            }
+        return result
+
+    def export_prometheus(self, path: str, labels: Optional[Dict[str, str]] = None) -> str:
+        """
+        Write spans as a Prometheus/OpenMetrics-compatible summary (seconds), e.g. for the
+        node_exporter textfile collector. The file is replaced atomically.
+        """
+        base = ",".join(f'{k}="{v}"' for k, v in sorted((labels or {}).items()))
+        lines = [
+            "# HELP aurick_span_duration_seconds Duration of agent phases and browser/LLM calls.",
+            "# TYPE aurick_span_duration_seconds summary"
+        ]
+        for name, stats in self.summary().items():
+            label = f'span="{name}"' + (f",{base}" if base else "")
+            for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("1", "max_ms")):
+                lines.append(f'aurick_span_duration_seconds{{{label},quantile="{quantile}"}} {stats[key] / 1000:.6f}')
+            lines.append(f"aurick_span_duration_seconds_sum{{{label}}} {stats['total_ms'] / 1000:.6f}")
+            lines.append(f"aurick_span_duration_seconds_count{{{label}}} {stats['count']}")
+        lines.append("# EOF")
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+        return path